@@ -0,0 +1,161 @@
+"""
+Buffered saving of Zen executions.
+
+Workers do not save an execution before returning its result, executions are added to a buffer
+that a background thread saves in batches, with one insert, when ``max_size`` executions are
+pending or every ``flush_interval`` seconds. The statistics of their Zens are updated in the same
+transaction, and the state of a Zen is only written when a run changed it.
+
+Executions of a run are visible in the API up to ``flush_interval`` seconds after its result.
+Pending executions are saved when the worker process shuts down, check ``apps.core.tasks``.
+
+A batch that cannot be saved because of the database, e.g. it is locked, is saved with the next
+one, up to ``MAX_PENDING_BATCHES`` batches. If a row of the batch is wrong, e.g. its Zen was
+deleted, the executions are saved per Zen, and only the ones of the wrong Zen are lost.
+"""
+import collections
+import logging
+import os
+import threading
+
+from django.db import IntegrityError, OperationalError, close_old_connections, transaction
+
+from apps.core.models import Execution, Zen, ZenStatistics
+
+logger = logging.getLogger(__name__)
+
+
+def save_executions(executions: list[Execution], zen_states: dict) -> None:
+    """Saves executions in one transaction, along the statistics of their Zens.
+
+    Args:
+        executions: The unsaved executions.
+        zen_states: The new state of the Zens whose state changed, by Zen pk.
+    """
+    total_times = collections.defaultdict(list)
+    for execution in executions:
+        total_times[execution.zen_id].append(execution.total_time)
+
+    try:
+        with transaction.atomic():
+            # bulk_create does not call Execution.save, statistics are recorded here.
+            Execution.objects.bulk_create(executions)
+            for zen_id, times in total_times.items():
+                ZenStatistics.record(zen_id, times)
+            for zen_id, state in zen_states.items():
+                Zen.objects.filter(pk=zen_id).update(state=state)
+    except Exception:
+        # The transaction was rolled back, the executions can be saved again.
+        for execution in executions:
+            execution.pk = None
+        raise
+
+
+class ExecutionBuffer:
+    """Executions waiting to be saved by a background thread, check the module docstring.
+
+    The thread is started by the first ``add`` of every process, so the buffer can be created
+    before celery prefork workers fork.
+
+    Args:
+        max_size: Pending executions that trigger a save.
+        flush_interval: Max seconds an execution is pending.
+    """
+    # Batches kept while the database cannot save them, later executions are dropped.
+    MAX_PENDING_BATCHES = 10
+
+    def __init__(self, max_size: int, flush_interval: float):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._executions: list[Execution] = []
+        self._zen_states: dict = {}
+        self._lock = threading.Lock()
+        self._full = threading.Event()
+        self._pid: int | None = None
+
+    def add(self, execution: Execution, zen_state: str | None = None) -> None:
+        """Adds an execution to be saved, and the new state of its Zen if it changed."""
+        self._ensure_thread()
+        with self._lock:
+            self._executions.append(execution)
+            if zen_state is not None:
+                # The last run decides the state.
+                self._zen_states[execution.zen_id] = zen_state
+            if len(self._executions) >= self.max_size:
+                self._full.set()
+
+    def flush(self) -> int:
+        """Saves the pending executions, returns how many."""
+        with self._lock:
+            executions, self._executions = self._executions, []
+            zen_states, self._zen_states = self._zen_states, {}
+            self._full.clear()
+
+        if not executions and not zen_states:
+            return 0
+
+        try:
+            save_executions(executions, zen_states)
+        except OperationalError:
+            logger.exception('Could not save %s executions, retrying them', len(executions))
+            self._requeue(executions, zen_states)
+            return 0
+        except IntegrityError:
+            logger.exception('Could not save %s executions, saving them per Zen', len(executions))
+            return self._save_per_zen(executions, zen_states)
+        except Exception:  # pylint: disable=W0718
+            logger.exception('Could not save %s executions', len(executions))
+            return 0
+        return len(executions)
+
+    def _requeue(self, executions: list[Execution], zen_states: dict) -> None:
+        """Puts back executions that could not be saved, they are saved by the next flush."""
+        with self._lock:
+            pending = executions + self._executions
+            limit = max(self.max_size, 1) * self.MAX_PENDING_BATCHES
+            if len(pending) > limit:
+                logger.error('Dropping %s executions, the database cannot save them',
+                             len(pending) - limit)
+                pending = pending[:limit]
+            self._executions = pending
+            # States added since the flush are newer.
+            self._zen_states = {**zen_states, **self._zen_states}
+
+    def _save_per_zen(self, executions: list[Execution], zen_states: dict) -> int:
+        """Saves the executions of every Zen in its own transaction, returns how many were
+        saved."""
+        executions_per_zen = collections.defaultdict(list)
+        for execution in executions:
+            executions_per_zen[execution.zen_id].append(execution)
+
+        saved = 0
+        for zen_id in executions_per_zen.keys() | zen_states.keys():
+            zen_executions = executions_per_zen.get(zen_id, [])
+            try:
+                save_executions(zen_executions,
+                                {zen_id: zen_states[zen_id]} if zen_id in zen_states else {})
+            except Exception:  # pylint: disable=W0718
+                logger.exception('Could not save %s executions of the Zen %s',
+                                 len(zen_executions), zen_id)
+                continue
+            saved += len(zen_executions)
+        return saved
+
+    def _ensure_thread(self) -> None:
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # Executions inherited from a parent process are saved by the parent.
+                self._executions, self._zen_states = [], {}
+                self._full = threading.Event()
+                threading.Thread(target=self._run, daemon=True, name='execution-buffer').start()
+                self._pid = os.getpid()
+
+    def _run(self) -> None:
+        while True:
+            self._full.wait(self.flush_interval)
+            # The connection of this thread may have been closed by the database.
+            close_old_connections()
+            self.flush()
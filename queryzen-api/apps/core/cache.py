@@ -0,0 +1,70 @@
+"""
+Result cache for Zen executions.
+
+Results are keyed by the Zen pk, the database name and the rendered query, so a Zen version that
+is run with the same parameters against the same database is only executed once per TTL.
+
+Every (collection, name) pair has a 'generation' stored in the cache, it is part of every result
+key. Creating a new version or deleting a Zen replaces the generation, which makes all the
+previous results of that Zen unreachable, they are eventually evicted by the cache backend.
+
+Generations are kept in the same cache as the results, so the cache has to be shared by all the
+API processes, check ``settings.ZEN_RESULT_CACHE_URL``, for a Zen created or deleted in one of
+them to invalidate the results cached by the others.
+"""
+import hashlib
+import time
+import typing
+
+from django.conf import settings
+from django.core.cache import caches, BaseCache
+
+
+def get_cache() -> BaseCache:
+    return caches[settings.ZEN_RESULT_CACHE]
+
+
+def get_ttl(zen) -> int:
+    """Returns the time in seconds that a result of the given Zen can be cached,
+    0 means that results are not cached.
+    """
+    if zen.cache_ttl is not None:
+        return zen.cache_ttl
+    return settings.ZEN_RESULT_CACHE_TTL
+
+
+def _generation_key(collection: str, name: str) -> str:
+    return f'zen:generation:{collection}:{name}'
+
+
+def get_generation(collection: str, name: str) -> int:
+    # The generation is time based instead of a counter, if the key gets evicted we will never
+    # hand out a generation that was already used, which could serve stale results.
+    return get_cache().get_or_set(_generation_key(collection, name), time.time_ns, timeout=None)
+
+
+def make_key(zen, database: str, query: str) -> str:
+    """Creates the cache key of a result, the query is hashed to keep keys short."""
+    generation = get_generation(zen.collection, zen.name)
+    digest = hashlib.sha256(query.encode()).hexdigest()
+    return f'zen:result:{zen.pk}:{generation}:{database}:{digest}'
+
+
+def get_result(zen, database: str, query: str) -> dict | None:
+    return get_cache().get(make_key(zen, database, query))
+
+
+def set_result(zen, database: str, query: str, result: dict) -> None:
+    get_cache().set(make_key(zen, database, query), result, timeout=get_ttl(zen))
+
+
+def invalidate(collection: str, name: str) -> None:
+    """Invalidates every cached result of every version of the given Zen."""
+    get_cache().set(_generation_key(collection, name), time.time_ns(), timeout=None)
+
+
+def invalidate_many(names: typing.Iterable[tuple[str, str]]) -> None:
+    """Same as ``invalidate`` for several (collection, name) pairs, in one cache operation."""
+    generation = time.time_ns()
+    get_cache().set_many({_generation_key(collection, name): generation
+                          for collection, name in names}, timeout=None)
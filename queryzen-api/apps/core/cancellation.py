@@ -0,0 +1,74 @@
+"""
+Cancellation of running Zen executions.
+
+The API marks an execution as cancelled with a reason, 'cancelled' or 'timeout' if the API
+stopped waiting for it, and the worker running it polls the mark while the query runs and stops
+the query, check ``databases.control.QueryControl``.
+
+Executions are identified by the id of their celery task. Marks expire after
+``ZEN_CANCEL_TTL`` seconds.
+"""
+import abc
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+CANCELLED_REASON = 'cancelled'
+
+
+class Cancellations(abc.ABC):
+    """Base class for the stores of cancelled executions."""
+
+    @abc.abstractmethod
+    def cancel(self, execution_id: str, reason: str = CANCELLED_REASON) -> None:
+        """Marks an execution as cancelled."""
+
+    @abc.abstractmethod
+    def get_reason(self, execution_id: str) -> str | None:
+        """Returns why an execution was cancelled, None if it was not."""
+
+
+class RedisCancellations(Cancellations):
+    """Cancellations stored in redis, they work across processes and machines."""
+
+    def __init__(self):
+        # Only imported if used.
+        import redis  # pylint: disable=C0415
+        self.redis = redis.Redis.from_url(settings.ZEN_CANCEL_URL)
+
+    @staticmethod
+    def key(execution_id: str) -> str:
+        return f'queryzen:cancel:{execution_id}'
+
+    def cancel(self, execution_id: str, reason: str = CANCELLED_REASON) -> None:
+        self.redis.set(self.key(execution_id), reason, ex=settings.ZEN_CANCEL_TTL)
+
+    def get_reason(self, execution_id: str) -> str | None:
+        reason = self.redis.get(self.key(execution_id))
+        return None if reason is None else reason.decode()
+
+
+class LocalCancellations(Cancellations):
+    """Cancellations stored in memory, they only work within one process, e.g. in tests or with
+    ``CELERY_TASK_ALWAYS_EAGER``."""
+    _reasons: dict[str, tuple[str, float]] = {}
+    _lock = threading.Lock()
+
+    def cancel(self, execution_id: str, reason: str = CANCELLED_REASON) -> None:
+        with self._lock:
+            self._reasons[execution_id] = (reason, time.monotonic() + settings.ZEN_CANCEL_TTL)
+
+    def get_reason(self, execution_id: str) -> str | None:
+        with self._lock:
+            reason, expires_at = self._reasons.get(execution_id, (None, 0))
+            if reason is not None and expires_at < time.monotonic():
+                del self._reasons[execution_id]
+                return None
+        return reason
+
+
+def get_cancellations() -> Cancellations:
+    """Returns the cancellations configured in ``settings.ZEN_CANCEL_BACKEND``"""
+    return import_string(settings.ZEN_CANCEL_BACKEND)()
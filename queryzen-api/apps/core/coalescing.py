@@ -0,0 +1,102 @@
+"""
+Coalescing of identical Zen runs (single flight).
+
+Runs of the same Zen version, against the same database, with the same rendered query and
+timeout, that arrive while one of them is running, wait for the execution of the first one
+instead of running the query again. The first run registers its execution in a flight, the next
+ones join the flight and get its result.
+
+Flights are keyed like cached results, check ``apps.core.cache``, but no result is kept after the
+execution finishes, so results are never stale. A flight expires after ``ttl`` seconds in case
+the run that started it died.
+"""
+import abc
+import dataclasses
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+@dataclasses.dataclass
+class Flight:
+    """The flight a run joined, only the run that ``started`` it runs the Zen."""
+    key: str
+    execution_id: str
+    started: bool
+
+
+def make_flight_key(zen, database: str, query: str, timeout: float) -> str:
+    """Creates the key of the flight of a run, the query is hashed to keep keys short."""
+    digest = hashlib.sha256(query.encode()).hexdigest()
+    return f'queryzen:flight:{zen.pk}:{database}:{timeout}:{digest}'
+
+
+class Flights(abc.ABC):
+    """Base class for the stores of flights."""
+
+    @abc.abstractmethod
+    def join(self, key: str, execution_id: str, ttl: float) -> str:
+        """Joins the flight of ``key``, if there is none it is started with ``execution_id``.
+
+        Returns:
+            The execution id of the flight, ``execution_id`` if the flight was started.
+        """
+
+    @abc.abstractmethod
+    def land(self, key: str, execution_id: str) -> None:
+        """Ends the flight of ``key`` if it is the one of ``execution_id``, runs after it
+        start a new one."""
+
+
+class RedisFlights(Flights):
+    """Flights stored in redis, they work across processes and machines."""
+
+    # Deletes the flight only if it still belongs to the execution.
+    LAND = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self):
+        # Only imported if used.
+        import redis  # pylint: disable=C0415
+        self.redis = redis.Redis.from_url(settings.ZEN_COALESCE_URL)
+        self.land_script = self.redis.register_script(self.LAND)
+
+    def join(self, key: str, execution_id: str, ttl: float) -> str:
+        # Returns the current value if there is one, else None and the key is set (redis>=7).
+        current = self.redis.set(key, execution_id, nx=True, ex=int(ttl) + 1, get=True)
+        return execution_id if current is None else current.decode()
+
+    def land(self, key: str, execution_id: str) -> None:
+        self.land_script(keys=[key], args=[execution_id])
+
+
+class LocalFlights(Flights):
+    """Flights stored in memory, they only work within one process, e.g. in tests."""
+    _flights: dict[str, tuple[str, float]] = {}
+    _lock = threading.Lock()
+
+    def join(self, key: str, execution_id: str, ttl: float) -> str:
+        now = time.monotonic()
+        with self._lock:
+            current, expires_at = self._flights.get(key, (None, 0))
+            if current is not None and expires_at > now:
+                return current
+            self._flights[key] = (execution_id, now + ttl)
+            return execution_id
+
+    def land(self, key: str, execution_id: str) -> None:
+        with self._lock:
+            if self._flights.get(key, (None, 0))[0] == execution_id:
+                del self._flights[key]
+
+
+def get_flights() -> Flights:
+    """Returns the flights configured in ``settings.ZEN_COALESCE_BACKEND``"""
+    return import_string(settings.ZEN_COALESCE_BACKEND)()
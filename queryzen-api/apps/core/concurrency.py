@@ -0,0 +1,145 @@
+"""
+Routing of Zen executions to queues and limits of the queries that run at the same time in a
+database.
+
+Every database of ``ZEN_DATABASES`` has a queue per lane of ``ZEN_LANES``,
+'queryzen.<database>.<lane>', so slow Zens of a database or batch runs do not delay the
+interactive runs of other databases. Workers consume every queue unless they are started with
+``-Q``, e.g. to dedicate workers to a database.
+
+``ZEN_DATABASE_CONCURRENCY`` limits the queries that run at the same time in a database, across
+all the workers. A worker takes a slot of the database before running a query, if there are none
+free the task is retried later, check ``apps.core.tasks.run_query``. Slots are leased, the slot of
+a worker that died is freed after ``lease`` seconds.
+"""
+import abc
+import contextlib
+import threading
+import time
+import typing
+import uuid
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class DatabaseBusyError(Exception):
+    """All the slots of the database are taken."""
+
+
+def get_queue(database: str, lane: str) -> str:
+    """Returns the queue of the executions of a database in a lane."""
+    return f'queryzen.{database}.{lane}'
+
+
+def get_queues() -> list[str]:
+    """Returns the queues of all the databases and lanes."""
+    return [get_queue(database, lane)
+            for database in settings.ZEN_DATABASES for lane in settings.ZEN_LANES]
+
+
+class Slots(abc.ABC):
+    """Base class for the stores of the slots of the databases."""
+
+    @abc.abstractmethod
+    def acquire(self, database: str, limit: int, lease: float) -> str | None:
+        """Takes a slot of the database for ``lease`` seconds if less than ``limit`` are taken,
+        returns its token or None if there are no free slots."""
+
+    @abc.abstractmethod
+    def release(self, database: str, token: str) -> None:
+        """Frees the slot of ``token``."""
+
+
+class RedisSlots(Slots):
+    """Slots stored in redis, they work across processes and machines.
+
+    The slots of a database are a sorted set of tokens scored by the time their lease expires.
+    """
+
+    # Drops the expired leases and adds the token if there are free slots, atomically.
+    ACQUIRE = """
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+    if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+        return 0
+    end
+    redis.call('ZADD', KEYS[1], ARGV[3], ARGV[4])
+    redis.call('EXPIRE', KEYS[1], ARGV[5])
+    return 1
+    """
+
+    def __init__(self):
+        # Only imported if used.
+        import redis  # pylint: disable=C0415
+        self.redis = redis.Redis.from_url(settings.ZEN_CONCURRENCY_URL)
+        self.acquire_script = self.redis.register_script(self.ACQUIRE)
+
+    @staticmethod
+    def key(database: str) -> str:
+        return f'queryzen:slots:{database}'
+
+    def acquire(self, database: str, limit: int, lease: float) -> str | None:
+        token = uuid.uuid4().hex
+        now = time.time()
+        acquired = self.acquire_script(keys=[self.key(database)],
+                                       args=[now, limit, now + lease, token, int(lease) + 1])
+        return token if acquired else None
+
+    def release(self, database: str, token: str) -> None:
+        self.redis.zrem(self.key(database), token)
+
+
+class LocalSlots(Slots):
+    """Slots stored in memory, they only work within one process, e.g. in tests or with
+    ``CELERY_TASK_ALWAYS_EAGER``."""
+    _leases: dict[str, dict[str, float]] = {}
+    _lock = threading.Lock()
+
+    def acquire(self, database: str, limit: int, lease: float) -> str | None:
+        now = time.monotonic()
+        with self._lock:
+            leases = self._leases.setdefault(database, {})
+            for token, expires_at in list(leases.items()):
+                if expires_at <= now:
+                    del leases[token]
+            if len(leases) >= limit:
+                return None
+            token = uuid.uuid4().hex
+            leases[token] = now + lease
+            return token
+
+    def release(self, database: str, token: str) -> None:
+        with self._lock:
+            self._leases.get(database, {}).pop(token, None)
+
+
+def get_slots() -> Slots:
+    """Returns the slots configured in ``settings.ZEN_CONCURRENCY_BACKEND``"""
+    return import_string(settings.ZEN_CONCURRENCY_BACKEND)()
+
+
+def is_limited(database: str) -> bool:
+    return settings.ZEN_DATABASE_CONCURRENCY.get(database) is not None
+
+
+@contextlib.contextmanager
+def database_slot(database: str, lease: float) -> typing.Iterator[None]:
+    """Holds a slot of the database while the context runs, if it is limited in
+    ``settings.ZEN_DATABASE_CONCURRENCY``.
+
+    Raises:
+        DatabaseBusyError: If all the slots of the database are taken.
+    """
+    if not is_limited(database):
+        yield
+        return
+
+    slots = get_slots()
+    token = slots.acquire(database, settings.ZEN_DATABASE_CONCURRENCY[database], lease)
+    if token is None:
+        raise DatabaseBusyError(f'The database {database!r} is running'
+                                f' {settings.ZEN_DATABASE_CONCURRENCY[database]} queries')
+    try:
+        yield
+    finally:
+        slots.release(database, token)
@@ -25,3 +25,19 @@ class ParametersMissmatchError(APIException):
 
 class DatabaseDoesNotExistError(APIException):
     status_code = status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+
+
+class ResultExpiredError(APIException):
+    status_code = status.HTTP_410_GONE
+
+
+class ExecutionDoesNotExistError(APIException):
+    status_code = status.HTTP_404_NOT_FOUND
+
+
+class ExecutionFinishedError(APIException):
+    status_code = status.HTTP_409_CONFLICT
+
+
+class ExecutionCancelledError(APIException):
+    status_code = status.HTTP_409_CONFLICT
@@ -0,0 +1,88 @@
+"""
+Runs of Zens in the API process (inline), without celery.
+
+Runs of the Zens of ``ZEN_INLINE_DATABASES``, or of Zens created with ``inline``, are run by a
+thread pool of ``ZEN_INLINE_WORKERS`` threads in the process that got the request, which saves
+the round trip through the broker and the result backend. It suits fast Zens, slow ones would take
+the threads that serve other runs, so they are better left to the workers.
+
+Inline runs are recorded like the ones of the workers, check ``apps.core.tasks.run_zen``, and
+their query is stopped after their timeout, they cannot be cancelled. They do not use redis, unless
+their database is limited in ``ZEN_DATABASE_CONCURRENCY`` and slots are kept in redis.
+"""
+import concurrent.futures
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from apps.core.concurrency import database_slot
+from apps.core.models import Zen
+from apps.core.tasks import run_zen
+
+_executor: concurrent.futures.ThreadPoolExecutor | None = None
+_executor_pid: int | None = None
+_lock = threading.Lock()
+
+
+def is_inline(zen: Zen, database: str) -> bool:
+    """Whether a Zen is run inline in a database, the setting of the Zen has priority over the
+    one of the database."""
+    if zen.inline is not None:
+        return zen.inline
+    return database in settings.ZEN_INLINE_DATABASES
+
+
+def get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Returns the thread pool of the process, it is created by the first run of every process,
+    so it is not shared by forked servers."""
+    global _executor, _executor_pid  # pylint: disable=W0603
+
+    with _lock:
+        if _executor_pid != os.getpid():
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=settings.ZEN_INLINE_WORKERS,
+                thread_name_prefix='queryzen-inline'
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def run_inline(database: str,
+               pk: str,
+               parameters: dict | list[dict] | None,
+               page: dict | None,
+               timeout: float) -> dict:
+    """Runs a Zen in the thread pool and waits for its result, check ``run_zen``.
+
+    Raises:
+        concurrent.futures.TimeoutError: If the run did not finish in ``timeout`` seconds, e.g.
+            if it waited for a free thread.
+        DatabaseBusyError: If all the slots of the database are taken, check
+            ``apps.core.concurrency``.
+    """
+    deadline = time.monotonic() + timeout
+    future = get_executor().submit(_run, database, pk, parameters, page, deadline)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        # A queued run never starts, a running one is stopped at the deadline.
+        future.cancel()
+        raise
+
+
+def _run(database: str,
+         pk: str,
+         parameters: dict | list[dict] | None,
+         page: dict | None,
+         deadline: float) -> dict:
+    # Connections of the threads of the pool are kept between runs, like the ones of the workers.
+    close_old_connections()
+    try:
+        timeout = max(deadline - time.monotonic(), 0.001)
+        with database_slot(database, timeout + settings.ZEN_CONCURRENCY_LEASE_MARGIN):
+            return run_zen(database, pk, parameters, page, timeout)
+    finally:
+        close_old_connections()
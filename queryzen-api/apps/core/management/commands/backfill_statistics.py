@@ -0,0 +1,33 @@
+# pylint: disable=C0114
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.core.models import Zen, ZenStatistics
+
+
+class Command(BaseCommand):
+    """Rebuilds the statistics of Zens from their executions, for executions that were saved
+    before statistics were maintained."""
+    help = 'Rebuilds the execution statistics of every Zen version from its executions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--collection', help='Only rebuild the Zens of this collection.')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Executions fetched from the database at a time.')
+
+    def handle(self, *args, **options):
+        zens = Zen.objects.all()
+        if options['collection']:
+            zens = zens.filter(collection=options['collection'])
+
+        for zen in zens.iterator():
+            with transaction.atomic():
+                statistics, _ = ZenStatistics.objects.select_for_update().get_or_create(zen=zen)
+                statistics.reset()
+                total_times = zen.executions.values_list('total_time', flat=True)
+                for total_time in total_times.iterator(chunk_size=options['chunk_size']):
+                    statistics.add(total_time)
+                statistics.save()
+
+            self.stdout.write(f'{zen.collection}.{zen.name} v{zen.version}:'
+                              f' {statistics.count} executions')
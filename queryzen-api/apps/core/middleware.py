@@ -0,0 +1,127 @@
+"""
+Response compression negotiated with the Accept-Encoding header.
+
+Responses are compressed with zstd or gzip, zstd needs the optional ``zstandard`` package,
+without it only gzip is offered. Responses smaller than ``ZEN_COMPRESSION_MIN_SIZE`` are sent
+as they are, streaming responses are always compressed and every chunk is flushed so the
+client receives rows as soon as they are sent.
+"""
+import gzip
+import importlib.util
+import typing
+import zlib
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def available_encodings() -> tuple[str, ...]:
+    """The encodings the server can compress with, in order of preference."""
+    encodings = [encoding.strip() for encoding in settings.ZEN_COMPRESSION_ENCODINGS.split(',')]
+    has_zstd = importlib.util.find_spec('zstandard') is not None
+    return tuple(encoding for encoding in encodings
+                 if encoding == 'gzip' or (encoding == 'zstd' and has_zstd))
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """Returns the quality of every encoding of an Accept-Encoding header.
+
+    Examples:
+        >>> parse_accept_encoding('gzip, zstd;q=0.5')
+        {'gzip': 1.0, 'zstd': 0.5}
+    """
+    accepted = {}
+    for part in header.split(','):
+        encoding, _, params = part.partition(';')
+        encoding = encoding.strip().lower()
+        if not encoding:
+            continue
+
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0
+        accepted[encoding] = quality
+    return accepted
+
+
+def negotiate_encoding(header: str, encodings: typing.Sequence[str]) -> str | None:
+    """Returns the encoding of ``encodings`` the client prefers, None if it accepts none of them.
+    On ties the order of ``encodings`` is used."""
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    if encoding == 'zstd':
+        import zstandard  # pylint: disable=C0415
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(content)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_stream(chunks: typing.Iterable[bytes], encoding: str) -> typing.Iterator[bytes]:
+    """Compresses a stream, every chunk is flushed so it can be decompressed on arrival."""
+    if encoding == 'zstd':
+        import zstandard  # pylint: disable=C0415
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+    else:
+        # wbits=31 writes the gzip header and trailer.
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        flush_mode = zlib.Z_SYNC_FLUSH
+
+    for chunk in chunks:
+        compressed = compressor.compress(chunk) + compressor.flush(flush_mode)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compresses responses with the encoding negotiated with the client, check
+    ``ZEN_COMPRESSION``, ``ZEN_COMPRESSION_ENCODINGS`` and ``ZEN_COMPRESSION_MIN_SIZE``."""
+
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        if not settings.ZEN_COMPRESSION or response.has_header('Content-Encoding'):
+            return response
+
+        # Whether the response is compressed depends on the request.
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''),
+                                      available_encodings())
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            if len(response.content) < settings.ZEN_COMPRESSION_MIN_SIZE:
+                return response
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The compressed content is not byte for byte the same.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
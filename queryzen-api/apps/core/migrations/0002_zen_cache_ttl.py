@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zen',
+            name='cache_ttl',
+            field=models.PositiveIntegerField(null=True),
+        ),
+    ]
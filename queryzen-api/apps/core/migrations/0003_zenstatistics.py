@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_zen_cache_ttl'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZenStatistics',
+            fields=[
+                ('zen', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='core.zen')),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('total', models.BigIntegerField(default=0)),
+                ('mean', models.FloatField(default=0)),
+                ('m2', models.FloatField(default=0)),
+                ('min', models.IntegerField(null=True)),
+                ('max', models.IntegerField(null=True)),
+                ('histogram', models.JSONField(default=dict)),
+            ],
+        ),
+    ]
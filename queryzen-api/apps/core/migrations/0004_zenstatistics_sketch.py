@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_zenstatistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zenstatistics',
+            name='sketch',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_zenstatistics_sketch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='execution',
+            index=models.Index(fields=['zen', 'started_at', 'id'], name='core_exec_zen_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='execution',
+            index=models.Index(fields=['zen', 'total_time'], name='core_exec_zen_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='execution',
+            index=models.Index(fields=['state', 'zen'], name='core_exec_state_zen_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='execution',
+            index=models.Index(condition=models.Q(('state', 'IN')), fields=['zen', 'started_at'], name='core_exec_zen_invalid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zen',
+            index=models.Index(fields=['created_at', 'id'], name='core_zen_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zen',
+            index=models.Index(fields=['state'], name='core_zen_state_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:59
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def create_counters(apps, schema_editor):
+    """Creates the counters of the existing Zens from their latest version."""
+    Zen = apps.get_model('core', 'Zen')
+    ZenCounter = apps.get_model('core', 'ZenCounter')
+    latest = Zen.objects.values('collection', 'name').annotate(last_version=Max('version'))
+    ZenCounter.objects.bulk_create(ZenCounter(**row) for row in latest.order_by())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZenCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('collection', models.CharField(max_length=256)),
+                ('name', models.CharField(max_length=256)),
+                ('last_version', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('collection', 'name')},
+            },
+        ),
+        migrations.RunPython(create_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_zencounter'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='execution',
+            name='state',
+            field=models.CharField(choices=[('VA', 'Valid'), ('IN', 'Invalid'), ('TI', 'Timeout'), ('CA', 'Cancelled')], max_length=2),
+        ),
+    ]
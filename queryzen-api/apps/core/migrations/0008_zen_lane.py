@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_execution_timeout_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zen',
+            name='lane',
+            field=models.CharField(max_length=32, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_zen_lane'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='execution',
+            name='started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_execution_started_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zen',
+            name='inline',
+            field=models.BooleanField(null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:05
+
+from django.db import migrations
+
+from apps.core.sketch import QuantileSketch
+
+
+def histogram_to_sketch(apps, schema_editor):
+    """Statistics without a sketch get it from their histogram before it is removed."""
+    ZenStatistics = apps.get_model('core', 'ZenStatistics')
+    for statistics in ZenStatistics.objects.filter(sketch={}).exclude(histogram={}):
+        sketch = QuantileSketch()
+        for total_time, count in statistics.histogram.items():
+            sketch.add(int(total_time), count)
+        statistics.sketch = sketch.to_dict()
+        statistics.save(update_fields=['sketch'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_zen_inline'),
+    ]
+
+    operations = [
+        migrations.RunPython(histogram_to_sketch, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='zenstatistics',
+            name='histogram',
+        ),
+    ]
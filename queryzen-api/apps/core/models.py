@@ -1,15 +1,22 @@
 # pylint: disable=C0114
 from __future__ import annotations
 
-import re
-import statistics
+import functools
+import math
+import typing
 
-from django.db import models
-from django.db.models import QuerySet
+from django.db import models, transaction
+from django.db.models import Max, QuerySet
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from apps.core.exceptions import MissingParametersError, ParametersMissmatchError
+from apps.core import cache
+from apps.core.sketch import QuantileSketch
+from apps.core.exceptions import (MissingParametersError,
+                                  ParametersMissmatchError,
+                                  ZenAlreadyExistsError)
 from apps.shared.mixins import UUIDMixin
+from databases.template import QueryTemplate, compile_template
 
 
 class Zen(UUIDMixin):
@@ -21,16 +28,98 @@ class Zen(UUIDMixin):
         UNKNOWN = 'UN', _('UNKNOWN')
 
     def save(self, *args, **kwargs):
-        # self.version is either 'latest' or an integer.
-        last_obj = self.latest.first()
+        if not self._state.adding:
+            # The version is only allocated once, updates do not query the versions.
+            super().save(*args, **kwargs)
+            return
 
-        if last_obj:  # Check if last_obj exists
-            if self.version == 'latest':
-                self.version = last_obj.version + 1
-        else:
-            # First object, so the version starts at 1.
-            self.version = 1
-        super().save(*args, **kwargs)
+        # A new version invalidates the cached results of the previous ones.
+        cache.invalidate(self.collection, self.name)
+
+        with transaction.atomic():
+            # self.version is either 'latest' or an integer.
+            self.version = ZenCounter.allocate(self.collection, self.name, self.version)
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        cache.invalidate(self.collection, self.name)
+        return super().delete(*args, **kwargs)
+
+    @classmethod
+    def bulk_get_or_create(cls,
+                           zens: list[Zen],
+                           get_existing: bool = False) -> list[tuple[bool, Zen]]:
+        """Creates several unsaved Zens in one transaction, with one insert.
+
+        Versions are allocated as in ``save``, Zens of the same name get consecutive versions.
+
+        Args:
+            zens: The Zens to create, their version is either 'latest' or an integer.
+            get_existing: If True, a Zen whose version already exists is not created, the
+                existing one is returned instead, for 'latest' the latest version.
+
+        Raises:
+            ZenAlreadyExistsError: If ``get_existing`` is False and some versions already exist,
+                no Zen is created.
+
+        Returns:
+            A list of (created, zen) tuples, in the same order as ``zens``.
+        """
+        keys = {(zen.collection, zen.name) for zen in zens}
+        explicit = {int(zen.version) for zen in zens if zen.version != 'latest'}
+
+        with transaction.atomic():
+            counters = ZenCounter.lock_many(keys)
+            stored = cls.objects.filter(collection__in={collection for collection, _ in keys},
+                                        name__in={name for _, name in keys})
+
+            latest = {}
+            if get_existing:
+                rows = stored.values('collection', 'name').annotate(last=Max('version'))
+                latest = {(row['collection'], row['name']): row['last']
+                          for row in rows.order_by() if (row['collection'], row['name']) in keys}
+
+            # (collection, name, version) -> Zen, of the existing and the new versions.
+            found = {}
+            if versions := explicit | set(latest.values()):
+                found = {(zen.collection, zen.name, zen.version): zen
+                         for zen in stored.filter(version__in=versions)}
+
+            results, conflicts, created = [], [], []
+            for i, zen in enumerate(zens):
+                key = (zen.collection, zen.name)
+                version = latest.get(key) if zen.version == 'latest' else int(zen.version)
+
+                if existing := found.get((*key, version)):
+                    if get_existing:
+                        results.append((False, existing))
+                    else:
+                        conflicts.append(f'zens[{i}]: {zen.collection}/{zen.name}'
+                                         f' version {version} already exists')
+                    continue
+
+                zen.version = counters[key].next_version(zen.version)
+                if (*key, zen.version) in found:
+                    # A new Zen with an explicit version whose name had no versions yet.
+                    conflicts.append(f'zens[{i}]: {zen.collection}/{zen.name}'
+                                     f' version {zen.version} already exists')
+                    continue
+
+                found[(*key, zen.version)] = zen
+                if get_existing:
+                    latest[key] = zen.version
+                results.append((True, zen))
+                created.append(zen)
+
+            if conflicts:
+                raise ZenAlreadyExistsError(detail=conflicts)
+
+            ZenCounter.objects.bulk_update(counters.values(), ['last_version'])
+            cls.objects.bulk_create(created)
+
+        # A new version invalidates the cached results of the previous ones.
+        cache.invalidate_many({(zen.collection, zen.name) for zen in created})
+        return results
 
     collection = models.CharField(max_length=256)
     name = models.CharField(max_length=256)
@@ -41,6 +130,16 @@ class Zen(UUIDMixin):
     created_at = models.DateTimeField(auto_now_add=True)
     state = models.CharField(max_length=2, choices=State.choices, default=State.UNKNOWN)
 
+    # Seconds that results are cached, if null ``settings.ZEN_RESULT_CACHE_TTL`` is used.
+    cache_ttl = models.PositiveIntegerField(null=True)
+
+    # Lane the Zen runs in, check ``settings.ZEN_LANES``, if null ``settings.ZEN_DEFAULT_LANE``.
+    lane = models.CharField(max_length=32, null=True)
+
+    # Whether the Zen runs in the API process, check ``apps.core.inline``, if null
+    # ``settings.ZEN_INLINE_DATABASES`` decides.
+    inline = models.BooleanField(null=True)
+
     # TODO: Add created_by
 
     @property
@@ -57,6 +156,12 @@ class Zen(UUIDMixin):
             queryset = queryset.filter(version=version)
         return queryset
 
+    @property
+    def template(self) -> QueryTemplate:
+        """The compiled template of the query, it is cached across instances of the same
+        version."""
+        return compile_template(self.query)
+
     def get_parameters(self, user_parameters: dict) -> dict:
         """Return the parameters that will be used from the addition
          of default_parameters + user_parameters.
@@ -65,7 +170,7 @@ class Zen(UUIDMixin):
          are not necessarily correct, as default parameters might not have all needed parameters.
          Validation is therefore needed afterwards.
          """
-        parameters = self.default_parameters or dict()
+        parameters = dict(self.default_parameters or {})
         parameters.update(user_parameters)
         return parameters
 
@@ -82,39 +187,102 @@ class Zen(UUIDMixin):
             MissingParametersError: If we still miss parameters after trying the default plus
             the received ones.
         """
-        query_parameters = re.findall(r':(\w+)', self.query)
+        query_parameters = self.template.parameters
 
-        if mismatch_parameters := set(parameters.keys()) - set(query_parameters):
+        if mismatch_parameters := set(parameters.keys()) - query_parameters:
             raise ParametersMissmatchError(
                 f'Received parameter(s) that are not'
                 f' used in the query: {list(mismatch_parameters)}')
 
-        if missing_parameters := set(query_parameters) - set(parameters.keys()):
+        if missing_parameters := query_parameters - set(parameters.keys()):
             raise MissingParametersError(f'The query is missing'
                                          f' parameter(s) to run: {list(missing_parameters)}')
 
     @property
     def mean_execution_time_ms(self) -> float:
-        return statistics.mean(self.executions.values_list('total_time', flat=True))
+        return self.statistics.mean
 
     @property
     def mode_execution_time_ms(self) -> int:
-        return statistics.mode(self.executions.values_list('total_time', flat=True))
+        return self.statistics.mode
 
     @property
     def median_execution_time_ms(self) -> int:
-        return statistics.median(self.executions.values_list('total_time', flat=True))
+        return self.statistics.median
 
     @property
     def variance(self) -> int:
-        return statistics.variance(self.executions.values_list('total_time', flat=True))
+        return self.statistics.variance
 
     @property
     def standard_deviation(self) -> int:
-        return statistics.stdev(self.executions.values_list('total_time', flat=True))
+        return self.statistics.standard_deviation
 
     class Meta:
+        # Also the index of ``filter_by`` and ``latest``, (collection, name) ordered by version.
         unique_together = ('collection', 'name', 'version')
+        indexes = [
+            # Ordering of the filter endpoint, check ``ZenCursorPagination``.
+            models.Index(fields=('created_at', 'id'), name='core_zen_created_idx'),
+            models.Index(fields=('state',), name='core_zen_state_idx'),
+        ]
+
+
+class ZenCounter(models.Model):
+    """The last version allocated to a Zen, there is one row per collection and name.
+
+    Rows are locked while a version is allocated, so concurrent creations of the same Zen
+    get consecutive versions instead of colliding. Versions of deleted Zens are not reused.
+    """
+    collection = models.CharField(max_length=256)
+    name = models.CharField(max_length=256)
+    last_version = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('collection', 'name')
+
+    @classmethod
+    def allocate(cls, collection: str, name: str, version: int | str) -> int:
+        """Returns the version of a new Zen, if ``version`` is 'latest' the next one, check
+        ``next_version``. Has to run in the transaction that saves the Zen."""
+        counter, _ = cls.objects.select_for_update().get_or_create(collection=collection,
+                                                                   name=name)
+        last_version = counter.last_version
+        version = counter.next_version(version)
+        if counter.last_version != last_version:
+            counter.save(update_fields=['last_version'])
+        return version
+
+    @classmethod
+    def lock_many(cls, keys: set[tuple[str, str]]) -> dict[tuple[str, str], ZenCounter]:
+        """Returns the counters of several (collection, name) pairs, locked and created if they
+        do not exist. Has to run in the transaction that saves the Zens."""
+        cls.objects.bulk_create([cls(collection=collection, name=name)
+                                 for collection, name in keys], ignore_conflicts=True)
+        # Always locked in the same order, so concurrent bulk creations do not deadlock.
+        counters = (cls.objects
+                    .select_for_update()
+                    .filter(collection__in={collection for collection, _ in keys},
+                            name__in={name for _, name in keys})
+                    .order_by('collection', 'name'))
+        return {(counter.collection, counter.name): counter for counter in counters
+                if (counter.collection, counter.name) in keys}
+
+    def next_version(self, version: int | str) -> int:
+        """Returns the version of a new Zen and updates ``last_version``, without saving.
+
+        The first version of a Zen is always 1, an explicit version of a Zen that already
+        has versions is kept.
+        """
+        if not self.last_version:
+            version = 1
+        elif version == 'latest':
+            version = self.last_version + 1
+        else:
+            version = int(version)
+
+        self.last_version = max(self.last_version, version)
+        return version
 
 
 class Execution(UUIDMixin):
@@ -123,9 +291,14 @@ class Execution(UUIDMixin):
     class State(models.TextChoices):
         VALID = 'VA', _('Valid')
         INVALID = 'IN', _('Invalid')
+        # The query was stopped because it did not finish in time, or it was cancelled.
+        TIMEOUT = 'TI', _('Timeout')
+        CANCELLED = 'CA', _('Cancelled')
 
     state = models.CharField(max_length=2, choices=State.choices)
-    started_at = models.DateTimeField(auto_now_add=True)
+    # Set by the worker when the query starts, executions may be saved later, check
+    # ``apps.core.buffer``.
+    started_at = models.DateTimeField(default=timezone.now)
     finished_at = models.DateTimeField()
     total_time = models.IntegerField()
     zen = models.ForeignKey(to=Zen, on_delete=models.CASCADE, related_name='executions')
@@ -133,3 +306,165 @@ class Execution(UUIDMixin):
     error = models.TextField()
     row_count = models.SmallIntegerField()
     parameters = models.TextField()
+
+    class Meta:
+        indexes = [
+            # Executions of a Zen in time, check ``ExecutionCursorPagination`` and the
+            # statistics series.
+            models.Index(fields=('zen', 'started_at', 'id'), name='core_exec_zen_started_idx'),
+            models.Index(fields=('zen', 'total_time'), name='core_exec_zen_time_idx'),
+            # Filter of Zens by the state of their executions.
+            models.Index(fields=('state', 'zen'), name='core_exec_state_zen_idx'),
+            # Invalid executions are rare, errors of a Zen are found without scanning its
+            # valid executions.
+            models.Index(fields=('zen', 'started_at'),
+                         condition=models.Q(state='IN'),
+                         name='core_exec_zen_invalid_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            ZenStatistics.record(self.zen_id, [self.total_time])
+
+
+class ZenStatistics(models.Model):
+    """Aggregates of the execution times of a Zen version, they are updated every time an
+    execution is saved, so they are read in constant time regardless of how many executions
+    the Zen has.
+
+    The mean and variance are maintained with Welford's algorithm, the mode, median and
+    percentiles are estimated with ``sketch``, a ``QuantileSketch``, whose size is bounded
+    regardless of how many distinct execution times there are. Statistics of several Zens can be
+    merged, check ``merge``.
+    """
+    zen = models.OneToOneField(to=Zen,
+                               on_delete=models.CASCADE,
+                               primary_key=True,
+                               related_name='statistics')
+    count = models.PositiveBigIntegerField(default=0)
+    total = models.BigIntegerField(default=0)
+    mean = models.FloatField(default=0)
+    # Sum of squares of differences from the mean.
+    m2 = models.FloatField(default=0)
+    min = models.IntegerField(null=True)
+    max = models.IntegerField(null=True)
+    sketch = models.JSONField(default=dict)
+
+    def save(self, *args, **kwargs):
+        if 'quantile_sketch' in self.__dict__:
+            self.sketch = self.quantile_sketch.to_dict()
+        super().save(*args, **kwargs)
+
+    @functools.cached_property
+    def quantile_sketch(self) -> QuantileSketch:
+        return QuantileSketch.from_dict(self.sketch)
+
+    @classmethod
+    def record(cls, zen_id, total_times: typing.Iterable[int]) -> ZenStatistics:
+        """Adds execution times to the statistics of a Zen, rows are locked so concurrent
+        workers do not lose updates."""
+        with transaction.atomic():
+            obj, _ = cls.objects.select_for_update().get_or_create(zen_id=zen_id)
+            for total_time in total_times:
+                obj.add(total_time)
+            obj.save()
+        return obj
+
+    def add(self, total_time: int) -> None:
+        """Adds an execution time, without saving."""
+        # Same as the value stored in ``Execution.total_time``.
+        total_time = int(total_time)
+        self.count += 1
+        self.total += total_time
+        delta = total_time - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (total_time - self.mean)
+        self.min = total_time if self.min is None else min(self.min, total_time)
+        self.max = total_time if self.max is None else max(self.max, total_time)
+        self.quantile_sketch.add(total_time)
+
+    def merge(self, other: ZenStatistics) -> None:
+        """Adds the statistics of another Zen, without saving, e.g. to get the statistics of
+        all the versions of a Zen."""
+        if not other.count:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        # Parallel variant of Welford's algorithm (Chan et al.)
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self.quantile_sketch.merge(other.quantile_sketch)
+
+    def reset(self) -> None:
+        """Removes all the execution times, without saving."""
+        self.count = self.total = 0
+        self.mean = self.m2 = 0
+        self.min = self.max = None
+        self.sketch = {}
+        self.__dict__.pop('quantile_sketch', None)
+
+    def _buckets(self) -> typing.Iterator[tuple[int, int]]:
+        """Iterates the (execution time, count) of the buckets of the sketch, in ascending order.
+        Times are rounded to milliseconds, like ``Execution.total_time``, so they are exact below
+        ``1 / QuantileSketch.alpha`` milliseconds, and never out of the exact min and max."""
+        for value, count in self.quantile_sketch.items():
+            yield min(max(round(value), self.min), self.max), count
+
+    @property
+    def mode(self) -> int | None:
+        if not self.count:
+            return None
+        # The smallest of the most common values.
+        return min(self._buckets(), key=lambda bucket: (-bucket[1], bucket[0]))[0]
+
+    @property
+    def median(self) -> float | None:
+        if not self.count:
+            return None
+
+        middle = []
+        seen = 0
+        # Positions of the middle values, one or two of them.
+        positions = sorted({(self.count - 1) // 2, self.count // 2})
+        for value, count in self._buckets():
+            seen += count
+            while positions and positions[0] < seen:
+                middle.append(value)
+                positions.pop(0)
+            if not positions:
+                break
+        return sum(middle) / len(middle)
+
+    @property
+    def variance(self) -> float | None:
+        """The sample variance, it needs at least two executions."""
+        if self.count < 2:
+            return None
+        return self.m2 / (self.count - 1)
+
+    @property
+    def standard_deviation(self) -> float | None:
+        variance = self.variance
+        return None if variance is None else math.sqrt(variance)
+
+    @property
+    def range(self) -> int | None:
+        return None if not self.count else self.max - self.min
+
+    def percentile(self, percentile: float) -> float | None:
+        """The estimated execution time at ``percentile`` (0-100), with a relative error of
+        ``QuantileSketch.alpha``, it is never out of the exact min and max."""
+        value = self.quantile_sketch.quantile(percentile / 100)
+        if value is None or not self.count:
+            return value
+        return min(max(value, self.min), self.max)
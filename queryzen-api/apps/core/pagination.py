@@ -0,0 +1,46 @@
+# pylint: disable=C0114
+from django.conf import settings
+from django.core import signing
+from rest_framework.pagination import CursorPagination
+
+PAGE_TOKEN_SALT = 'queryzen.page'
+
+
+class ExecutionCursorPagination(CursorPagination):
+    """Executions are paginated with a cursor, so pages are fetched in constant time
+    regardless of how many executions a Zen has, oldest first."""
+    ordering = ('started_at', 'id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class ZenCursorPagination(CursorPagination):
+    """Zens are paginated with a cursor on their creation time, so listing
+    them is stable while new Zens are created."""
+    ordering = ('created_at', 'id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+def make_page_token(zen_pk, database: str, parameters: dict, offset: int, limit: int) -> str:
+    """Returns the token of the next page of the result of a Zen, it is signed so it cannot be
+    tampered with, the query is run again from ``offset`` when the page is fetched."""
+    return signing.dumps({'zen': str(zen_pk),
+                          'database': database,
+                          'parameters': parameters,
+                          'offset': offset,
+                          'limit': limit},
+                         salt=PAGE_TOKEN_SALT,
+                         compress=True)
+
+
+def read_page_token(token: str) -> dict:
+    """Returns the content of a token made with ``make_page_token``.
+
+    Raises:
+        signing.BadSignature: If the token was tampered with or is older than
+            ``settings.ZEN_PAGE_TOKEN_TTL``, every page gets a new token so it is an idle timeout.
+    """
+    return signing.loads(token, salt=PAGE_TOKEN_SALT, max_age=settings.ZEN_PAGE_TOKEN_TTL)
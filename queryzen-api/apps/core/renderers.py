@@ -0,0 +1,66 @@
+"""
+Renderers of the results of Zen executions.
+
+``ArrowRenderer`` renders results as an Apache Arrow IPC stream, rows are sent in columnar binary
+form so big numeric results are not encoded to and decoded from JSON. It is negotiated with the
+'Accept: application/vnd.apache.arrow.stream' header, or '?format=arrow', and only available if
+pyarrow is installed, check ``RESULT_RENDERERS``.
+"""
+import importlib.util
+import json
+
+from rest_framework import renderers
+from rest_framework.settings import api_settings
+
+# Key of the schema metadata with the other fields of the execution, as json.
+ARROW_METADATA_KEY = b'queryzen'
+
+
+def is_execution_result(data) -> bool:
+    return isinstance(data, dict) and 'columns' in data and 'rows' in data
+
+
+class ArrowRenderer(renderers.BaseRenderer):
+    """Renders the result of an execution as an Arrow IPC stream, the fields of the execution
+    that are not rows or columns are in the schema metadata, under ``ARROW_METADATA_KEY``.
+
+    Anything else, e.g. errors, is rendered as json.
+    """
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+
+    # Max rows per record batch.
+    max_chunksize = 64 * 1024
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if not is_execution_result(data) or (response is not None and response.exception):
+            if response is not None:
+                response['Content-Type'] = renderers.JSONRenderer.media_type
+            return renderers.JSONRenderer().render(data, renderer_context=renderer_context)
+
+        import pyarrow  # pylint: disable=C0415
+
+        columns = list(data['columns'])
+        if data['rows']:
+            arrays = [pyarrow.array(column) for column in zip(*data['rows'])]
+        else:
+            arrays = [pyarrow.array([], type=pyarrow.null()) for _ in columns]
+
+        metadata = {key: value for key, value in data.items() if key not in ('columns', 'rows')}
+        table = pyarrow.Table.from_arrays(arrays, names=columns).replace_schema_metadata(
+            {ARROW_METADATA_KEY: json.dumps(metadata, cls=renderers.JSONRenderer.encoder_class)}
+        )
+
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=self.max_chunksize)
+        return sink.getvalue().to_pybytes()
+
+
+# Renderers of the views that return results of executions.
+RESULT_RENDERERS = [*api_settings.DEFAULT_RENDERER_CLASSES]
+if importlib.util.find_spec('pyarrow') is not None:
+    RESULT_RENDERERS.append(ArrowRenderer)
@@ -0,0 +1,191 @@
+"""
+Stores for big execution results.
+
+Celery results live in the result backend (redis), the rows of a result bigger than
+``ZEN_RESULT_SPILL_SIZE`` bytes are written to a result store instead, and the Celery result only
+carries a reference to them, so the memory of the result backend does not grow with the size of
+the results.
+
+Rows are stored as JSON lines, a range of rows is read without loading the whole result. Stored
+results expire after ``ZEN_RESULT_STORE_TTL`` seconds and are deleted by the
+``delete_expired_results`` task.
+
+The store is configured in ``ZEN_RESULT_STORE``, ``FileSystemResultStore`` needs the API and the
+workers to share ``ZEN_RESULT_STORE_PATH``.
+"""
+import abc
+import gzip
+import itertools
+import json
+import os
+import pathlib
+import tempfile
+import time
+import typing
+import uuid
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+# Key of a result whose rows are in the result store, its value is the key of the rows.
+RESULT_REF = 'result_ref'
+
+
+class ResultNotFoundError(Exception):
+    """The stored result does not exist, it expired or was deleted."""
+
+
+class ResultStore(abc.ABC):
+    """Base class for result stores, rows are stored as lines of JSON."""
+
+    @abc.abstractmethod
+    def write(self, key: str, lines: typing.Iterable[bytes]) -> None:
+        """Stores the lines under ``key``, it is not readable until all the lines are written."""
+
+    @abc.abstractmethod
+    def read(self, key: str) -> typing.Iterator[bytes]:
+        """Returns the lines stored under ``key``.
+
+        Raises:
+            ResultNotFoundError: If there is nothing stored under ``key``.
+        """
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """Deletes the lines stored under ``key``, if any."""
+
+    @abc.abstractmethod
+    def delete_expired(self, ttl: float) -> int:
+        """Deletes the results stored more than ``ttl`` seconds ago, returns how many."""
+
+    def read_rows(self, key: str, offset: int = 0, limit: int | None = None) -> list:
+        """Returns ``limit`` rows starting at ``offset``, all the rows after it if no limit."""
+        stop = None if limit is None else offset + limit
+        return [json.loads(line) for line in itertools.islice(self.read(key), offset, stop)]
+
+
+class FileSystemResultStore(ResultStore):
+    """Stores every result in a file, gzip compressed if ``compress``.
+
+    Args:
+        path: The directory of the files, it is created if it does not exist.
+        compress: Whether new results are compressed, results are read either way.
+    """
+    SUFFIX = '.jsonl'
+    COMPRESSED_SUFFIX = '.jsonl.gz'
+
+    def __init__(self, path: str | None = None, compress: bool | None = None):
+        self.path = pathlib.Path(path or settings.ZEN_RESULT_STORE_PATH)
+        self.compress = settings.ZEN_RESULT_STORE_COMPRESSION if compress is None else compress
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _files(self, key: str) -> tuple[pathlib.Path, pathlib.Path]:
+        if not key.replace('-', '').isalnum():
+            raise ValueError(f'invalid result key: {key!r}')
+        return self.path / (key + self.SUFFIX), self.path / (key + self.COMPRESSED_SUFFIX)
+
+    def write(self, key: str, lines: typing.Iterable[bytes]) -> None:
+        plain, compressed = self._files(key)
+        target = compressed if self.compress else plain
+
+        # Written to a temporary file which is then renamed, so it is never read half written.
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw:
+                file = gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) if self.compress else raw
+                with file:
+                    file.writelines(lines)
+            os.replace(tmp_path, target)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def read(self, key: str) -> typing.Iterator[bytes]:
+        plain, compressed = self._files(key)
+        try:
+            file = gzip.open(compressed, 'rb')
+        except FileNotFoundError:
+            try:
+                file = open(plain, 'rb')  # pylint: disable=R1732
+            except FileNotFoundError as e:
+                raise ResultNotFoundError(f'The result {key} does not exist') from e
+
+        def lines():
+            with file:
+                yield from file
+        return lines()
+
+    def delete(self, key: str) -> None:
+        for file in self._files(key):
+            file.unlink(missing_ok=True)
+
+    def delete_expired(self, ttl: float) -> int:
+        oldest = time.time() - ttl
+        deleted = 0
+        for file in self.path.iterdir():
+            try:
+                if file.stat().st_mtime < oldest:
+                    file.unlink()
+                    deleted += 1
+            except FileNotFoundError:
+                # Deleted by another process.
+                pass
+        return deleted
+
+
+def get_result_store() -> ResultStore:
+    """Returns the store configured in ``settings.ZEN_RESULT_STORE``"""
+    return import_string(settings.ZEN_RESULT_STORE)()
+
+
+def _encode_row(row) -> bytes:
+    return json.dumps(row, cls=DjangoJSONEncoder).encode() + b'\n'
+
+
+def spill_result(result: dict) -> dict:
+    """Writes the rows of an execution result to the result store if they take more than
+    ``ZEN_RESULT_SPILL_SIZE`` bytes, the returned result then has a reference to them instead.
+    """
+    if not settings.ZEN_RESULT_SPILL_SIZE:
+        return result
+
+    rows = iter(result.get('rows') or ())
+    lines = []
+    size = 0
+    for row in rows:
+        lines.append(_encode_row(row))
+        size += len(lines[-1])
+        if size > settings.ZEN_RESULT_SPILL_SIZE:
+            break
+    else:
+        return result
+
+    key = str(result.get('id') or uuid.uuid4())
+    get_result_store().write(key, itertools.chain(lines, map(_encode_row, rows)))
+
+    spilled = {k: v for k, v in result.items() if k != 'rows'}
+    spilled[RESULT_REF] = key
+    return spilled
+
+
+def is_spilled(result: dict) -> bool:
+    return RESULT_REF in result
+
+
+def load_result(result: dict, offset: int = 0, limit: int | None = None) -> dict:
+    """Returns the execution result with ``limit`` of its rows starting at ``offset``, they are
+    read from the result store if they were spilled, check ``spill_result``.
+
+    Raises:
+        ResultNotFoundError: If the rows were spilled and the stored result expired.
+    """
+    if not is_spilled(result):
+        if offset or limit is not None:
+            stop = None if limit is None else offset + limit
+            result = {**result, 'rows': (result.get('rows') or [])[offset:stop]}
+        return result
+
+    loaded = {k: v for k, v in result.items() if k != RESULT_REF}
+    loaded['rows'] = get_result_store().read_rows(result[RESULT_REF], offset, limit)
+    return loaded
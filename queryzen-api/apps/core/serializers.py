@@ -1,6 +1,12 @@
 """
 DRF Serializers for apps.core views.
 """
+import datetime
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+
 from rest_framework import serializers
 
 from apps.core.models import Zen, Execution
@@ -8,19 +14,107 @@ from apps.core.models import Zen, Execution
 
 class CreateZenSerializer(serializers.ModelSerializer):
     default_parameters = serializers.JSONField(read_only=False, required=False)
+    lane = serializers.ChoiceField(choices=settings.ZEN_LANES, required=False, allow_null=True)
 
     class Meta:
         model = Zen
-        fields = ('description', 'query', 'default_parameters')
+        fields = ('description', 'query', 'default_parameters', 'cache_ttl', 'lane', 'inline')
+
+
+class BulkZenSerializer(CreateZenSerializer):
+    """A Zen of a bulk creation, its version is 'latest' or a positive integer."""
+    version = serializers.CharField(default='latest')
+
+    class Meta(CreateZenSerializer.Meta):
+        fields = ('collection', 'name', 'version', *CreateZenSerializer.Meta.fields)
+        # Existing versions are checked for all the Zens at once, check
+        # ``Zen.bulk_get_or_create``.
+        validators = []
+
+    def validate_version(self, value: str) -> str | int:
+        if value == 'latest':
+            return value
+        if not value.isdigit() or int(value) < 1:
+            raise serializers.ValidationError("version has to be 'latest' or a positive integer")
+        return int(value)
+
+
+class BulkCreateZenSerializer(serializers.Serializer):
+    zens = BulkZenSerializer(many=True,
+                             allow_empty=False,
+                             max_length=settings.ZEN_BULK_MAX_ZENS)
+    # Return the existing Zens instead of failing.
+    get_or_create = serializers.BooleanField(default=False)
 
 
 class ExecuteZenSerializer(serializers.Serializer):
+    """A run of a Zen, with one set of parameters or many, which cannot be paginated."""
     parameters = serializers.JSONField(read_only=False)
+    # Runs the Zen once per parameter set, ``parameters`` are the values shared by all the sets.
+    parameter_sets = serializers.ListField(child=serializers.DictField(),
+                                           allow_empty=False,
+                                           max_length=settings.ZEN_MAX_PARAMETER_SETS,
+                                           required=False)
     version = serializers.CharField()
     database = serializers.CharField()
+    # Seconds the query can run, it is stopped in the database after them.
+    timeout = serializers.FloatField(min_value=0, max_value=settings.ZEN_MAX_TIMEOUT,
+                                     required=False, allow_null=True)
+    # Rows per message when the result is streamed.
+    batch_size = serializers.IntegerField(min_value=1, required=False)
+    # Max rows of the result, the result then has a `next_page_token` to fetch the next rows.
+    limit = serializers.IntegerField(min_value=1, max_value=settings.ZEN_MAX_PAGE_SIZE,
+                                     required=False)
+    page_token = serializers.CharField(required=False)
+    # Lane of the run, by default the lane of the Zen.
+    lane = serializers.ChoiceField(choices=settings.ZEN_LANES, required=False)
+
+    def validate(self, attrs):
+        if 'parameter_sets' in attrs and ('limit' in attrs or 'page_token' in attrs):
+            raise serializers.ValidationError('The result of parameter sets cannot be paginated.')
+        return attrs
+
+
+class RunSerializer(ExecuteZenSerializer):
+    collection = serializers.CharField()
+    name = serializers.CharField()
+
+
+class RunManySerializer(serializers.Serializer):
+    runs = RunSerializer(many=True, allow_empty=False, max_length=settings.ZEN_RUN_MANY_MAX_RUNS)
+    # Seconds to wait for all the runs.
+    timeout = serializers.FloatField(min_value=0, required=False)
+
+
+def split_query_param(value: str | None) -> set[str]:
+    """Splits a comma separated query parameter, e.g. 'name,version'"""
+    return {item.strip() for item in value.split(',') if item.strip()} if value else set()
+
+
+class SparseFieldsMixin:
+    """Mixin for serializers whose fields can be selected with the query parameters of the
+    request in the context:
+
+    - fields: Comma separated fields to return, by default all.
+    - expand: Comma separated fields of ``Meta.expandable`` to return, they are
+      expensive, e.g. nested serializers, and are only returned when asked.
+    """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        query_params = request.query_params if request is not None else {}
 
-class ExecutionSerializer(serializers.ModelSerializer):
+        expand = split_query_param(query_params.get('expand'))
+        for field_name in set(getattr(self.Meta, 'expandable', ())) - expand:
+            self.fields.pop(field_name, None)
+
+        if fields := split_query_param(query_params.get('fields')):
+            for field_name in set(self.fields) - fields - expand:
+                self.fields.pop(field_name)
+
+
+class ExecutionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Execution
         exclude = ('zen',)
@@ -31,12 +125,30 @@ class ZenExecutionResponseSerializer(ExecutionSerializer):
     rows = serializers.JSONField(read_only=True)
 
 
-class ZenSerializer(serializers.ModelSerializer):
+class ZenSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer of Zens, '?fields=' selects the returned fields and '?expand=executions'
+    nests the executions, check ``SparseFieldsMixin``."""
+    # Only returned with '?expand=executions', use the executions endpoint to paginate them.
     executions = ExecutionSerializer(many=True)
 
     class Meta:
         model = Zen
         fields = '__all__'
+        expandable = ('executions',)
+
+    @classmethod
+    def optimize_queryset(cls, queryset: QuerySet, request) -> QuerySet:
+        """Only selects the columns that are returned and prefetches the expanded relations."""
+        expand = split_query_param(request.query_params.get('expand'))
+        if 'executions' in expand:
+            queryset = queryset.prefetch_related('executions')
+
+        fields = split_query_param(request.query_params.get('fields'))
+        # _meta is the public model API of Django.
+        concrete_fields = Zen._meta.concrete_fields  # pylint: disable=W0212
+        if only := fields & {field.name for field in concrete_fields}:
+            queryset = queryset.only(*only)
+        return queryset
 
 
 class CollectionsSerializer(serializers.Serializer):
@@ -44,6 +156,56 @@ class CollectionsSerializer(serializers.Serializer):
     zen_count = serializers.IntegerField(min_value=0)
 
 
+# Percentiles of the execution time that are returned by default.
+DEFAULT_PERCENTILES = (50, 90, 99, 99.9)
+
+
+class StatisticsQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of the statistics endpoint,
+    percentiles are comma separated, e.g. '?percentiles=50,99.9'"""
+    percentiles = serializers.CharField(required=False)
+
+    def validate_percentiles(self, value: str) -> list[float]:
+        try:
+            percentiles = [float(percentile) for percentile in value.split(',')]
+        except ValueError as e:
+            raise serializers.ValidationError('percentiles have to be numbers') from e
+
+        if not all(0 <= percentile <= 100 for percentile in percentiles):
+            raise serializers.ValidationError('percentiles have to be between 0 and 100')
+        return percentiles
+
+
+class StatisticsSeriesQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of the statistics series endpoint"""
+    BUCKETS = {
+        'minute': datetime.timedelta(minutes=1),
+        'hour': datetime.timedelta(hours=1),
+        'day': datetime.timedelta(days=1),
+        'week': datetime.timedelta(weeks=1),
+        'month': datetime.timedelta(days=31),
+    }
+
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    bucket = serializers.ChoiceField(choices=list(BUCKETS), default='hour')
+
+    def validate(self, attrs):
+        attrs.setdefault('until', timezone.now())
+        attrs.setdefault('since', attrs['until'] - datetime.timedelta(days=7))
+
+        if attrs['since'] >= attrs['until']:
+            raise serializers.ValidationError('since has to be before until')
+
+        buckets = (attrs['until'] - attrs['since']) / self.BUCKETS[attrs['bucket']]
+        if buckets > settings.ZEN_STATS_MAX_BUCKETS:
+            raise serializers.ValidationError(
+                f'The series would have more than {settings.ZEN_STATS_MAX_BUCKETS} buckets,'
+                f' use a bigger bucket or a shorter period'
+            )
+        return attrs
+
+
 class StatisticsSerializer(serializers.Serializer):
     """Statistics serializer for Zen executions"""
     min_execution_time_ms = serializers.IntegerField(
@@ -74,6 +236,14 @@ class StatisticsSerializer(serializers.Serializer):
     variance = serializers.FloatField(min_value=0, read_only=True, allow_null=True)
     standard_deviation = serializers.FloatField(min_value=0, read_only=True, allow_null=True)
     range = serializers.FloatField(min_value=0, read_only=True, allow_null=True)
+    p50_execution_time_ms = serializers.FloatField(min_value=0, read_only=True, allow_null=True)
+    p90_execution_time_ms = serializers.FloatField(min_value=0, read_only=True, allow_null=True)
+    p99_execution_time_ms = serializers.FloatField(min_value=0, read_only=True, allow_null=True)
+    p999_execution_time_ms = serializers.FloatField(min_value=0, read_only=True, allow_null=True)
+    # Percentile -> execution time, e.g. {'99.9': 10.2}
+    percentiles = serializers.DictField(child=serializers.FloatField(),
+                                        read_only=True,
+                                        allow_null=True)
 
     def to_representation(self, instance):
         if instance is None:
@@ -81,18 +251,22 @@ class StatisticsSerializer(serializers.Serializer):
         return super().to_representation(instance)
 
     @classmethod
-    def from_execution(cls, obj, executions):
-        # TODO: Revisit this in the future
+    def from_statistics(cls, statistics, percentiles=DEFAULT_PERCENTILES):
         return cls(
             instance={
-                'min_execution_time_ms': executions.first().total_time,
-                'max_execution_time_ms': executions.last().total_time,
-                'mean_execution_time_ms': obj.mean_execution_time_ms,
-                'mode_execution_time_ms': obj.mode_execution_time_ms,
-                'median_execution_time_ms': obj.median_execution_time_ms,
-                'variance': obj.variance,
-                'standard_deviation': obj.standard_deviation,
-                'range': executions.last().total_time - executions.first()
-                .total_time,
+                'min_execution_time_ms': statistics.min,
+                'max_execution_time_ms': statistics.max,
+                'mean_execution_time_ms': statistics.mean,
+                'mode_execution_time_ms': statistics.mode,
+                'median_execution_time_ms': statistics.median,
+                'variance': statistics.variance,
+                'standard_deviation': statistics.standard_deviation,
+                'range': statistics.range,
+                'p50_execution_time_ms': statistics.percentile(50),
+                'p90_execution_time_ms': statistics.percentile(90),
+                'p99_execution_time_ms': statistics.percentile(99),
+                'p999_execution_time_ms': statistics.percentile(99.9),
+                'percentiles': {f'{percentile:g}': statistics.percentile(percentile)
+                                for percentile in percentiles},
             }
         )
@@ -0,0 +1,131 @@
+"""
+Mergeable quantile sketch of execution times.
+
+The sketch is a log-bucketed histogram (DDSketch), a value ``x`` is counted in the bucket
+``ceil(log(x) / log(gamma))`` with ``gamma = (1 + alpha) / (1 - alpha)``, so any quantile is
+estimated with a relative error of at most ``alpha``. Its size is bounded by ``max_buckets``,
+when there are more buckets the lowest ones are collapsed, which only affects the accuracy of
+the lowest quantiles.
+
+Two sketches with the same ``alpha`` are merged by adding their buckets, so quantiles across
+versions or collections are cheap to compute.
+"""
+from __future__ import annotations
+
+import math
+import typing
+
+DEFAULT_ALPHA = 0.01
+DEFAULT_MAX_BUCKETS = 2048
+
+
+class QuantileSketch:
+    """A DDSketch of non-negative values.
+
+    Args:
+        alpha: The relative accuracy of the quantiles.
+        max_buckets: Max number of buckets kept.
+
+    Examples:
+        >>> sketch = QuantileSketch()
+        >>> for value in range(1, 101):
+        ...     sketch.add(value)
+        >>> abs(sketch.quantile(0.9) - 90) <= 90 * sketch.alpha
+        True
+    """
+
+    def __init__(self, alpha: float = DEFAULT_ALPHA, max_buckets: int = DEFAULT_MAX_BUCKETS):
+        if not 0 < alpha < 1:
+            raise ValueError(f'alpha has to be between 0 and 1, not {alpha}')
+
+        self.alpha = alpha
+        self.max_buckets = max_buckets
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: dict[int, int] = {}
+        # Values that are 0, they do not fit in a log bucket.
+        self.zero_count = 0
+        self.count = 0
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        # The value with the lowest relative error to all the values of the bucket.
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value < 0:
+            raise ValueError(f'only non-negative values can be added, not {value}')
+
+        self.count += count
+        if value == 0:
+            self.zero_count += count
+            return
+
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        """Collapses the lowest buckets into one, until there are ``max_buckets``."""
+        indexes = sorted(self.buckets)
+        excess = len(indexes) - self.max_buckets + 1
+        collapsed = sum(self.buckets.pop(index) for index in indexes[:excess])
+        target = indexes[excess]
+        self.buckets[target] += collapsed
+
+    def merge(self, other: QuantileSketch) -> None:
+        """Adds the values of another sketch to this one."""
+        if not math.isclose(self.alpha, other.alpha):
+            raise ValueError('only sketches with the same alpha can be merged')
+
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q: float) -> float | None:
+        """Returns the estimated value at quantile ``q`` (0 <= q <= 1), None if empty."""
+        if not 0 <= q <= 1:
+            raise ValueError(f'quantile has to be between 0 and 1, not {q}')
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0
+
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return self._value(index)
+        return self._value(max(self.buckets))
+
+    def items(self) -> typing.Iterator[tuple[float, int]]:
+        """Iterates the (value, count) of the buckets, in ascending order of value."""
+        if self.zero_count:
+            yield 0, self.zero_count
+        for index in sorted(self.buckets):
+            yield self._value(index), self.buckets[index]
+
+    def to_dict(self) -> dict:
+        """JSON serializable representation, bucket indexes are strings as in JSON objects."""
+        return {
+            'alpha': self.alpha,
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'buckets': {str(index): count for index, count in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, max_buckets: int = DEFAULT_MAX_BUCKETS) -> QuantileSketch:
+        sketch = cls(alpha=data.get('alpha', DEFAULT_ALPHA), max_buckets=max_buckets)
+        sketch.zero_count = data.get('zero_count', 0)
+        sketch.count = data.get('count', 0)
+        sketch.buckets = {int(index): count for index, count in data.get('buckets', {}).items()}
+        return sketch
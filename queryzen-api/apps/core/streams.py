@@ -0,0 +1,157 @@
+"""
+Transport of streamed Zen results from the workers to the API.
+
+The worker publishes messages to a stream as soon as rows are fetched from the database, and the
+API forwards them to the HTTP client while they arrive, so a result is never fully held in memory.
+
+Messages are dictionaries, a stream always follows the order:
+    {'columns': [...]}
+    {'rows': [...]} (zero or more)
+    {'execution': {...}} or {'error': '...'}
+
+At most ``ZEN_STREAM_MAX_PENDING`` messages wait for the API, the worker waits for the API to
+read them before publishing more, so a slow client slows down the query instead of piling up its
+result. The API closes the stream when the client is done or disconnected, the worker then stops.
+"""
+import abc
+import json
+import queue
+import time
+import typing
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+
+class StreamTimeoutError(Exception):
+    """No message was received from the stream in time."""
+
+
+class StreamClosedError(Exception):
+    """Nobody reads the stream, it was closed or its messages were not read in time."""
+
+
+class ResultStream(abc.ABC):
+    """Base class for result stream transports."""
+
+    def __init__(self, stream_id: str):
+        self.stream_id = stream_id
+
+    @staticmethod
+    def is_last(message: dict) -> bool:
+        return 'execution' in message or 'error' in message
+
+    @abc.abstractmethod
+    def publish(self, message: dict) -> None:
+        """Publishes a message to the stream.
+
+        Raises:
+            StreamClosedError: If the stream was closed, or its pending messages were not read in
+                ``settings.ZEN_STREAM_PUBLISH_TIMEOUT`` seconds.
+        """
+
+    @abc.abstractmethod
+    def receive(self, timeout: float) -> dict:
+        """Blocks until a message is received.
+
+        Raises:
+            StreamTimeoutError: If no message is received in `timeout` seconds.
+        """
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Closes the stream, pending messages are dropped and next ones are not published."""
+
+    def listen(self, timeout: float) -> typing.Iterator[dict]:
+        """Iterates the messages of the stream until the last one.
+
+        Args:
+            timeout: Max seconds to wait between messages.
+        """
+        while True:
+            message = self.receive(timeout)
+            yield message
+            if self.is_last(message):
+                return
+
+
+class RedisResultStream(ResultStream):
+    """Stream backed by a redis list, it works across processes and machines."""
+    # Seconds between checks of a full stream.
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, stream_id: str):
+        super().__init__(stream_id)
+        import redis  # pylint: disable=C0415
+        self.redis = redis.Redis.from_url(settings.ZEN_STREAM_URL)
+        self.key = f'queryzen:stream:{stream_id}'
+        self.closed_key = f'{self.key}:closed'
+
+    def publish(self, message: dict) -> None:
+        deadline = time.monotonic() + settings.ZEN_STREAM_PUBLISH_TIMEOUT
+        while True:
+            pipe = self.redis.pipeline()
+            pipe.llen(self.key)
+            pipe.exists(self.closed_key)
+            pending, closed = pipe.execute()
+            if closed:
+                raise StreamClosedError(f'The stream {self.stream_id} was closed')
+            if pending < settings.ZEN_STREAM_MAX_PENDING:
+                break
+            if time.monotonic() >= deadline:
+                raise StreamClosedError(f'The stream {self.stream_id} was not read in'
+                                        f' {settings.ZEN_STREAM_PUBLISH_TIMEOUT} seconds')
+            time.sleep(self.POLL_INTERVAL)
+
+        pipe = self.redis.pipeline()
+        pipe.rpush(self.key, json.dumps(message, cls=DjangoJSONEncoder))
+        # Streams nobody listens to, are eventually removed.
+        pipe.expire(self.key, settings.ZEN_STREAM_TTL)
+        pipe.execute()
+
+    def receive(self, timeout: float) -> dict:
+        item = self.redis.blpop([self.key], timeout=timeout)
+        if item is None:
+            raise StreamTimeoutError(f'No message received in {timeout} seconds')
+        return json.loads(item[1])
+
+    def close(self) -> None:
+        pipe = self.redis.pipeline()
+        pipe.delete(self.key)
+        pipe.set(self.closed_key, 1, ex=settings.ZEN_STREAM_TTL)
+        pipe.execute()
+
+
+class LocalResultStream(ResultStream):
+    """Stream backed by an in-process queue, only usable when the task runs in the same
+    process as the API, e.g. when celery tasks are run eagerly. The queue is not bounded, eager
+    tasks publish the whole result before it is read.
+    """
+    _queues: dict[str, queue.Queue] = {}
+
+    def __init__(self, stream_id: str):
+        super().__init__(stream_id)
+        self.queue = self._queues.setdefault(stream_id, queue.Queue())
+
+    def publish(self, message: dict) -> None:
+        # Same encoding as the redis stream, so both behave the same.
+        self.queue.put(json.loads(json.dumps(message, cls=DjangoJSONEncoder)))
+
+    def receive(self, timeout: float) -> dict:
+        try:
+            message = self.queue.get(timeout=timeout)
+        except queue.Empty as e:
+            raise StreamTimeoutError(f'No message received in {timeout} seconds') from e
+
+        if self.is_last(message):
+            self.close()
+        return message
+
+    def close(self) -> None:
+        self._queues.pop(self.stream_id, None)
+
+
+def get_stream(stream_id: str) -> ResultStream:
+    """Returns the stream configured in ``settings.ZEN_STREAM_BACKEND``"""
+    return import_string(settings.ZEN_STREAM_BACKEND)(stream_id)
@@ -1,44 +1,261 @@
 # pylint: disable=C0114
 import datetime
+import functools
 import json
 import logging
 
 from celery import shared_task
+from celery.signals import worker_process_shutdown, worker_shutdown
 
 from django.conf import settings
 from django.shortcuts import get_object_or_404
 
+from apps.core.buffer import ExecutionBuffer
+from apps.core.cancellation import get_cancellations
+from apps.core.concurrency import DatabaseBusyError, database_slot, is_limited
 from apps.core.models import Zen, Execution
-from apps.core.serializers import ZenExecutionResponseSerializer
+from apps.core.pagination import make_page_token
+from apps.core.results import get_result_store, spill_result
+from apps.core.serializers import ZenExecutionResponseSerializer, ExecutionSerializer
+from apps.core.streams import StreamClosedError, get_stream
 from databases.base import Database
+from databases.control import QueryControl, QueryInterruptedError, QueryTimeoutError
 
 logger = logging.getLogger(__name__)
 
+# Executions saved in batches by the workers, check apps.core.buffer
+execution_buffer = ExecutionBuffer(max_size=settings.ZEN_EXECUTION_BUFFER_SIZE,
+                                   flush_interval=settings.ZEN_EXECUTION_FLUSH_INTERVAL)
 
-@shared_task
-def run_query(database: str, pk: str, parameters: dict | None = None):
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def flush_executions(**kwargs):  # pylint: disable=W0613
+    """Saves the pending executions when a worker stops."""
+    execution_buffer.flush()
+
+
+def _slot_lease(timeout: float | None) -> float:
+    """Seconds a query holds the slot of its database, check ``apps.core.concurrency``"""
+    return (timeout or settings.ZEN_MAX_TIMEOUT) + settings.ZEN_CONCURRENCY_LEASE_MARGIN
+
+
+def _retry_busy(task, error: DatabaseBusyError):
+    """Retries a task whose database is busy, it waits in the queue instead of in a worker."""
+    return task.retry(exc=error, countdown=settings.ZEN_CONCURRENCY_RETRY_DELAY, max_retries=None)
+
+
+@shared_task(bind=True)
+def run_query(self,
+              database: str,
+              pk: str,
+              parameters: dict | list[dict] | None = None,
+              page: dict | None = None,
+              timeout: float | None = None):
+    """Runs a Zen, if ``page`` ({'offset', 'limit'}) is given only that page of the result is
+    returned, along with the token of the next page, `next_page_token`.
+
+    The query is stopped if it runs for more than ``timeout`` seconds or if the execution is
+    cancelled, check ``apps.core.cancellation``. If the database has no free slot, the task is
+    retried later, check ``apps.core.concurrency``."""
+    if timeout is None and is_limited(database):
+        # The query has to finish before its slot lease.
+        timeout = settings.ZEN_MAX_TIMEOUT
+
+    try:
+        with database_slot(database, _slot_lease(timeout)):
+            result = run_zen(database,
+                             pk,
+                             parameters,
+                             page,
+                             timeout,
+                             execution_id=self.request.id,
+                             buffered=_is_buffered(self))
+    except DatabaseBusyError as e:
+        raise _retry_busy(self, e) from e
+
+    # Big results are not sent through the result backend, check apps.core.results
+    return spill_result(result)
+
+
+def _is_buffered(task) -> bool:
+    """Whether the execution of a task is saved by the execution buffer, the ones of eager tasks
+    or direct calls are saved right away, as their caller may read them."""
+    return not task.request.is_eager and not task.request.called_directly
+
+
+def run_zen(database: str,
+            pk: str,
+            parameters: dict | list[dict] | None = None,
+            page: dict | None = None,
+            timeout: float | None = None,
+            execution_id: str | None = None,
+            buffered: bool = False) -> dict:
+    """Runs a Zen and saves its execution, check ``run_query``, it is also used to run Zens in
+    the API process, check ``apps.core.inline``.
+
+    Args:
+        execution_id: The id of the execution, it can be cancelled with it. If None the execution
+            cannot be cancelled, it is still stopped after ``timeout``.
+        buffered: Whether the execution is saved by the execution buffer.
+
+    Returns:
+        The serialized execution, along the rows and columns of the result.
+    """
     executed_at = datetime.datetime.now(datetime.UTC)
     zen = get_object_or_404(Zen, pk=pk)
-    execution = Execution(zen=zen)
+    loaded_state = zen.state
+    execution = Execution(zen=zen, started_at=executed_at)
+    database_name = database
     database: Database = getattr(settings, 'ZEN_DATABASES').get(database)
+    get_cancel_reason = None
+    if execution_id is not None:
+        get_cancel_reason = functools.partial(get_cancellations().get_reason, execution_id)
+    control = QueryControl(timeout=timeout, get_cancel_reason=get_cancel_reason)
 
     columns = rows = []
     query = ''
+    next_offset = None
 
     try:
-        result = database.execute_query(zen.query, parameters)
+        if isinstance(parameters, list):
+            # Parameter sets, rows are tagged with the index of their set.
+            result = database.execute_query_many(zen.query, parameters, control)
+        elif page:
+            result = database.execute_query_page(zen.query,
+                                                 parameters,
+                                                 page['offset'],
+                                                 page['limit'],
+                                                 control)
+            next_offset = result.next_offset
+        else:
+            result = database.execute_query(zen.query, parameters, control)
         rows = result.rows
         columns = result.columns
         execution.state = Execution.State.VALID
         execution.row_count = result.row_count
         query = result.query
         zen.state = Zen.State.VALID
+    except QueryInterruptedError as e:
+        # The query was not wrong, the state of the Zen does not change.
+        execution.error = str(e)
+        execution.row_count = 0
+        execution.state = (Execution.State.TIMEOUT if isinstance(e, QueryTimeoutError)
+                           else Execution.State.CANCELLED)
     except Exception as e:  # pylint: disable=W0718
         execution.error = str(e)
         execution.row_count = 0
         execution.state = Execution.State.INVALID
         zen.state = Zen.State.INVALID
 
+    execution.rows = rows
+    execution.columns = columns
+    _save_execution(zen, loaded_state, execution, query, parameters, executed_at, buffered)
+    data = ZenExecutionResponseSerializer(execution).data
+    if page:
+        data['next_page_token'] = None if next_offset is None else make_page_token(
+            zen.pk, database_name, parameters, next_offset, page['limit']
+        )
+    return data
+
+
+@shared_task(bind=True)
+def stream_query(self,
+                 database: str,
+                 pk: str,
+                 stream_id: str,
+                 parameters: dict | None = None,
+                 batch_size: int = 1000,
+                 timeout: float | None = None):
+    """Same as ``run_query`` but rows are published to the stream ``stream_id``
+    in batches while they are fetched from the database, check ``apps.core.streams``"""
+    if timeout is None and is_limited(database):
+        # The query has to finish before its slot lease.
+        timeout = settings.ZEN_MAX_TIMEOUT
+
+    try:
+        with database_slot(database, _slot_lease(timeout)):
+            _stream_query(self, database, pk, stream_id, parameters, batch_size, timeout)
+    except DatabaseBusyError as e:
+        raise _retry_busy(self, e) from e
+
+
+def _stream_query(task,
+                  database: str,
+                  pk: str,
+                  stream_id: str,
+                  parameters: dict | None,
+                  batch_size: int,
+                  timeout: float | None) -> None:
+    executed_at = datetime.datetime.now(datetime.UTC)
+    stream = get_stream(stream_id)
+    zen = get_object_or_404(Zen, pk=pk)
+    loaded_state = zen.state
+    execution = Execution(zen=zen, row_count=0, started_at=executed_at)
+    database: Database = getattr(settings, 'ZEN_DATABASES').get(database)
+    get_cancel_reason = functools.partial(get_cancellations().get_reason, task.request.id)
+    control = QueryControl(timeout=timeout, get_cancel_reason=get_cancel_reason)
+
+    query = ''
+
+    try:
+        result = database.execute_query_stream(zen.query, parameters, batch_size, control)
+        query = result.query
+        stream.publish({'columns': result.columns})
+
+        for rows in result.batches:
+            execution.row_count += len(rows)
+            stream.publish({'rows': rows})
+
+        execution.state = Execution.State.VALID
+        zen.state = Zen.State.VALID
+    except StreamClosedError as e:
+        # Nobody reads the result, e.g. the client disconnected.
+        execution.error = str(e)
+        execution.state = Execution.State.CANCELLED
+    except QueryInterruptedError as e:
+        # The query was not wrong, the state of the Zen does not change.
+        execution.error = str(e)
+        execution.state = (Execution.State.TIMEOUT if isinstance(e, QueryTimeoutError)
+                           else Execution.State.CANCELLED)
+    except Exception as e:  # pylint: disable=W0718
+        execution.error = str(e)
+        execution.state = Execution.State.INVALID
+        zen.state = Zen.State.INVALID
+
+    _save_execution(zen,
+                    loaded_state,
+                    execution,
+                    query,
+                    parameters,
+                    executed_at,
+                    _is_buffered(task))
+    if execution.state != Execution.State.CANCELLED:
+        try:
+            stream.publish({'execution': ExecutionSerializer(execution).data})
+        except StreamClosedError as e:
+            logger.warning(e)
+
+
+@shared_task
+def delete_expired_results() -> int:
+    """Deletes the stored results older than ``settings.ZEN_RESULT_STORE_TTL``, it is run
+    periodically by celery beat."""
+    deleted = get_result_store().delete_expired(settings.ZEN_RESULT_STORE_TTL)
+    logger.info('Deleted %s expired results', deleted)
+    return deleted
+
+
+def _save_execution(zen: Zen,
+                    loaded_state: str,
+                    execution: Execution,
+                    query: str,
+                    parameters: dict | None,
+                    executed_at: datetime.datetime,
+                    buffered: bool) -> None:
+    """Fills the bookkeeping fields of the execution and saves it along the state of its Zen,
+    if it changed from ``loaded_state``. If ``buffered`` it is saved later by the execution
+    buffer, check ``apps.core.buffer``."""
     execution.query = query
     execution.parameters = json.dumps(parameters)
     finished_at = datetime.datetime.now(datetime.UTC)
@@ -46,9 +263,12 @@ def run_query(database: str, pk: str, parameters: dict | None = None):
     execution_time = (finished_at - executed_at).total_seconds() * 1000  # milliseconds
     execution.finished_at = finished_at
     execution.total_time = execution_time
-    execution.rows = rows
-    execution.columns = columns
 
-    zen.save()
+    zen_state = zen.state if zen.state != loaded_state else None
+    if buffered and settings.ZEN_EXECUTION_BUFFER_SIZE:
+        execution_buffer.add(execution, zen_state)
+        return
+
+    if zen_state is not None:
+        zen.save(update_fields=['state'])
     execution.save()
-    return ZenExecutionResponseSerializer(execution).data
@@ -0,0 +1,135 @@
+# pylint: disable=C0114
+import datetime
+from unittest import mock
+
+from django.db import IntegrityError, OperationalError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.buffer import ExecutionBuffer, save_executions
+from apps.core.models import Execution, Zen, ZenStatistics
+from apps.core.tasks import _save_execution
+from apps.core.tests.factories import QueryZenFactory
+
+
+def make_execution(zen: Zen, total_time: int = 5) -> Execution:
+    return Execution(zen=zen,
+                     state=Execution.State.VALID,
+                     finished_at=datetime.datetime.now(datetime.UTC),
+                     total_time=total_time,
+                     query='select 1',
+                     error='',
+                     row_count=1,
+                     parameters='{}')
+
+
+class ExecutionBufferTestCase(TestCase):
+    """Tests for the buffered saving of executions"""
+
+    def setUp(self):
+        self.zen = QueryZenFactory.create(name='buffered', query='select 1')
+        self.other = QueryZenFactory.create(name='other', query='select 2')
+
+    def test_flush(self):
+        buffer = ExecutionBuffer(max_size=100, flush_interval=60)
+        buffer.add(make_execution(self.zen, 1))
+        buffer.add(make_execution(self.zen, 3), zen_state=Zen.State.VALID)
+        buffer.add(make_execution(self.other, 10), zen_state=Zen.State.INVALID)
+        assert not Execution.objects.exists()
+
+        with CaptureQueriesContext(connection) as queries:
+            assert buffer.flush() == 3
+
+        # The executions are saved with one insert.
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "core_execution"')]
+        assert len(inserts) == 1
+
+        assert Execution.objects.filter(zen=self.zen).count() == 2
+        statistics = ZenStatistics.objects.get(zen=self.zen)
+        assert (statistics.count, statistics.min, statistics.max) == (2, 1, 3)
+        assert Zen.objects.get(pk=self.zen.pk).state == Zen.State.VALID
+        assert Zen.objects.get(pk=self.other.pk).state == Zen.State.INVALID
+
+        # Nothing is pending.
+        with self.assertNumQueries(0):
+            assert buffer.flush() == 0
+
+    def test_flush_error(self):
+        buffer = ExecutionBuffer(max_size=100, flush_interval=60)
+        buffer.add(make_execution(self.zen))
+
+        with mock.patch('apps.core.buffer.save_executions', side_effect=RuntimeError), \
+                self.assertLogs('apps.core.buffer', 'ERROR'):
+            assert buffer.flush() == 0
+
+    def test_flush_database_error(self):
+        buffer = ExecutionBuffer(max_size=1, flush_interval=60)
+        buffer.MAX_PENDING_BATCHES = 2
+        # Full batches would be saved by the thread.
+        patcher = mock.patch.object(buffer, '_ensure_thread')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        buffer.add(make_execution(self.zen), zen_state=Zen.State.INVALID)
+
+        with mock.patch('apps.core.buffer.save_executions',
+                        side_effect=OperationalError('database is locked')), \
+                self.assertLogs('apps.core.buffer', 'ERROR'):
+            assert buffer.flush() == 0
+
+        # The batch is saved by the next flush.
+        buffer.add(make_execution(self.other))
+        assert buffer.flush() == 2
+        assert Zen.objects.get(pk=self.zen.pk).state == Zen.State.INVALID
+
+        # While the database fails, executions are kept up to MAX_PENDING_BATCHES batches.
+        for _ in range(3):
+            buffer.add(make_execution(self.zen))
+        with mock.patch('apps.core.buffer.save_executions', side_effect=OperationalError), \
+                self.assertLogs('apps.core.buffer', 'ERROR'):
+            buffer.flush()
+        assert buffer.flush() == 2
+
+    def test_flush_integrity_error(self):
+        buffer = ExecutionBuffer(max_size=100, flush_interval=60)
+        buffer.add(make_execution(self.zen))
+        buffer.add(make_execution(self.other), zen_state=Zen.State.INVALID)
+
+        def save(executions, zen_states):
+            # The other Zen was deleted.
+            if self.other.pk in zen_states or any(e.zen_id == self.other.pk for e in executions):
+                raise IntegrityError('FOREIGN KEY constraint failed')
+            save_executions(executions, zen_states)
+
+        with mock.patch('apps.core.buffer.save_executions', side_effect=save), \
+                self.assertLogs('apps.core.buffer', 'ERROR'):
+            assert buffer.flush() == 1
+
+        # Only the executions of the deleted Zen are lost.
+        assert Execution.objects.filter(zen=self.zen).count() == 1
+        assert not Execution.objects.filter(zen=self.other).exists()
+
+    @override_settings(ZEN_EXECUTION_BUFFER_SIZE=100)
+    def test_save_execution(self):
+        executed_at = datetime.datetime.now(datetime.UTC)
+
+        with mock.patch('apps.core.tasks.execution_buffer') as buffer:
+            # The state of the Zen did not change.
+            execution = make_execution(self.zen)
+            _save_execution(self.zen, self.zen.state, execution, 'select 1', {}, executed_at,
+                            buffered=True)
+            buffer.add.assert_called_once_with(execution, None)
+            assert not Execution.objects.exists()
+
+            # Unbuffered executions are saved right away, the Zen only if its state changed.
+            with mock.patch.object(Zen, 'save') as save_zen:
+                _save_execution(self.zen, self.zen.state, make_execution(self.zen),
+                                'select 1', {}, executed_at, buffered=False)
+                save_zen.assert_not_called()
+
+            loaded_state = self.zen.state
+            self.zen.state = Zen.State.INVALID
+            _save_execution(self.zen, loaded_state, make_execution(self.zen),
+                            'select 1', {}, executed_at, buffered=False)
+
+        assert Execution.objects.count() == 2
+        assert Zen.objects.get(pk=self.zen.pk).state == Zen.State.INVALID
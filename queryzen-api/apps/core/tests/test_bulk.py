@@ -0,0 +1,87 @@
+# pylint: disable=C0114
+from django.test import TestCase
+
+from apps.core.models import Zen
+from apps.core.tests.factories import QueryZenFactory
+
+
+class ZenBulkTestCase(TestCase):
+    """Tests the endpoint to create many Zens in one request"""
+
+    url = '/zen/bulk/'
+
+    def post(self, zens: list[dict], **data):
+        return self.client.post(self.url, {'zens': zens, **data}, content_type='application/json')
+
+    def test_bulk_create(self):
+        QueryZenFactory.create(name='existing', query='select 1', version='latest')
+
+        response = self.post([{'collection': 'main', 'name': 'new', 'query': 'select 1'},
+                              {'collection': 'main', 'name': 'new', 'query': 'select 2'},
+                              {'collection': 'main', 'name': 'existing', 'query': 'select 3',
+                               'default_parameters': {}, 'cache_ttl': 10}])
+        assert response.status_code == 200, response.content
+
+        results = response.json()
+        assert [result['created'] for result in results] == [True, True, True]
+        assert [(result['zen']['name'], result['zen']['version']) for result in results] == \
+               [('new', 1), ('new', 2), ('existing', 2)]
+        assert Zen.objects.get(name='existing', version=2).cache_ttl == 10
+
+        # Versions keep being allocated after a bulk creation.
+        assert QueryZenFactory.create(name='new', query='q', version='latest').version == 3
+
+    def test_bulk_create_conflict(self):
+        QueryZenFactory.create(name='existing', query='select 1', version='latest')
+
+        response = self.post([{'collection': 'main', 'name': 'new', 'query': 'select 1'},
+                              {'collection': 'main', 'name': 'existing', 'query': 'select 1',
+                               'version': 1}])
+        assert response.status_code == 409
+        assert 'zens[1]' in response.json()[0]
+
+        # Nothing is created.
+        assert not Zen.objects.filter(name='new').exists()
+        assert QueryZenFactory.create(name='existing', query='q', version='latest').version == 2
+
+    def test_bulk_get_or_create(self):
+        existing = QueryZenFactory.create(name='existing', query='select 1', version='latest')
+        QueryZenFactory.create(name='versions', query='select 1', version='latest')
+        QueryZenFactory.create(name='versions', query='select 1', version='latest')
+
+        response = self.post([{'collection': 'main', 'name': 'existing', 'query': 'select 2'},
+                              {'collection': 'main', 'name': 'versions', 'query': 'select 2',
+                               'version': '1'},
+                              {'collection': 'main', 'name': 'new', 'query': 'select 2'},
+                              {'collection': 'main', 'name': 'new', 'query': 'select 3'}],
+                             get_or_create=True)
+        assert response.status_code == 200, response.content
+
+        results = response.json()
+        assert [result['created'] for result in results] == [False, False, True, False]
+        assert results[0]['zen']['id'] == str(existing.id)
+        assert results[1]['zen']['version'] == 1
+        assert results[2]['zen'] == results[3]['zen']
+        assert Zen.objects.filter(name='new').count() == 1
+
+    def test_bulk_validation(self):
+        response = self.post([{'collection': 'main', 'name': 'zen', 'query': 'select 1'},
+                              {'collection': 'main', 'name': 'zen'},
+                              {'collection': 'main', 'name': 'zen', 'query': 'q', 'version': 'x'}])
+        assert response.status_code == 400
+
+        # Errors are returned by the index of the Zen.
+        errors = response.json()['zens']
+        assert '0' not in errors
+        assert 'query' in errors['1']
+        assert 'version' in errors['2']
+        assert not Zen.objects.exists()
+
+        assert self.post([]).status_code == 400
+
+    def test_bulk_queries(self):
+        zens = [{'collection': 'main', 'name': f'zen{i % 10}', 'query': 'select 1'}
+                for i in range(80)]
+        # Savepoint, counters insert and lock, counters update, zens insert, release.
+        with self.assertNumQueries(6):
+            assert self.post(zens).status_code == 200
@@ -0,0 +1,60 @@
+# pylint: disable=C0114
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from apps.core import cache
+from apps.core.models import Execution
+from apps.core.tests.factories import QueryZenFactory
+
+
+@override_settings(ZEN_RESULT_CACHE_TTL=60)
+class ResultCacheTestCase(TestCase):
+    """Tests for the Zen result cache"""
+
+    def setUp(self) -> None:
+        cache.get_cache().clear()
+        self.zen = QueryZenFactory.create(name='cached_zen', query='select :value')
+        self.url = f'/collection/{self.zen.collection}/zen/{self.zen.name}/version/1/'
+        self.result = {'state': Execution.State.VALID, 'rows': [[1]], 'columns': ['value']}
+
+    def test_cached_result_skips_execution(self):
+        """A cached result is returned without dispatching the task"""
+        cache.set_result(self.zen, 'default', 'select 1', self.result)
+
+        with mock.patch('apps.core.views.run_query') as run_query:
+            response = self.client.post(self.url,
+                                        {'parameters': {'value': 1},
+                                         'version': 1,
+                                         'database': 'default'},
+                                        content_type='application/json')
+
+        run_query.apply_async.assert_not_called()
+        assert response.status_code == 200
+        assert response.data == self.result
+
+    def test_different_parameters_are_not_cached(self):
+        cache.set_result(self.zen, 'default', 'select 1', self.result)
+
+        assert cache.get_result(self.zen, 'default', 'select 2') is None
+        assert cache.get_result(self.zen, 'crate', 'select 1') is None
+
+    def test_new_version_invalidates(self):
+        cache.set_result(self.zen, 'default', 'select 1', self.result)
+        QueryZenFactory.create(name=self.zen.name, query='select 2', version='latest')
+
+        assert cache.get_result(self.zen, 'default', 'select 1') is None
+
+    def test_delete_invalidates(self):
+        other = QueryZenFactory.create(name=self.zen.name, query='select 2', version='latest')
+        cache.set_result(self.zen, 'default', 'select 1', self.result)
+        other.delete()
+
+        assert cache.get_result(self.zen, 'default', 'select 1') is None
+
+    def test_zen_ttl(self):
+        """Per Zen ttl takes precedence over the default one"""
+        assert cache.get_ttl(self.zen) == 60
+
+        self.zen.cache_ttl = 0
+        assert cache.get_ttl(self.zen) == 0
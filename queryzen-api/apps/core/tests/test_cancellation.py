@@ -0,0 +1,112 @@
+# pylint: disable=C0114
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.core.cancellation import LocalCancellations
+from apps.core.models import Execution
+from apps.core.tasks import run_query
+from apps.core.tests.factories import QueryZenFactory
+from databases.base import SQLiteDatabase
+from databases.control import (QueryCancelledError,
+                               QueryControl,
+                               QueryTimeoutError,
+                               TIMEOUT_REASON)
+from queryzen_api.celery import app
+
+# Counts forever, it only stops when it is interrupted.
+ENDLESS_QUERY = ('WITH RECURSIVE c(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM c)'
+                 ' SELECT count(*) FROM c')
+
+
+class QueryControlTestCase(SimpleTestCase):
+    """Tests for stopping queries in the database"""
+
+    def test_timeout(self):
+        database = SQLiteDatabase(':memory:')
+
+        start = time.monotonic()
+        with self.assertRaises(QueryTimeoutError):
+            database.execute_query(ENDLESS_QUERY, {}, control=QueryControl(timeout=0.2))
+        assert time.monotonic() - start < 5
+
+        # The connection can still be used.
+        assert database.execute_query('select 1', {}).rows == [(1,)]
+
+    def test_cancel(self):
+        database = SQLiteDatabase(':memory:')
+        control = QueryControl(get_cancel_reason=lambda: 'cancelled', poll_interval=0.05)
+
+        with self.assertRaises(QueryCancelledError):
+            database.execute_query(ENDLESS_QUERY, {}, control=control)
+
+        control = QueryControl(get_cancel_reason=lambda: TIMEOUT_REASON, poll_interval=0.05)
+        with self.assertRaises(QueryTimeoutError):
+            database.execute_query(ENDLESS_QUERY, {}, control=control)
+
+    def test_not_stopped(self):
+        database = SQLiteDatabase(':memory:')
+        control = QueryControl(timeout=10, get_cancel_reason=lambda: None)
+
+        assert database.execute_query('select 1', {}, control).rows == [(1,)]
+
+
+@override_settings(ZEN_CANCEL_BACKEND='apps.core.cancellation.LocalCancellations')
+class CancellationTestCase(TestCase):
+    """Tests for timeouts and cancellations of Zen executions"""
+
+    def setUp(self):
+        task_always_eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, 'task_always_eager', task_always_eager)
+
+    def test_task_timeout(self):
+        zen = QueryZenFactory.create(name='endless', query=ENDLESS_QUERY)
+
+        result = run_query.apply(('default', zen.pk), {'timeout': 0.2}).get()
+
+        execution = Execution.objects.get()
+        assert execution.state == Execution.State.TIMEOUT
+        assert result['state'] == Execution.State.TIMEOUT
+        zen.refresh_from_db()
+        assert zen.state != zen.State.INVALID
+
+    def test_task_cancelled(self):
+        zen = QueryZenFactory.create(name='endless', query=ENDLESS_QUERY)
+        LocalCancellations().cancel('abc')
+
+        run_query.apply(('default', zen.pk), task_id='abc').get()
+
+        assert Execution.objects.get().state == Execution.State.CANCELLED
+
+    def test_run_timeout(self):
+        zen = QueryZenFactory.create(name='endless', query=ENDLESS_QUERY)
+
+        response = self.client.post(f'/collection/{zen.collection}/zen/{zen.name}/version/1/',
+                                    {'parameters': {}, 'version': 1, 'database': 'default',
+                                     'timeout': 0.2},
+                                    content_type='application/json')
+        assert response.status_code == 408
+
+    def test_cancel(self):
+        with mock.patch('apps.core.views.AsyncResult') as async_result:
+            async_result.return_value.id = '123'
+            async_result.return_value.ready.return_value = False
+            async_result.return_value.status = 'STARTED'
+            response = self.client.post('/execution/123/cancel/')
+
+            assert response.status_code == 202
+            assert response.data == {'id': '123', 'status': 'STARTED'}
+            assert LocalCancellations().get_reason('123') == 'cancelled'
+
+            async_result.return_value.ready.return_value = True
+            assert self.client.post('/execution/123/cancel/').status_code == 409
+
+    def test_result_cancelled(self):
+        with mock.patch('apps.core.views.AsyncResult') as async_result:
+            async_result.return_value.ready.return_value = True
+            async_result.return_value.status = 'REVOKED'
+            response = self.client.get('/execution/123/')
+
+        assert response.status_code == 409
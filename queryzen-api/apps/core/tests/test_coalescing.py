@@ -0,0 +1,107 @@
+# pylint: disable=C0114
+import time
+from unittest import mock
+
+from celery.exceptions import TimeoutError as CeleryTimeoutError
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.core.cancellation import LocalCancellations
+from apps.core.coalescing import LocalFlights, make_flight_key
+from apps.core.tests.factories import QueryZenFactory
+
+
+class FlightsTestCase(SimpleTestCase):
+    """Tests for the local store of flights"""
+
+    def setUp(self):
+        self.addCleanup(LocalFlights._flights.clear)  # pylint: disable=W0212
+
+    def test_join(self):
+        flights = LocalFlights()
+        assert flights.join('key', 'a', ttl=60) == 'a'
+        assert flights.join('key', 'b', ttl=60) == 'a'
+        assert flights.join('other', 'c', ttl=60) == 'c'
+
+        # Only the execution of the flight ends it.
+        flights.land('key', 'b')
+        assert flights.join('key', 'b', ttl=60) == 'a'
+
+        flights.land('key', 'a')
+        assert flights.join('key', 'b', ttl=60) == 'b'
+
+    def test_expires(self):
+        flights = LocalFlights()
+        assert flights.join('key', 'a', ttl=0.01) == 'a'
+        time.sleep(0.02)
+        assert flights.join('key', 'b', ttl=60) == 'b'
+
+
+@override_settings(ZEN_COALESCE=True,
+                   ZEN_COALESCE_BACKEND='apps.core.coalescing.LocalFlights',
+                   ZEN_CANCEL_BACKEND='apps.core.cancellation.LocalCancellations')
+class CoalescingTestCase(TestCase):
+    """Tests for runs of a Zen that share the execution of an identical run"""
+
+    def setUp(self):
+        self.addCleanup(LocalFlights._flights.clear)  # pylint: disable=W0212
+        self.zen = QueryZenFactory.create(name='herd', query='select 1')
+        self.url = f'/collection/{self.zen.collection}/zen/{self.zen.name}/version/1/'
+        self.key = make_flight_key(self.zen,
+                                   'default',
+                                   settings.ZEN_DATABASES['default'].prepare_query('select 1', {}),
+                                   settings.ZEN_TIMEOUT)
+
+        patcher = mock.patch('apps.core.views.run_query')
+        self.run_query = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.run_query.app.conf.task_always_eager = False
+        self.run_query.apply_async.return_value.get.return_value = {'rows': [[1]]}
+
+    def run_zen(self):
+        return self.client.post(self.url,
+                                {'parameters': {}, 'version': 1, 'database': 'default'},
+                                content_type='application/json')
+
+    def test_start_flight(self):
+        response = self.run_zen()
+
+        assert response.status_code == 200
+        task_id = self.run_query.apply_async.call_args.kwargs['task_id']
+        assert task_id
+        # The flight ended with the run.
+        assert LocalFlights().join(self.key, 'next', ttl=60) == 'next'
+
+    def test_join_flight(self):
+        LocalFlights().join(self.key, 'running', ttl=60)
+
+        with mock.patch('apps.core.views.AsyncResult') as async_result:
+            async_result.return_value.get.return_value = {'rows': [[1]]}
+            response = self.run_zen()
+
+        assert response.status_code == 200
+        assert response.json()['rows'] == [[1]]
+        async_result.assert_called_once_with('running')
+        self.run_query.apply_async.assert_not_called()
+        # The flight belongs to the run that started it.
+        assert LocalFlights().join(self.key, 'next', ttl=60) == 'running'
+
+    def test_joined_timeout(self):
+        LocalFlights().join(self.key, 'running', ttl=60)
+
+        with mock.patch('apps.core.views.AsyncResult') as async_result:
+            async_result.return_value.get.side_effect = CeleryTimeoutError
+            response = self.run_zen()
+
+        assert response.status_code == 408
+        # Other runs still wait for the execution.
+        assert LocalCancellations().get_reason('running') is None
+
+    def test_disabled(self):
+        LocalFlights().join(self.key, 'running', ttl=60)
+
+        with self.settings(ZEN_COALESCE=False):
+            assert self.run_zen().status_code == 200
+
+        self.run_query.apply_async.assert_called_once()
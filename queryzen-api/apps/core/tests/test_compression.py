@@ -0,0 +1,75 @@
+# pylint: disable=C0114
+import gzip
+import importlib.util
+import unittest
+import zlib
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import SimpleTestCase, RequestFactory, override_settings
+
+from apps.core.middleware import CompressionMiddleware, negotiate_encoding
+
+HAS_ZSTD = importlib.util.find_spec('zstandard') is not None
+CONTENT = b'{"rows": [[1, "a"], [2, "b"]]}' * 100
+
+
+@override_settings(ZEN_COMPRESSION=True, ZEN_COMPRESSION_ENCODINGS='zstd,gzip',
+                   ZEN_COMPRESSION_MIN_SIZE=1024)
+class CompressionTestCase(SimpleTestCase):
+    """Tests for the compression of responses"""
+
+    def process(self, response, accept_encoding: str = 'gzip'):
+        request = RequestFactory().get('/', headers={'Accept-Encoding': accept_encoding})
+        return CompressionMiddleware(lambda r: response)(request)
+
+    def test_negotiate_encoding(self):
+        assert negotiate_encoding('gzip, zstd', ('zstd', 'gzip')) == 'zstd'
+        assert negotiate_encoding('gzip, zstd;q=0.5', ('zstd', 'gzip')) == 'gzip'
+        assert negotiate_encoding('*', ('zstd', 'gzip')) == 'zstd'
+        assert negotiate_encoding('gzip;q=0, br', ('zstd', 'gzip')) is None
+        assert negotiate_encoding('', ('zstd', 'gzip')) is None
+
+    def test_gzip(self):
+        response = self.process(HttpResponse(CONTENT))
+
+        assert response['Content-Encoding'] == 'gzip'
+        assert response['Vary'] == 'Accept-Encoding'
+        assert int(response['Content-Length']) == len(response.content) < len(CONTENT)
+        assert gzip.decompress(response.content) == CONTENT
+
+    def test_not_compressed(self):
+        # Too small.
+        response = self.process(HttpResponse(b'[]'))
+        assert not response.has_header('Content-Encoding')
+        assert response['Vary'] == 'Accept-Encoding'
+
+        # Not accepted by the client.
+        response = self.process(HttpResponse(CONTENT), accept_encoding='identity')
+        assert not response.has_header('Content-Encoding')
+        assert response.content == CONTENT
+
+        with self.settings(ZEN_COMPRESSION=False):
+            response = self.process(HttpResponse(CONTENT))
+            assert not response.has_header('Content-Encoding')
+
+    def test_streaming(self):
+        chunks = [b'{"row": 1}\n', b'{"row": 2}\n', b'{"row": 3}\n']
+        response = self.process(StreamingHttpResponse(iter(chunks)))
+        assert response['Content-Encoding'] == 'gzip'
+
+        # Every chunk can be decompressed as soon as it arrives.
+        decompressor = zlib.decompressobj(wbits=31)
+        compressed = iter(response.streaming_content)
+        for chunk in chunks:
+            assert decompressor.decompress(next(compressed)) == chunk
+        decompressor.decompress(b''.join(compressed))
+        assert decompressor.eof
+
+    @unittest.skipUnless(HAS_ZSTD, 'zstandard is not installed')
+    def test_zstd(self):
+        import zstandard  # pylint: disable=C0415
+
+        response = self.process(HttpResponse(CONTENT), accept_encoding='zstd, gzip')
+
+        assert response['Content-Encoding'] == 'zstd'
+        assert zstandard.ZstdDecompressor().decompress(response.content) == CONTENT
@@ -0,0 +1,124 @@
+# pylint: disable=C0114
+import time
+from unittest import mock
+
+from celery.exceptions import Retry
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.core.concurrency import (DatabaseBusyError,
+                                   LocalSlots,
+                                   database_slot,
+                                   get_queue,
+                                   get_queues)
+from apps.core.tasks import run_query
+from apps.core.tests.factories import QueryZenFactory
+from queryzen_api.celery import app
+
+
+@override_settings(ZEN_CONCURRENCY_BACKEND='apps.core.concurrency.LocalSlots',
+                   ZEN_DATABASE_CONCURRENCY={'default': 2})
+class SlotsTestCase(SimpleTestCase):
+    """Tests for the limits of concurrent queries of the databases"""
+
+    def setUp(self):
+        self.addCleanup(LocalSlots._leases.clear)  # pylint: disable=W0212
+
+    def test_acquire(self):
+        slots = LocalSlots()
+        first = slots.acquire('default', limit=2, lease=60)
+        assert slots.acquire('default', limit=2, lease=60)
+        assert slots.acquire('default', limit=2, lease=60) is None
+        assert slots.acquire('other', limit=2, lease=60)
+
+        slots.release('default', first)
+        assert slots.acquire('default', limit=2, lease=60)
+
+    def test_lease_expires(self):
+        slots = LocalSlots()
+        assert slots.acquire('default', limit=1, lease=0.01)
+        time.sleep(0.02)
+        assert slots.acquire('default', limit=1, lease=60)
+
+    def test_database_slot(self):
+        with database_slot('default', lease=60), database_slot('default', lease=60):
+            with self.assertRaises(DatabaseBusyError):
+                with database_slot('default', lease=60):
+                    pass
+
+            # Not limited.
+            with database_slot('crate', lease=60):
+                pass
+
+        # The slots are freed.
+        with database_slot('default', lease=60), database_slot('default', lease=60):
+            pass
+
+    def test_queues(self):
+        assert get_queue('crate', 'batch') == 'queryzen.crate.batch'
+        assert set(get_queues()) <= {queue.name for queue in app.conf.task_queues}
+
+
+@override_settings(ZEN_CONCURRENCY_BACKEND='apps.core.concurrency.LocalSlots',
+                   ZEN_DATABASE_CONCURRENCY={'default': 1},
+                   ZEN_CANCEL_BACKEND='apps.core.cancellation.LocalCancellations')
+class LanesTestCase(TestCase):
+    """Tests for running Zens in the queues of their database and lane"""
+
+    def setUp(self):
+        self.addCleanup(LocalSlots._leases.clear)  # pylint: disable=W0212
+        task_always_eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, 'task_always_eager', task_always_eager)
+
+        self.zen = QueryZenFactory.create(name='lanes', query='select 1')
+        self.url = f'/collection/{self.zen.collection}/zen/{self.zen.name}/version/1/'
+
+    def submit(self, **data):
+        with mock.patch('apps.core.views.run_query') as task:
+            task.apply_async.return_value = mock.Mock(id='123', status='PENDING')
+            response = self.client.post(f'{self.url}submit/',
+                                        {'parameters': {}, 'version': 1, 'database': 'default',
+                                         **data},
+                                        content_type='application/json')
+        assert response.status_code == 202, response.data
+        return task.apply_async.call_args.kwargs['queue']
+
+    def test_lanes(self):
+        assert self.submit() == 'queryzen.default.interactive'
+        assert self.submit(lane='batch') == 'queryzen.default.batch'
+
+        self.zen.lane = 'batch'
+        self.zen.save()
+        assert self.submit() == 'queryzen.default.batch'
+        assert self.submit(lane='interactive') == 'queryzen.default.interactive'
+
+        response = self.client.post(self.url,
+                                    {'parameters': {}, 'version': 1, 'database': 'default',
+                                     'lane': 'urgent'},
+                                    content_type='application/json')
+        assert response.status_code == 400
+
+    def test_create_with_lane(self):
+        response = self.client.put('/collection/main/zen/batchy/version/latest/',
+                                   {'query': 'select 1', 'lane': 'batch'},
+                                   content_type='application/json')
+        assert response.status_code == 200
+        assert response.data['lane'] == 'batch'
+
+        response = self.client.put('/collection/main/zen/batchy/version/latest/',
+                                   {'query': 'select 1', 'lane': 'urgent'},
+                                   content_type='application/json')
+        assert response.status_code == 400
+
+    def test_busy_database_is_retried(self):
+        with database_slot('default', lease=60), \
+                mock.patch.object(run_query, 'retry', side_effect=Retry) as retry:
+            run_query.apply(('default', self.zen.pk))
+
+        retry.assert_called_once()
+        assert retry.call_args.kwargs['max_retries'] is None
+        assert not self.zen.executions.exists()
+
+        result = run_query.apply(('default', self.zen.pk)).get()
+        assert result['rows'] == [(1,)]
@@ -0,0 +1,279 @@
+# pylint: disable=C0114
+import datetime
+import json
+import os
+import threading
+from unittest import mock
+
+import httpx
+
+from django.test import SimpleTestCase
+
+from databases.base import (CrateDatabase,
+                            Database,
+                            DatabaseError,
+                            PostgresDatabase,
+                            SQLiteDatabase)
+from databases.control import QueryControl, QueryTimeoutError
+from databases.pool import PooledConnection
+from databases.template import QueryTemplate
+
+
+class QueryTemplateTestCase(SimpleTestCase):
+    """Tests for the compiled query templates"""
+
+    def test_tokenizer(self):
+        template = QueryTemplate('select :a::int, \'10:30\', "b:c", $$:d$$ -- :e\n'
+                                 '/* :f */ from t where x = :g and y = IDENT(:h)')
+
+        assert template.parameters == {'a', 'g', 'h'}
+        assert template.render({'a': 1, 'g': "it's", 'h': 'col'}) == \
+               ('select 1::int, \'10:30\', "b:c", $$:d$$ -- :e\n'
+                '/* :f */ from t where x = \'it\'\'s\' and y = "col"')
+
+    def test_paramstyles(self):
+        template = QueryTemplate("select :a, :b, :a, 1::int, '100%'")
+        parameters = {'a': 1, 'b': 2}
+
+        assert template.bind(parameters, 'named') == \
+               ("select :a, :b, :a, 1::int, '100%'", parameters)
+        assert template.bind(parameters, 'pyformat') == \
+               ("select %(a)s, %(b)s, %(a)s, 1::int, '100%%'", parameters)
+        assert template.bind(parameters, 'qmark') == \
+               ("select ?, ?, ?, 1::int, '100%'", [1, 2, 1])
+        assert template.bind(parameters, 'numeric') == \
+               ("select $1, $2, $1, 1::int, '100%'", [1, 2])
+
+    def test_sqlite_bound_parameters(self):
+        database = SQLiteDatabase(':memory:')
+        value = "x' OR '1'='1"
+
+        result = database.execute_query('select :value as :alias, IDENT(:col)'
+                                        ' from (select 1 as "a""b")',
+                                        {'value': value, 'alias': 'v', 'col': 'a"b'})
+
+        assert result.columns == ['v', 'a"b']
+        assert result.rows == [(value, 1)]
+        # The query of the execution keeps the values, for display.
+        assert "'x'' OR ''1''=''1'" in result.query
+
+    def test_sqlite_parameter_sets(self):
+        database = SQLiteDatabase(':memory:')
+
+        result = database.execute_query_many('select :a as a, :a * 2 as b union all select 0, 0',
+                                             [{'a': 1}, {'a': 2}])
+        assert result.columns == ['parameter_set', 'a', 'b']
+        assert result.rows == [[0, 1, 2], [0, 0, 0], [1, 2, 4], [1, 0, 0]]
+        assert result.row_count == 4
+
+        result = database.execute_query_many('select IDENT(:col) from (select 1 as x, 2 as y)',
+                                             [{'col': 'x'}, {'col': 'y'}])
+        assert result.rows == [[0, 1], [1, 2]]
+
+    def test_sqlite_parameter_sets_without_result(self):
+        database = SQLiteDatabase(':memory:')
+        database.execute_query('create table t (a int)', {})
+
+        # Statements without result are run with executemany.
+        result = database.execute_query_many('insert into t values (:a)',
+                                             [{'a': i} for i in range(5)])
+        assert not result.rows and not result.columns
+
+        assert database.execute_query('select sum(a) from t', {}).rows == [(10,)]
+
+    def test_sqlite_pages(self):
+        database = SQLiteDatabase(':memory:')
+        query = ('WITH RECURSIVE c(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM c WHERE n < :n)'
+                 ' SELECT n FROM c')
+
+        first = database.execute_query_page(query, {'n': 5}, offset=0, limit=2)
+        assert first.columns == ['n']
+        assert first.rows == [(1,), (2,)]
+        assert first.next_offset == 2
+
+        last = database.execute_query_page(query, {'n': 5}, offset=4, limit=2)
+        assert last.rows == [(5,)]
+        assert last.next_offset is None
+        assert last.query == query.replace(':n', '5')
+
+    def test_default_pages(self):
+        class ListDatabase(Database):
+            def run_query(self, context, query):
+                return SQLiteDatabase(':memory:').run_query(context, query)
+
+        result = ListDatabase().execute_query_page('select 1 union all select 2', {}, 1, 1)
+        assert result.rows == [(2,)]
+        assert result.next_offset is None
+
+
+class CrateDatabaseTestCase(SimpleTestCase):
+    """Tests for the CrateDB driver, with a mocked http server"""
+
+    def setUp(self):
+        self.requests = []
+        self.responses = {}
+        self.database = CrateDatabase()
+        # pylint: disable=W0212
+        self.database._client = httpx.Client(base_url=self.database.url,
+                                             transport=httpx.MockTransport(self.handle))
+        self.database._client_pid = os.getpid()
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        self.requests.append(payload)
+        for prefix, respond in self.responses.items():
+            if prefix in payload['stmt']:
+                return respond(payload)
+        return httpx.Response(200, json={'cols': ['n'], 'rows': [[1]], 'rowcount': 1})
+
+    def test_kill(self):
+        killed = threading.Event()
+
+        def run(payload):
+            # The job runs until it is killed.
+            assert payload['args'] == [1]
+            assert killed.wait(5)
+            return httpx.Response(400, json={'error': {'message': 'Job killed'}})
+
+        def find_job(payload):
+            # Other runs of the Zen are running too.
+            return httpx.Response(200, json={'rows': [['job']] if payload['args'] == [
+                self.requests[0]['stmt']] else []})
+
+        def kill(payload):
+            if payload['args'] == ['job']:
+                killed.set()
+            return httpx.Response(200, json={'rowcount': 1})
+
+        self.responses = {'sys.jobs': find_job, 'KILL': kill, 'select': run}
+        with self.assertRaises(QueryTimeoutError):
+            self.database.execute_query('select :n', {'n': 1}, QueryControl(timeout=0.1))
+
+        stmt = self.requests[0]['stmt']
+        assert stmt.startswith('/* queryzen:') and stmt.endswith('*/ select ?')
+        # Only the job of this run is killed.
+        assert self.requests[-1] == {'stmt': 'KILL ?', 'args': ['job']}
+
+        # Every run has its own statement.
+        self.responses = {}
+        self.database.execute_query('select :n', {'n': 1}, QueryControl(timeout=1))
+        assert self.requests[-1]['stmt'] != stmt
+
+        # Statements that cannot be stopped are not marked.
+        self.database.execute_query('select :n', {'n': 1})
+        assert self.requests[-1] == {'stmt': 'select ?', 'args': [1]}
+
+    def test_pages(self):
+        self.responses = {'LIMIT': lambda payload: httpx.Response(
+            200, json={'cols': ['n'], 'rows': [[1], [2], [3]], 'rowcount': 3}
+        )}
+
+        result = self.database.execute_query_page('select n from t where n > :n;', {'n': 0},
+                                                  offset=4, limit=2)
+        assert self.requests[-1] == {'stmt': 'SELECT * FROM (select n from t where n > ?)'
+                                             ' AS queryzen_page LIMIT ? OFFSET ?',
+                                     'args': [0, 3, 4]}
+        assert result.rows == [[1], [2]]
+        assert result.next_offset == 6
+
+    def test_bulk_args(self):
+        rowcounts = [1, 1]
+
+        def insert(payload):
+            if 'bulk_args' in payload:
+                return httpx.Response(200, json={'results': [{'rowcount': rowcount}
+                                                             for rowcount in rowcounts]})
+            return httpx.Response(200, json={'cols': [], 'rows': [], 'rowcount': 1})
+
+        self.responses = {'insert': insert}
+        self.database.execute_query_many('insert into t values (:a)',
+                                         [{'a': i} for i in range(3)])
+        # The first set is run alone, the others at once.
+        assert self.requests[-1] == {'stmt': 'insert into t values (?)',
+                                     'bulk_args': [[1], [2]]}
+
+        # Failed operations have a row count of -2.
+        rowcounts[1] = -2
+        with self.assertRaisesRegex(DatabaseError, r'parameter sets \[2\]'):
+            self.database.execute_query_many('insert into t values (:a)',
+                                             [{'a': i} for i in range(3)])
+
+
+class PostgresDatabaseTestCase(SimpleTestCase):
+    """Tests for the Postgres driver, with a mocked cursor"""
+
+    def setUp(self):
+        psycopg2 = mock.Mock(ProgrammingError=type('ProgrammingError', (Exception,), {}),
+                             DataError=type('DataError', (Exception,), {}))
+        with mock.patch.dict('sys.modules', psycopg2=psycopg2):
+            self.database = PostgresDatabase('db', 'user', 'password', 'localhost', 5432)
+        self.psycopg2 = psycopg2
+        self.pooled = PooledConnection(connection=mock.Mock())
+        self.cursor = mock.Mock()
+
+    def statements(self) -> list:
+        statements = [call.args[0] for call in self.cursor.execute.call_args_list]
+        self.cursor.reset_mock()
+        return statements
+
+    def test_prepared_statements(self):
+        self.database.execute(self.pooled, self.cursor, 'select :a + :b', {'a': 1, 'b': 2})
+        statements = self.statements()
+        name = statements[1].split()[1]
+        assert statements == ['SAVEPOINT queryzen_prepare',
+                              f'PREPARE {name} (bigint, bigint) AS select $1 + $2',
+                              'RELEASE SAVEPOINT queryzen_prepare',
+                              f'EXECUTE {name} (%s, %s)']
+
+        # It is only prepared once.
+        self.database.execute(self.pooled, self.cursor, 'select :a + :b', {'a': 1, 'b': 2})
+        self.cursor.execute.assert_called_once_with(f'EXECUTE {name} (%s, %s)', [1, 2])
+        self.cursor.reset_mock()
+
+        # Parameters are declared with the types of their values.
+        self.database.execute(self.pooled, self.cursor, 'select :a + :b', {'a': 'x', 'b': 1.5})
+        statements = self.statements()
+        assert statements[0] == 'SAVEPOINT queryzen_prepare'
+        assert statements[1].endswith(' (text, double precision) AS select $1 + $2')
+        assert statements[2] == 'RELEASE SAVEPOINT queryzen_prepare'
+        assert statements[1].split()[1] != name
+
+        aware = datetime.datetime.now(datetime.UTC)
+        assert self.database.parameter_type(aware) == 'timestamptz'
+        assert self.database.parameter_type(True) == 'boolean'
+
+        # Values without type and statements without parameters are not prepared.
+        self.database.execute(self.pooled, self.cursor, 'select :a', {'a': None})
+        self.database.execute(self.pooled, self.cursor, 'select 1', {})
+        assert self.statements() == ['select %(a)s', 'select 1']
+
+    def test_rejected_statement(self):
+        def execute(sql, *args):  # pylint: disable=W0613
+            if sql.startswith('PREPARE'):
+                raise self.psycopg2.ProgrammingError('operator does not exist: date > text')
+
+        self.cursor.execute.side_effect = execute
+        query = 'select * from t where day > :day'
+
+        self.database.execute(self.pooled, self.cursor, query, {'day': '2020-01-01'})
+        statements = self.statements()
+        assert statements[0] == 'SAVEPOINT queryzen_prepare'
+        assert statements[2:] == ['ROLLBACK TO SAVEPOINT queryzen_prepare',
+                                  'select * from t where day > %(day)s']
+
+        # It is not prepared again.
+        self.database.execute(self.pooled, self.cursor, query, {'day': '2020-01-02'})
+        assert self.statements() == ['select * from t where day > %(day)s']
+
+    def test_guard_timeout(self):
+        connection = mock.Mock()
+        with self.database.guard(connection, self.cursor, QueryControl(timeout=60)):
+            pass
+        statement, = self.statements()
+        assert statement.startswith('SET LOCAL statement_timeout = ')
+        assert 59_000 < int(statement.rsplit(' ', 1)[1]) <= 60_000
+
+        # Without timeout the one of the database is kept.
+        with self.database.guard(connection, self.cursor, QueryControl()):
+            pass
+        assert not self.statements()
@@ -0,0 +1,70 @@
+# pylint: disable=C0114
+import datetime
+
+from django.test import TestCase
+
+from apps.core.models import Execution
+from apps.core.tests.factories import QueryZenFactory
+
+
+class ExecutionsTestCase(TestCase):
+    """Tests for paginated executions and sparse fieldsets of Zens"""
+
+    def setUp(self):
+        self.zen = QueryZenFactory.create(name='executions', query='select 1')
+        self.url = f'/collection/{self.zen.collection}/zen/{self.zen.name}/version/1/'
+        for i in range(5):
+            Execution.objects.create(zen=self.zen,
+                                     state=Execution.State.VALID,
+                                     finished_at=datetime.datetime.now(datetime.UTC),
+                                     total_time=i,
+                                     query='select 1',
+                                     error='',
+                                     row_count=1,
+                                     parameters='{}')
+
+    def test_paginated_executions(self):
+        response = self.client.get(f'{self.url}executions/', {'page_size': 2})
+        total_times = [execution['total_time'] for execution in response.data['results']]
+
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            total_times += [execution['total_time'] for execution in response.data['results']]
+
+        assert total_times == [0, 1, 2, 3, 4]
+
+    def test_executions_of_unknown_zen(self):
+        response = self.client.get('/collection/main/zen/unknown/version/1/executions/')
+        assert response.status_code == 404
+
+    def test_get_without_executions(self):
+        response = self.client.get(self.url)
+        assert 'executions' not in response.data
+
+        response = self.client.get(self.url, {'expand': 'executions'})
+        assert len(response.data['executions']) == 5
+
+        response = self.client.get(self.url, {'fields': 'name,version'})
+        assert response.data == {'name': 'executions', 'version': 1}
+
+    def test_list_queries(self):
+        for i in range(3):
+            QueryZenFactory.create(name=f'zen{i}', query='select 1')
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/zen/', {'expand': 'executions'})
+        assert len(response.data['results']) == 4
+
+    def test_list_pagination(self):
+        for i in range(3):
+            QueryZenFactory.create(name=f'zen{i}', query='select 1')
+
+        # Filtering by executions does not return duplicates.
+        response = self.client.get('/zen/', {'page_size': 3, 'executions__state': 'VA'})
+        assert [zen['name'] for zen in response.data['results']] == ['executions']
+
+        response = self.client.get('/zen/', {'page_size': 3})
+        assert [zen['name'] for zen in response.data['results']] == ['executions', 'zen0', 'zen1']
+        response = self.client.get(response.data['next'])
+        assert [zen['name'] for zen in response.data['results']] == ['zen2']
+        assert response.data['next'] is None
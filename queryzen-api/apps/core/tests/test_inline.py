@@ -0,0 +1,86 @@
+# pylint: disable=C0114
+import concurrent.futures
+import time
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+
+from apps.core.concurrency import LocalSlots, database_slot
+from apps.core.models import Execution
+from apps.core.tests.factories import QueryZenFactory
+from apps.core.tests.test_cancellation import ENDLESS_QUERY
+
+
+# Inline runs save their executions in other threads, with other connections, so the data of the
+# tests has to be committed.
+@override_settings(ZEN_INLINE_DATABASES=['default'],
+                   ZEN_COALESCE=False,
+                   ZEN_CONCURRENCY_BACKEND='apps.core.concurrency.LocalSlots')
+class InlineTestCase(TransactionTestCase):
+    """Tests for runs of Zens in the API process"""
+
+    def setUp(self):
+        self.addCleanup(LocalSlots._leases.clear)  # pylint: disable=W0212
+        # One thread, so the tests can wait for the runs to finish.
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(self.executor.shutdown)
+        patcher = mock.patch('apps.core.inline.get_executor', return_value=self.executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch('apps.core.views.run_query')
+        self.run_query = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.run_query.app.conf.task_always_eager = False
+        self.run_query.apply_async.return_value.get.return_value = {'rows': [[2]]}
+
+    def run_zen(self, zen, **data):
+        return self.client.post(f'/collection/{zen.collection}/zen/{zen.name}/version/1/',
+                                {'parameters': {}, 'version': 1, 'database': 'default', **data},
+                                content_type='application/json')
+
+    def test_run(self):
+        zen = QueryZenFactory.create(name='fast', query='select 1')
+
+        response = self.run_zen(zen)
+
+        assert response.status_code == 200
+        assert response.json()['rows'] == [[1]]
+        self.run_query.apply_async.assert_not_called()
+        # The execution is recorded like the ones of the workers.
+        execution = Execution.objects.get()
+        assert execution.state == Execution.State.VALID
+        assert zen.statistics.count == 1
+
+    def test_zen_overrides_database(self):
+        zen = QueryZenFactory.create(name='heavy', query='select 1', inline=False)
+        assert self.run_zen(zen).json()['rows'] == [[2]]
+        self.run_query.apply_async.assert_called_once()
+
+        zen = QueryZenFactory.create(name='light', query='select 1', inline=True)
+        with self.settings(ZEN_INLINE_DATABASES=[]):
+            assert self.run_zen(zen).json()['rows'] == [[1]]
+        self.run_query.apply_async.assert_called_once()
+
+    def test_timeout(self):
+        zen = QueryZenFactory.create(name='endless', query=ENDLESS_QUERY)
+
+        start = time.monotonic()
+        response = self.run_zen(zen, timeout=0.2)
+
+        assert response.status_code == 408
+        assert time.monotonic() - start < 5
+        # The query is stopped and its execution recorded.
+        self.executor.shutdown()
+        assert Execution.objects.get().state == Execution.State.TIMEOUT
+
+    @override_settings(ZEN_DATABASE_CONCURRENCY={'default': 1})
+    def test_busy_database(self):
+        zen = QueryZenFactory.create(name='fast', query='select 1')
+
+        # The workers wait for a free slot.
+        with database_slot('default', lease=60):
+            assert self.run_zen(zen).json()['rows'] == [[2]]
+        self.run_query.apply_async.assert_called_once()
+
+        assert self.run_zen(zen).json()['rows'] == [[1]]
@@ -0,0 +1,71 @@
+# pylint: disable=C0114
+from django.test import TestCase
+
+from apps.core.models import Execution
+from apps.core.pagination import make_page_token
+from apps.core.tests.factories import QueryZenFactory
+from queryzen_api.celery import app
+
+
+class ResultPaginationTestCase(TestCase):
+    """Tests for fetching the result of a Zen in pages"""
+
+    def setUp(self):
+        task_always_eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, 'task_always_eager', task_always_eager)
+
+        query = ('WITH RECURSIVE c(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM c WHERE n < :n)'
+                 ' SELECT n FROM c')
+        self.zen = QueryZenFactory.create(name='pages', query=query)
+        self.url = f'/collection/main/zen/{self.zen.name}/version/1/'
+
+    def run_zen(self, **data):
+        return self.client.post(self.url,
+                                {'parameters': {}, 'version': 1, 'database': 'default', **data},
+                                content_type='application/json')
+
+    def test_pages(self):
+        response = self.run_zen(parameters={'n': 5}, limit=2)
+        assert response.status_code == 200
+        assert response.json()['rows'] == [[1], [2]]
+
+        rows = response.json()['rows']
+        while token := response.json()['next_page_token']:
+            # The parameters are in the token.
+            response = self.run_zen(page_token=token)
+            assert response.status_code == 200
+            rows.extend(response.json()['rows'])
+
+        assert rows == [[n] for n in range(1, 6)]
+        assert Execution.objects.filter(zen=self.zen).count() == 3
+
+        # The limit can change between pages.
+        response = self.run_zen(parameters={'n': 5}, limit=1)
+        response = self.run_zen(page_token=response.json()['next_page_token'], limit=10)
+        assert response.json()['rows'] == [[n] for n in range(2, 6)]
+        assert response.json()['next_page_token'] is None
+
+    def test_invalid_token(self):
+        token = self.run_zen(parameters={'n': 5}, limit=2).json()['next_page_token']
+
+        response = self.run_zen(page_token=token[:-2])
+        assert response.status_code == 400
+        assert 'page_token' in response.data
+
+        other = QueryZenFactory.create(name='other', query=self.zen.query)
+        response = self.run_zen(page_token=make_page_token(other.pk, 'default', {'n': 5}, 2, 2))
+        assert response.status_code == 400
+
+        with self.settings(ZEN_PAGE_TOKEN_TTL=-1):
+            assert self.run_zen(page_token=token).status_code == 400
+
+    def test_not_paginated(self):
+        response = self.run_zen(parameter_sets=[{'n': 1}], limit=2)
+        assert response.status_code == 400
+
+        response = self.client.post(f'{self.url}stream/',
+                                    {'parameters': {'n': 1}, 'version': 1,
+                                     'database': 'default', 'limit': 2},
+                                    content_type='application/json')
+        assert response.status_code == 400
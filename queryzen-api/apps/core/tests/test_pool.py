@@ -0,0 +1,72 @@
+# pylint: disable=C0114
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from databases.base import SQLiteDatabase
+from databases.pool import ConnectionPool, PoolOptions, PoolTimeoutError
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    """Tests for the connection pool of the Database drivers"""
+
+    def make_pool(self, **options) -> ConnectionPool:
+        self.connections = []
+
+        def connect():
+            self.connections.append(mock.Mock())
+            return self.connections[-1]
+
+        return ConnectionPool(connect=connect,
+                              close=lambda c: c.close(),
+                              check=lambda c: c.healthy,
+                              options=PoolOptions(**options))
+
+    def test_reuses_connections(self):
+        pool = self.make_pool(min_size=2)
+
+        with pool.connection() as first:
+            with pool.connection() as second:
+                assert first is not second
+
+        with pool.connection():
+            pass
+
+        assert len(self.connections) == 2
+
+    def test_max_size(self):
+        pool = self.make_pool(max_size=1, timeout=0.01)
+
+        with pool.connection():
+            with self.assertRaises(PoolTimeoutError):
+                with pool.connection():
+                    pass
+
+    def test_max_lifetime(self):
+        pool = self.make_pool(max_lifetime=0)
+
+        with pool.connection():
+            pass
+
+        self.connections[0].close.assert_called_once()
+        with pool.connection() as pooled:
+            assert pooled.connection is self.connections[1]
+
+    def test_health_check(self):
+        pool = self.make_pool(check_after=0)
+
+        with pool.connection():
+            pass
+        self.connections[0].healthy = False
+
+        with pool.connection() as pooled:
+            assert pooled.connection is self.connections[1]
+        self.connections[0].close.assert_called_once()
+
+    def test_pool_per_process(self):
+        database = SQLiteDatabase(':memory:')
+        pool = database.pool
+        assert database.pool is pool
+
+        with mock.patch('databases.base.os.getpid', return_value=-1):
+            assert database.pool is not pool
@@ -0,0 +1,101 @@
+# pylint: disable=C0114
+import datetime
+import re
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.models import Execution
+from apps.core.tests.factories import QueryZenFactory
+from queryzen_api.celery import app
+
+# Tables that grow with usage, they must never be fully scanned.
+GROWING_TABLES = ('core_zen', 'core_execution', 'core_zenstatistics')
+FULL_SCAN = re.compile(r'\bSCAN (' + '|'.join(GROWING_TABLES) + r')\b(?! USING)')
+
+
+class QueryBudgetTestCase(TestCase):
+    """Tests the number of queries of every endpoint, and that their queries use indexes, so
+    read paths do not get slower as the metadata tables grow.
+
+    Query plans are checked with sqlite's EXPLAIN QUERY PLAN."""
+
+    def setUp(self):
+        self.zen = QueryZenFactory.create(name='budget', query='select :n')
+        self.url = f'/collection/{self.zen.collection}/zen/{self.zen.name}/version/1/'
+        for i in range(3):
+            QueryZenFactory.create(name=f'other{i}', query='select 1')
+            Execution.objects.create(zen=self.zen,
+                                     state=Execution.State.VALID,
+                                     finished_at=datetime.datetime.now(datetime.UTC),
+                                     total_time=i,
+                                     query='select 1',
+                                     error='',
+                                     row_count=1,
+                                     parameters='{}')
+
+    def assert_budget(self, budget: int, method: str, url: str, data=None, **kwargs):
+        """Asserts that a request runs at most ``budget`` queries and that none of them fully
+        scans a growing table."""
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data, **kwargs)
+
+        sqls = [query['sql'] for query in context.captured_queries]
+        assert response.status_code < 400, response.content
+        assert len(sqls) <= budget, f'{len(sqls)} queries, budget is {budget}: {sqls}'
+
+        for sql in sqls:
+            if not sql.startswith('SELECT'):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = '\n'.join(row[-1] for row in cursor.fetchall())
+            assert not FULL_SCAN.search(plan), f'{sql}\n{plan}'
+        return response
+
+    def test_list(self):
+        self.assert_budget(1, 'get', '/zen/')
+        self.assert_budget(1, 'get', '/zen/', {'collection': 'main', 'name': 'budget'})
+        self.assert_budget(1, 'get', '/zen/', {'state': 'VA'})
+        self.assert_budget(1, 'get', '/zen/', {'executions__state': 'IN'})
+        self.assert_budget(2, 'get', '/zen/', {'expand': 'executions', 'name': 'budget'})
+
+    def test_get(self):
+        self.assert_budget(1, 'get', self.url)
+        self.assert_budget(1, 'get', self.url.replace('/1/', '/latest/'))
+
+    def test_executions(self):
+        response = self.assert_budget(2, 'get', f'{self.url}executions/', {'page_size': 2})
+        self.assert_budget(2, 'get', response.data['next'])
+        self.assert_budget(2, 'get', f'{self.url}executions/', {'state': 'IN'})
+
+    def test_stats(self):
+        self.assert_budget(1, 'get', f'{self.url}stats/')
+        self.assert_budget(2, 'get', f'{self.url}stats/series/')
+
+    def test_create(self):
+        self.assert_budget(5, 'put', self.url.replace('/1/', '/latest/'),
+                           {'query': 'select 2', 'version': 'latest'},
+                           content_type='application/json')
+
+    def test_run(self):
+        task_always_eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        try:
+            self.assert_budget(10, 'post', self.url,
+                               {'parameters': {'n': 1}, 'version': 1, 'database': 'default'},
+                               content_type='application/json')
+        finally:
+            app.conf.task_always_eager = task_always_eager
+
+    def test_submit(self):
+        with mock.patch('apps.core.views.run_query') as run_query:
+            run_query.apply_async.return_value = mock.Mock(id='123', status='PENDING')
+            self.assert_budget(1, 'post', f'{self.url}submit/',
+                               {'parameters': {'n': 1}, 'version': 1, 'database': 'default'},
+                               content_type='application/json')
+
+    def test_delete(self):
+        self.assert_budget(4, 'delete', self.url)
@@ -0,0 +1,53 @@
+# pylint: disable=C0114
+import json
+import unittest
+
+from django.test import TestCase
+
+from apps.core.renderers import ARROW_METADATA_KEY, ArrowRenderer, RESULT_RENDERERS
+from apps.core.tests.factories import QueryZenFactory
+from queryzen_api.celery import app
+
+HAS_ARROW = ArrowRenderer in RESULT_RENDERERS
+
+
+class ArrowRendererTestCase(TestCase):
+    """Tests for the Arrow format of results"""
+
+    def setUp(self):
+        self.zen = QueryZenFactory.create(name='arrow', query='select :value as a, 2.5 as b')
+        self.url = f'/collection/{self.zen.collection}/zen/{self.zen.name}/version/1/'
+
+        task_always_eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, 'task_always_eager', task_always_eager)
+
+    def run_zen(self, parameters: dict):
+        return self.client.post(self.url,
+                                {'parameters': parameters, 'version': 1, 'database': 'default'},
+                                content_type='application/json',
+                                headers={'Accept': ArrowRenderer.media_type})
+
+    @unittest.skipUnless(HAS_ARROW, 'pyarrow is not installed')
+    def test_arrow_result(self):
+        import pyarrow  # pylint: disable=C0415
+
+        response = self.run_zen({'value': 1})
+        assert response.status_code == 200
+        assert response['Content-Type'] == ArrowRenderer.media_type
+
+        table = pyarrow.ipc.open_stream(response.content).read_all()
+        assert table.column_names == ['a', 'b']
+        assert table.to_pydict() == {'a': [1], 'b': [2.5]}
+
+        metadata = json.loads(table.schema.metadata[ARROW_METADATA_KEY])
+        assert metadata['state'] == 'VA'
+        assert metadata['row_count'] == 1
+
+    @unittest.skipIf(HAS_ARROW, 'pyarrow is installed')
+    def test_not_acceptable_without_pyarrow(self):
+        assert self.run_zen({'value': 1}).status_code == 406
+
+    def test_errors_are_json(self):
+        content = ArrowRenderer().render({'detail': 'error'})
+        assert json.loads(content) == {'detail': 'error'}
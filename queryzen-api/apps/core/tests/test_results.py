@@ -0,0 +1,121 @@
+# pylint: disable=C0114
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.core.results import (FileSystemResultStore,
+                               ResultNotFoundError,
+                               RESULT_REF,
+                               load_result,
+                               spill_result)
+from apps.core.tasks import run_query
+from apps.core.tests.factories import QueryZenFactory
+from queryzen_api.celery import app
+
+
+class ResultStoreTestCase(SimpleTestCase):
+    """Tests for the file system result store"""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = tmp_dir.name
+
+    def test_write_read(self):
+        for compress in (True, False):
+            store = FileSystemResultStore(self.path, compress=compress)
+            store.write('key', (f'[{i}]\n'.encode() for i in range(10)))
+
+            assert list(store.read('key'))[:2] == [b'[0]\n', b'[1]\n']
+            assert store.read_rows('key') == [[i] for i in range(10)]
+            assert store.read_rows('key', offset=8) == [[8], [9]]
+            assert store.read_rows('key', offset=2, limit=3) == [[2], [3], [4]]
+
+            store.delete('key')
+            with self.assertRaises(ResultNotFoundError):
+                store.read('key')
+
+    def test_invalid_key(self):
+        store = FileSystemResultStore(self.path)
+        with self.assertRaises(ValueError):
+            store.read('../key')
+
+    def test_delete_expired(self):
+        store = FileSystemResultStore(self.path)
+        store.write('old', [b'[1]\n'])
+        store.write('new', [b'[1]\n'])
+        old = time.time() - 120
+        os.utime(os.path.join(self.path, 'old.jsonl.gz'), (old, old))
+
+        assert store.delete_expired(ttl=60) == 1
+        assert store.read_rows('new') == [[1]]
+        with self.assertRaises(ResultNotFoundError):
+            store.read('old')
+
+    def test_spill_result(self):
+        result = {'id': 'abc', 'columns': ['a'], 'rows': [[i] for i in range(100)]}
+
+        with self.settings(ZEN_RESULT_STORE_PATH=self.path, ZEN_RESULT_SPILL_SIZE=10_000):
+            assert spill_result(result) is result
+
+        # Spilling is disabled.
+        with self.settings(ZEN_RESULT_STORE_PATH=self.path, ZEN_RESULT_SPILL_SIZE=0):
+            assert spill_result(result) is result
+
+        with self.settings(ZEN_RESULT_STORE_PATH=self.path, ZEN_RESULT_SPILL_SIZE=100):
+            spilled = spill_result(result)
+            assert spilled == {'id': 'abc', 'columns': ['a'], RESULT_REF: 'abc'}
+
+            assert load_result(spilled) == result
+            assert load_result(spilled, offset=98)['rows'] == [[98], [99]]
+            assert load_result(result, offset=1, limit=1)['rows'] == [[1]]
+
+
+class SpilledResultTestCase(TestCase):
+    """Tests running Zens whose results are spilled to the result store"""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+        self.addCleanup(tmp_dir.cleanup)
+        settings = override_settings(ZEN_RESULT_STORE_PATH=tmp_dir.name, ZEN_RESULT_SPILL_SIZE=10)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        task_always_eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, 'task_always_eager', task_always_eager)
+
+        query = ('WITH RECURSIVE c(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM c WHERE n < 50)'
+                 ' SELECT n FROM c')
+        self.zen = QueryZenFactory.create(name='spill', query=query)
+
+    def test_run(self):
+        result = run_query.apply(args=('default', self.zen.pk)).get()
+        assert 'rows' not in result
+        assert result['row_count'] == 50
+
+        response = self.client.post(f'/collection/main/zen/{self.zen.name}/version/1/',
+                                    {'parameters': {}, 'version': 1, 'database': 'default'},
+                                    content_type='application/json')
+        assert response.status_code == 200
+        assert response.data['rows'] == [[n] for n in range(1, 51)]
+        assert RESULT_REF not in response.data
+
+    def test_execution_result(self):
+        result = run_query.apply(args=('default', self.zen.pk)).get()
+
+        with mock.patch('apps.core.views.AsyncResult') as async_result:
+            async_result.return_value.ready.return_value = True
+            async_result.return_value.successful.return_value = True
+            async_result.return_value.result = result
+            response = self.client.get('/execution/123/?offset=10&limit=2')
+            assert response.status_code == 200
+            assert response.data['rows'] == [[11], [12]]
+
+            assert self.client.get('/execution/123/?limit=-1').status_code == 400
+
+            FileSystemResultStore().delete(result[RESULT_REF])
+            assert self.client.get('/execution/123/').status_code == 410
@@ -0,0 +1,121 @@
+# pylint: disable=C0114
+import json
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from apps.core import cache
+from apps.core.models import Execution
+from apps.core.tests.factories import QueryZenFactory
+from queryzen_api.celery import app
+
+
+class RunManyTestCase(TestCase):
+    """Tests for running many Zens in one request"""
+
+    url = '/zen/run/'
+
+    def setUp(self):
+        self.zen = QueryZenFactory.create(name='many', query='select :value as value')
+        self.other = QueryZenFactory.create(name='other', query='select 2 as value',
+                                            version='latest')
+
+        task_always_eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, 'task_always_eager', task_always_eager)
+
+    def run_many(self, runs: list[dict], **data):
+        response = self.client.post(self.url, {'runs': runs, **data},
+                                    content_type='application/json')
+        if response.status_code != 200:
+            return response, None
+        return response, [json.loads(line) for line in
+                          b''.join(response.streaming_content).splitlines()]
+
+    def make_run(self, name: str, version='1', **parameters) -> dict:
+        return {'collection': 'main', 'name': name, 'version': version,
+                'database': 'default', 'parameters': parameters}
+
+    def test_run_many(self):
+        response, messages = self.run_many([self.make_run('many', value=1),
+                                            self.make_run('other', version='latest'),
+                                            self.make_run('many', value=3)])
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/x-ndjson'
+
+        assert [message['index'] for message in messages] == [0, 1, 2]
+        assert [message['execution']['rows'] for message in messages] == [[[1]], [[2]], [[3]]]
+        assert Execution.objects.filter(zen=self.zen).count() == 2
+
+    def test_validation(self):
+        response, _ = self.run_many([self.make_run('many', value=1),
+                                     self.make_run('many')])
+        assert response.status_code == 400
+        assert 'runs[1]' in response.data['detail']
+
+        response, _ = self.run_many([self.make_run('many', value=1),
+                                     self.make_run('does_not_exist')])
+        assert response.status_code == 404
+        assert 'runs[1]' in response.data['detail']
+
+        response, _ = self.run_many([])
+        assert response.status_code == 400
+
+        # Nothing was run.
+        assert not Execution.objects.exists()
+
+    @override_settings(ZEN_RESULT_CACHE_TTL=60)
+    def test_cached_results(self):
+        cache.get_cache().clear()
+        result = {'state': Execution.State.VALID, 'rows': [[1]], 'columns': ['value']}
+        cache.set_result(self.zen, 'default', 'select 1 as value', result)
+
+        response, messages = self.run_many([self.make_run('many', value=1),
+                                            self.make_run('many', value=2)])
+        assert response.status_code == 200
+        assert messages[0] == {'index': 0, 'execution': result}
+        assert messages[1]['execution']['rows'] == [[2]]
+
+        # Only the run that was not cached was executed, and now it is cached.
+        assert Execution.objects.count() == 1
+        assert cache.get_result(self.zen, 'default', 'select 2 as value')
+
+    @override_settings(ZEN_CANCEL_BACKEND='apps.core.cancellation.LocalCancellations')
+    def test_timeout(self):
+        with mock.patch('celery.result.EagerResult.ready', return_value=False):
+            response, messages = self.run_many([self.make_run('many', value=1)], timeout=1)
+
+        assert response.status_code == 200
+        assert messages[0]['timed_out']
+
+    def test_completion_order(self):
+        # The first run finishes after the second one, so its message is sent last.
+        slow = mock.Mock(**{'ready.side_effect': [False, True], 'successful.return_value': False,
+                            'get.return_value': 'slow'})
+        fast = mock.Mock(**{'ready.return_value': True, 'successful.return_value': False,
+                            'get.return_value': 'fast'})
+        with mock.patch('apps.core.views.group') as group:
+            group.return_value.apply_async.return_value.results = [slow, fast]
+            _, messages = self.run_many([self.make_run('many', value=1),
+                                         self.make_run('many', value=2)])
+
+        assert [message['index'] for message in messages] == [1, 0]
+        assert messages[0]['error'].endswith('fast')
+
+    def test_parameter_sets(self):
+        url = f'/collection/main/zen/{self.zen.name}/version/1/'
+        response = self.client.post(url, {'parameters': {},
+                                          'parameter_sets': [{'value': 1}, {'value': 2}],
+                                          'version': 1,
+                                          'database': 'default'},
+                                    content_type='application/json')
+        assert response.status_code == 200, response.content
+        assert response.data['columns'] == ['parameter_set', 'value']
+        assert response.data['rows'] == [[0, 1], [1, 2]]
+        # A single execution for all the sets.
+        assert Execution.objects.filter(zen=self.zen).count() == 1
+
+        response, _ = self.run_many([{**self.make_run('many'),
+                                      'parameter_sets': [{'value': 3}, {}]}])
+        assert response.status_code == 400
+        assert 'runs[0]' in response.data['detail']
@@ -0,0 +1,136 @@
+# pylint: disable=C0114
+import datetime
+import io
+import statistics
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.core.models import Execution, ZenStatistics
+from apps.core.sketch import QuantileSketch
+from apps.core.tests.factories import QueryZenFactory
+
+
+class ZenStatisticsTestCase(TestCase):
+    """Tests for the incrementally maintained statistics of Zens"""
+    total_times = [5, 1, 3, 3, 10, 7]
+
+    def setUp(self):
+        self.zen = QueryZenFactory.create(name='stats', query='select 1')
+
+    def create_executions(self, zen=None):
+        for total_time in self.total_times:
+            Execution.objects.create(zen=zen or self.zen,
+                                     state=Execution.State.VALID,
+                                     finished_at=datetime.datetime.now(datetime.UTC),
+                                     total_time=total_time,
+                                     query='select 1',
+                                     error='',
+                                     row_count=1,
+                                     parameters='{}')
+
+    def assert_statistics(self, obj: ZenStatistics):
+        assert obj.count == len(self.total_times)
+        assert (obj.min, obj.max, obj.range) == (1, 10, 9)
+        assert obj.mode == statistics.mode(self.total_times)
+        assert obj.median == statistics.median(self.total_times)
+        self.assertAlmostEqual(obj.mean, statistics.mean(self.total_times))
+        self.assertAlmostEqual(obj.variance, statistics.variance(self.total_times))
+        self.assertAlmostEqual(obj.standard_deviation, statistics.stdev(self.total_times))
+
+    def test_updated_on_execution(self):
+        self.create_executions()
+        self.assert_statistics(ZenStatistics.objects.get(zen=self.zen))
+
+    def test_stats_view(self):
+        self.create_executions()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/collection/{self.zen.collection}/zen/{self.zen.name}/'
+                                       'version/1/stats/')
+
+        assert response.status_code == 200
+        assert response.data['median_execution_time_ms'] == 4
+        assert response.data['p50_execution_time_ms'] == response.data['percentiles']['50']
+
+    def test_stats_view_percentiles(self):
+        self.create_executions()
+        url = f'/collection/{self.zen.collection}/zen/{self.zen.name}/version/1/stats/'
+
+        response = self.client.get(url, {'percentiles': '0,100'})
+        assert response.status_code == 200
+        assert set(response.data['percentiles']) == {'0', '100'}
+        self.assertAlmostEqual(response.data['percentiles']['100'], 10, delta=0.1)
+        # Estimates are never below the min or above the max.
+        assert response.data['percentiles']['0'] == 1
+
+        response = self.client.get(url, {'percentiles': '101'})
+        assert response.status_code == 400
+
+    def test_stats_view_all_versions(self):
+        self.create_executions()
+        self.create_executions(zen=QueryZenFactory.create(name='stats',
+                                                          query='select 2',
+                                                          version='latest'))
+
+        response = self.client.get(f'/collection/{self.zen.collection}/zen/{self.zen.name}/'
+                                   'version/all/stats/')
+
+        total_times = self.total_times * 2
+        assert response.status_code == 200
+        self.assertAlmostEqual(response.data['variance'], statistics.variance(total_times))
+        assert response.data['median_execution_time_ms'] == statistics.median(total_times)
+
+    def test_sketch(self):
+        sketch, other = QuantileSketch(alpha=0.01), QuantileSketch(alpha=0.01)
+        for value in range(0, 5000):
+            sketch.add(value)
+            other.add(value + 5000)
+        sketch.merge(QuantileSketch.from_dict(other.to_dict()))
+
+        assert sketch.count == 10000
+        for q in (0.5, 0.9, 0.99, 0.999):
+            exact = q * (sketch.count - 1)
+            assert abs(sketch.quantile(q) - exact) <= exact * 0.01 + 1
+
+    def test_bounded_size(self):
+        obj = ZenStatistics.record(self.zen.pk, range(1, 100_001))
+
+        # One bucket per 2% of execution time, not one per millisecond.
+        assert len(obj.sketch['buckets']) < 1000
+        self.assertAlmostEqual(obj.median, 50_000.5, delta=50_000 * 0.01)
+
+    def test_backfill(self):
+        self.create_executions()
+        ZenStatistics.objects.all().delete()
+
+        call_command('backfill_statistics', stdout=io.StringIO())
+        self.assert_statistics(ZenStatistics.objects.get(zen=self.zen))
+
+    def test_series(self):
+        self.create_executions()
+        Execution.objects.filter(total_time=10).update(state=Execution.State.INVALID)
+        # Stopped queries are errors too.
+        Execution.objects.filter(total_time=5).update(state=Execution.State.TIMEOUT)
+        Execution.objects.filter(total_time=1).update(
+            started_at=datetime.datetime(2020, 1, 1, 10, 30, tzinfo=datetime.UTC)
+        )
+
+        response = self.client.get(f'/collection/{self.zen.collection}/zen/{self.zen.name}/'
+                                   'version/1/stats/series/',
+                                   {'since': '2020-01-01T00:00:00Z',
+                                    'until': '2100-01-01T00:00:00Z',
+                                    'bucket': 'month'})
+
+        assert response.status_code == 200
+        assert response.data['count'] == [1, 5]
+        assert response.data['error_count'] == [0, 2]
+        assert response.data['error_rate'] == [0, 0.4]
+        assert response.data['max_execution_time_ms'] == [1, 10]
+        assert response.data['start'][0] == datetime.datetime(2020, 1, 1, tzinfo=datetime.UTC)
+
+    def test_series_too_many_buckets(self):
+        response = self.client.get(f'/collection/{self.zen.collection}/zen/{self.zen.name}/'
+                                   'version/1/stats/series/',
+                                   {'since': '2000-01-01T00:00:00Z', 'bucket': 'minute'})
+        assert response.status_code == 400
@@ -0,0 +1,117 @@
+# pylint: disable=C0114
+import json
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from apps.core.models import Execution, Zen
+from apps.core.streams import (LocalResultStream,
+                               RedisResultStream,
+                               StreamClosedError,
+                               StreamTimeoutError)
+from apps.core.tasks import stream_query
+from apps.core.tests.factories import QueryZenFactory
+from apps.core.tests.test_cancellation import ENDLESS_QUERY
+from databases.base import SQLiteDatabase
+from queryzen_api.celery import app
+
+
+@override_settings(ZEN_CANCEL_BACKEND='apps.core.cancellation.LocalCancellations')
+class StreamQueryTestCase(TestCase):
+    """Tests for streaming the rows of a Zen"""
+
+    def test_sqlite_batches(self):
+        database = SQLiteDatabase(':memory:')
+        query = 'WITH RECURSIVE c(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM c WHERE n < :n)' \
+                ' SELECT n FROM c'
+        result = database.execute_query_stream(query, {'n': 25}, batch_size=10)
+
+        assert result.columns == ['n']
+        assert [len(batch) for batch in result.batches] == [10, 10, 5]
+
+    def test_local_stream(self):
+        stream = LocalResultStream('test')
+        stream.publish({'columns': ['a']})
+        stream.publish({'rows': [[1]]})
+        stream.publish({'execution': {}})
+
+        assert list(LocalResultStream('test').listen(timeout=1)) == [{'columns': ['a']},
+                                                                     {'rows': [[1]]},
+                                                                     {'execution': {}}]
+        with self.assertRaises(StreamTimeoutError):
+            stream.receive(timeout=0.01)
+
+        # Closed streams are removed.
+        LocalResultStream('closed').close()
+        assert 'closed' not in LocalResultStream._queues  # pylint: disable=W0212
+
+    @override_settings(ZEN_STREAM_MAX_PENDING=2, ZEN_STREAM_PUBLISH_TIMEOUT=0.1)
+    def test_redis_stream_full(self):
+        with mock.patch('redis.Redis.from_url') as from_url:
+            stream = RedisResultStream('test')
+        pipe = from_url.return_value.pipeline.return_value
+
+        # Two messages are pending and nobody reads them.
+        pipe.execute.return_value = [2, 0]
+        with self.assertRaises(StreamClosedError):
+            stream.publish({'rows': [[1]]})
+        pipe.rpush.assert_not_called()
+
+        pipe.execute.return_value = [1, 0]
+        stream.publish({'rows': [[1]]})
+        pipe.rpush.assert_called_once()
+
+        # The API closed the stream.
+        pipe.execute.return_value = [0, 1]
+        with self.assertRaises(StreamClosedError):
+            stream.publish({'rows': [[1]]})
+
+    def test_closed_stream_stops_query(self):
+        zen = QueryZenFactory.create(name='stream', query='SELECT 1 UNION SELECT 2')
+        stream = mock.Mock()
+        stream.publish.side_effect = [None, StreamClosedError('closed')]
+
+        with mock.patch('apps.core.tasks.get_stream', return_value=stream):
+            stream_query.apply(('default', zen.pk, 'test'), {'batch_size': 1})
+
+        execution = Execution.objects.get()
+        assert execution.state == Execution.State.CANCELLED
+        assert execution.row_count == 1
+        # Nothing is published after the stream is closed.
+        assert stream.publish.call_count == 2
+
+    def test_stream_timeout(self):
+        zen = QueryZenFactory.create(name='endless', query=ENDLESS_QUERY)
+        stream = mock.Mock()
+
+        with mock.patch('apps.core.tasks.get_stream', return_value=stream):
+            stream_query.apply(('default', zen.pk, 'test'), {'timeout': 0.2})
+
+        # The query is stopped in the database, the Zen is still valid.
+        assert Execution.objects.get().state == Execution.State.TIMEOUT
+        zen.refresh_from_db()
+        assert zen.state != Zen.State.INVALID
+        assert stream.publish.call_args.args[0]['execution']['state'] == Execution.State.TIMEOUT
+
+    @override_settings(ZEN_STREAM_BACKEND='apps.core.streams.LocalResultStream')
+    def test_stream_view(self):
+        zen = QueryZenFactory.create(name='stream', query='SELECT 1 AS one UNION SELECT :n')
+        task_always_eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        try:
+            response = self.client.post(f'/collection/{zen.collection}/zen/{zen.name}/version/1/'
+                                        'stream/',
+                                        {'parameters': {'n': 2},
+                                         'version': 1,
+                                         'database': 'default',
+                                         'batch_size': 1},
+                                        content_type='application/json')
+            messages = [json.loads(line) for line in response.streaming_content]
+        finally:
+            app.conf.task_always_eager = task_always_eager
+
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert messages[0] == {'columns': ['one']}
+        assert messages[1:3] == [{'rows': [[1]]}, {'rows': [[2]]}]
+        assert messages[3]['execution']['state'] == Execution.State.VALID
+        assert messages[3]['execution']['row_count'] == 2
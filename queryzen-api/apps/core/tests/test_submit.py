@@ -0,0 +1,56 @@
+# pylint: disable=C0114
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.core.tests.factories import QueryZenFactory
+
+
+class SubmitTestCase(TestCase):
+    """Tests for submitting Zens and polling their results"""
+
+    def test_submit(self):
+        zen = QueryZenFactory.create(name='submit', query='select 1')
+
+        with mock.patch('apps.core.views.run_query') as run_query:
+            run_query.apply_async.return_value = mock.Mock(id='123', status='PENDING')
+            response = self.client.post(f'/collection/{zen.collection}/zen/{zen.name}/version/1/'
+                                        'submit/',
+                                        {'parameters': {}, 'version': 1, 'database': 'default'},
+                                        content_type='application/json')
+
+        assert response.status_code == 202
+        assert response.data == {'id': '123', 'status': 'PENDING'}
+        # The execution is known before it is sent.
+        task_id = run_query.apply_async.call_args.kwargs['task_id']
+        run_query.backend.store_result.assert_called_once_with(task_id, None, 'SENT')
+
+    def test_result_does_not_exist(self):
+        with mock.patch('apps.core.views.AsyncResult') as async_result:
+            async_result.return_value.status = 'PENDING'
+            assert self.client.get('/execution/123/').status_code == 404
+            assert self.client.post('/execution/123/cancel/').status_code == 404
+
+    def test_result_pending(self):
+        with mock.patch('apps.core.views.AsyncResult') as async_result:
+            async_result.return_value.ready.return_value = False
+            async_result.return_value.status = 'STARTED'
+            response = self.client.get('/execution/123/')
+
+        assert response.status_code == 202
+        assert response.data == {'id': '123', 'status': 'STARTED'}
+
+    def test_result(self):
+        with mock.patch('apps.core.views.AsyncResult') as async_result:
+            async_result.return_value.ready.side_effect = [False, True, True]
+            async_result.return_value.successful.return_value = True
+            async_result.return_value.result = {'rows': [[1]]}
+            response = self.client.get('/execution/123/?wait=1')
+
+        async_result.return_value.get.assert_called_once_with(timeout=1, propagate=False)
+        assert response.status_code == 200
+        assert response.data == {'rows': [[1]]}
+
+    def test_result_bad_wait(self):
+        response = self.client.get('/execution/123/?wait=never')
+        assert response.status_code == 400
@@ -0,0 +1,37 @@
+# pylint: disable=C0114
+from django.test import TestCase
+
+from apps.core.models import Zen, ZenCounter
+from apps.core.tests.factories import QueryZenFactory
+
+
+class ZenVersionTestCase(TestCase):
+    """Tests the allocation of Zen versions"""
+
+    def create(self, version='latest', name='versioned') -> Zen:
+        return QueryZenFactory.create(name=name, query='select 1', version=version)
+
+    def test_latest_versions_are_consecutive(self):
+        assert [self.create().version for _ in range(3)] == [1, 2, 3]
+        assert self.create(name='other').version == 1
+        assert ZenCounter.objects.get(collection='main', name='versioned').last_version == 3
+
+    def test_first_version_is_one(self):
+        assert self.create(version=5).version == 1
+
+    def test_explicit_version(self):
+        self.create()
+        assert self.create(version=10).version == 10
+        assert self.create().version == 11
+
+    def test_deleted_versions_are_not_reused(self):
+        self.create()
+        self.create().delete()
+        assert self.create().version == 3
+
+    def test_update_does_not_allocate(self):
+        zen = self.create()
+        zen.state = Zen.State.VALID
+        with self.assertNumQueries(1):
+            zen.save()
+        assert Zen.objects.get(pk=zen.pk).version == 1
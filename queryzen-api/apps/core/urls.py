@@ -2,7 +2,17 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from apps.core.views import ZenFilterViewSet, ZenView, StatisticsView
+from apps.core.views import (ZenFilterViewSet,
+                             ZenView,
+                             ZenBulkView,
+                             ZenRunManyView,
+                             ZenStreamView,
+                             ZenSubmitView,
+                             ExecutionResultView,
+                             ExecutionCancelView,
+                             ExecutionsView,
+                             StatisticsView,
+                             StatisticsSeriesView)
 
 router = DefaultRouter()
 router.register(
@@ -10,13 +20,49 @@ router.register(
     basename='zens'
 )
 urlpatterns = router.urls
+urlpatterns.append(
+    path('zen/bulk/', ZenBulkView.as_view())
+)
+urlpatterns.append(
+    path('zen/run/', ZenRunManyView.as_view())
+)
 base_path = 'collection/<str:collection>/zen/<str:name>/version/<str:version>/'
 urlpatterns.append(
     path(base_path, ZenView.as_view())
 )
+urlpatterns.append(
+    path(
+        f'{base_path}executions/',
+        ExecutionsView.as_view()
+    )
+)
 urlpatterns.append(
     path(
         f'{base_path}stats/',
         StatisticsView.as_view()
     )
 )
+urlpatterns.append(
+    path(
+        f'{base_path}stats/series/',
+        StatisticsSeriesView.as_view()
+    )
+)
+urlpatterns.append(
+    path(
+        f'{base_path}stream/',
+        ZenStreamView.as_view()
+    )
+)
+urlpatterns.append(
+    path(
+        f'{base_path}submit/',
+        ZenSubmitView.as_view()
+    )
+)
+urlpatterns.append(
+    path('execution/<str:execution_id>/', ExecutionResultView.as_view())
+)
+urlpatterns.append(
+    path('execution/<str:execution_id>/cancel/', ExecutionCancelView.as_view())
+)
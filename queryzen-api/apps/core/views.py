@@ -1,26 +1,57 @@
 # pylint: disable=C0114
+import concurrent.futures
+import json
 import logging
-import re
+import time
+import uuid
+
+from celery import group, states
+from celery.exceptions import TimeoutError as CeleryTimeoutError
+from celery.result import AsyncResult, EagerResult
 
 from django.conf import settings
+from django.core import signing
+from django.db.models import Avg, Count, Max, Min, Q, QuerySet
+from django.db.models.functions import Trunc
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
 from django_filters import rest_framework as filters
 
+from rest_framework.exceptions import APIException, ValidationError
 from rest_framework.response import Response
-from rest_framework import mixins, viewsets, status, views
+from rest_framework import generics, mixins, viewsets, status, views
 
+from apps.core import cache as result_cache, inline
+from apps.core.cancellation import get_cancellations, CANCELLED_REASON
+from apps.core.coalescing import Flight, get_flights, make_flight_key
+from apps.core.concurrency import DatabaseBusyError, get_queue
 from apps.core.exceptions import (ZenAlreadyExistsError,
                                   ExecutionEngineError,
                                   DatabaseDoesNotExistError,
                                   ZenDoesNotExistError,
-                                  MissingParametersError)
+                                  MissingParametersError,
+                                  ResultExpiredError,
+                                  ExecutionFinishedError,
+                                  ExecutionCancelledError,
+                                  ExecutionDoesNotExistError)
 from apps.core.filters import QueryZenFilter
-from apps.core.models import Zen
+from apps.core.models import Zen, Execution, ZenStatistics
+from apps.core.pagination import (ExecutionCursorPagination,
+                                  ZenCursorPagination,
+                                  read_page_token)
+from apps.core.renderers import RESULT_RENDERERS
+from apps.core.results import is_spilled, load_result, ResultNotFoundError
 from apps.core.serializers import (ZenSerializer,
+                                   BulkCreateZenSerializer,
+                                   ExecutionSerializer,
                                    CreateZenSerializer,
-                                   ExecuteZenSerializer, StatisticsSerializer)
-from apps.core.tasks import run_query
+                                   ExecuteZenSerializer, RunManySerializer, StatisticsSerializer,
+                                   StatisticsQuerySerializer, StatisticsSeriesQuerySerializer,
+                                   DEFAULT_PERCENTILES)
+from apps.core.streams import get_stream, StreamTimeoutError
+from apps.core.tasks import run_query, stream_query
+from databases.control import TIMEOUT_REASON
 
 
 # from queryzen_api.celery import is_execution_engine_working
@@ -32,35 +63,248 @@ class ZenFilterViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     filters via query parameters.
 
     Check ``QueryZenFilter.Meta.fields`` to see the available ones.
+
+    Results are cursor paginated and ordered by creation time, a Zen is returned only once even
+    when filtering by its executions.
     """
     queryset = Zen.objects.all()
     serializer_class = ZenSerializer
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = QueryZenFilter
+    pagination_class = ZenCursorPagination
+
+    def get_queryset(self):
+        return ZenSerializer.optimize_queryset(super().get_queryset(), self.request)
+
+    def filter_queryset(self, queryset):
+        # Filters on executions join them, which would return a Zen once per execution.
+        return super().filter_queryset(queryset).distinct()
+
+
+class ExecutionResultMixin:
+    """Mixin for views that return execution results."""
+    # State of submitted executions until a worker starts them. Celery reports unknown ids as
+    # PENDING, so executions that are PENDING were never submitted or their result expired.
+    SENT = 'SENT'
+
+    def get_execution(self, execution_id: str) -> AsyncResult:
+        """Returns the result of a submitted execution.
+
+        Raises:
+            ExecutionDoesNotExistError: If the execution was never submitted or its result
+                expired, check ``settings.CELERY_RESULT_EXPIRES``.
+        """
+        async_job = AsyncResult(execution_id)
+        if async_job.status == states.PENDING:
+            raise ExecutionDoesNotExistError(f'The execution {execution_id} does not exist'
+                                             f' or its result expired.')
+        return async_job
+
+    def load_result(self, result: dict, offset: int = 0, limit: int | None = None) -> dict:
+        """Returns the result with its rows, check ``apps.core.results.load_result``."""
+        try:
+            return load_result(result, offset, limit)
+        except ResultNotFoundError as e:
+            raise ResultExpiredError(f'The rows of the result expired: {e}') from e
+
+    def cancel_execution(self, async_job: AsyncResult, reason: str = CANCELLED_REASON) -> None:
+        """Cancels an execution, if it is running its query is stopped and if it is queued it
+        never runs."""
+        try:
+            get_cancellations().cancel(async_job.id, reason)
+        except Exception as e:  # pylint: disable=W0718
+            # The task is still revoked, a running query runs until its timeout.
+            logging.warning('Could not cancel the execution %s: %r', async_job.id, e)
+        if not isinstance(async_job, EagerResult):
+            # Eager tasks run when they are sent, they are never queued.
+            async_job.revoke()
+
+
+class ZenExecutionMixin(ExecutionResultMixin):
+    """Shared logic of the views that run Zens."""
+
+    def prepare_execution(self,
+                          request,
+                          collection: str,
+                          name: str,
+                          version: str) -> tuple[Zen, str, dict, dict]:
+        """Validates a request to run a Zen.
+
+        Raises:
+            ExecutionEngineError: If the execution engine is not working.
+            DatabaseDoesNotExistError: If the requested database is not configured.
+
+        Returns:
+            A tuple (zen, database_name, parameters, validated_data) where parameters are the
+            default parameters of the Zen updated with the ones of the request.
+        """
+        serializer = ExecuteZenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        zen = get_object_or_404(Zen,
+                                collection=collection,
+                                name=name,
+                                version=version)
+
+        requested_database, parameters = self.validate_execution(zen, serializer.validated_data)
+        return zen, requested_database, parameters, serializer.validated_data
+
+    @staticmethod
+    def get_queue(zen: Zen, database: str, data: dict) -> str:
+        """Returns the queue of a run of a Zen, check ``apps.core.concurrency``"""
+        return get_queue(database, data.get('lane') or zen.lane or settings.ZEN_DEFAULT_LANE)
+
+    def validate_execution(self, zen: Zen, data: dict) -> tuple[str, dict | list[dict]]:
+        """Validates the parameters and the database of a run of a Zen, ``data`` is the validated
+        data of an ``ExecuteZenSerializer``.
+
+        Raises:
+            ExecutionEngineError: If the execution engine is not working.
+            DatabaseDoesNotExistError: If the requested database is not configured.
+
+        Returns:
+            A tuple (database_name, parameters), parameters is a list with the parameters of
+            every set if ``parameter_sets`` were given.
+        """
+        # Parameters to be passed to the task.
+        if 'page_token' in data:
+            # The parameters of the first page.
+            parameters = self.read_page_token(zen, data)['parameters']
+        elif 'parameter_sets' in data:
+            parameters = [zen.get_parameters({**data['parameters'], **parameter_set})
+                          for parameter_set in data['parameter_sets']]
+            for parameter_set in parameters:
+                zen.validate_parameters(parameter_set)
+        else:
+            parameters = zen.get_parameters(data['parameters'])
+            zen.validate_parameters(parameters)
+
+        is_engine_working, error_msg = True, ''  # is_execution_engine_working()
+
+        if not is_engine_working:
+            raise ExecutionEngineError(detail=error_msg)
+
+        requested_database = data['database']
 
+        if not settings.ZEN_DATABASES.get(requested_database):
+            raise DatabaseDoesNotExistError(f'The asked database {repr(requested_database)}'
+                                            f' is not configured in the backed.')
+
+        return requested_database, parameters
+
+    def read_page_token(self, zen: Zen, data: dict) -> dict:
+        """Returns the content of the page token of a run of a Zen.
+
+        Raises:
+            ValidationError: If the token is not valid, expired or is not of this run.
+        """
+        try:
+            token = read_page_token(data['page_token'])
+        except signing.BadSignature as e:
+            raise ValidationError({'page_token': 'The page token is not valid or expired.'}) from e
+
+        if token['zen'] != str(zen.pk) or token['database'] != data['database']:
+            raise ValidationError({'page_token': 'The page token is of another Zen or database.'})
+        return token
+
+    def get_page(self, zen: Zen, data: dict) -> dict | None:
+        """Returns the page of the result that a run of a Zen asks for, {'offset', 'limit'},
+        None if the whole result is asked for."""
+        if 'page_token' in data:
+            token = self.read_page_token(zen, data)
+            return {'offset': token['offset'], 'limit': data.get('limit', token['limit'])}
+        if 'limit' in data:
+            return {'offset': 0, 'limit': data['limit']}
+        return None
+
+    def get_cached_result(self,
+                          zen: Zen,
+                          requested_database: str,
+                          parameters: dict,
+                          page: dict | None = None) -> tuple[str | None, dict | None]:
+        """Looks up the result of a run of a Zen in the result cache.
+
+        Returns:
+            A tuple (query, result), query is the rendered query if the results of the Zen are
+            cached, otherwise None, and result is the cached result if there is one.
+        """
+        if not result_cache.get_ttl(zen) or isinstance(parameters, list) or page:
+            # Results of parameter sets and pages are not cached.
+            return None, None
 
-class ZenView(views.APIView):
+        query = self.render_query(zen, requested_database, parameters)
+        if query is None:
+            return None, None
+
+        return query, result_cache.get_result(zen, requested_database, query)
+
+    @staticmethod
+    def render_query(zen: Zen, requested_database: str, parameters: dict) -> str | None:
+        """Returns the query of a run of a Zen, None if the parameters cannot be rendered, the
+        task will record the error."""
+        database = settings.ZEN_DATABASES.get(requested_database)
+        try:
+            return database.prepare_query(zen.query, parameters)
+        except ValueError:
+            return None
+
+    def join_flight(self,
+                    zen: Zen,
+                    requested_database: str,
+                    parameters: dict,
+                    page: dict | None,
+                    timeout: float) -> Flight | None:
+        """Joins the identical runs of a Zen that are running, check ``apps.core.coalescing``.
+
+        Returns:
+            The flight of the run, None if the run is not coalesced.
+        """
+        if (not settings.ZEN_COALESCE
+                or run_query.app.conf.task_always_eager
+                or isinstance(parameters, list)
+                or page):
+            # Eager tasks cannot be joined, they have no result in the result backend.
+            return None
+
+        query = self.render_query(zen, requested_database, parameters)
+        if query is None:
+            return None
+
+        key = make_flight_key(zen, requested_database, query, timeout)
+        execution_id = str(uuid.uuid4())
+        # The run that starts the flight waits at most `timeout` seconds for it.
+        flight_id = get_flights().join(key, execution_id, ttl=timeout)
+        return Flight(key=key, execution_id=flight_id, started=flight_id == execution_id)
+
+    def cache_result(self, zen: Zen, requested_database: str, query: str | None, result: dict):
+        """Caches the result of a run, only valid results of cached Zens are cached, results
+        that do not fit in the result backend are not cached either."""
+        if (query is not None
+                and result.get('state') == Execution.State.VALID
+                and not is_spilled(result)):
+            result_cache.set_result(zen, requested_database, query, result)
+
+
+class ZenView(ZenExecutionMixin, views.APIView):
     """View for handling Zen lifetimes. It follows the REST pattern.
     GET: Get a Zen.
     POST: Run a Zen.
     PUT: Create a Zen.
     DELETE: Delete a Zen.
     """
+    # Results of runs can be returned as Arrow, check ``apps.core.renderers``.
+    renderer_classes = RESULT_RENDERERS
 
     def _validate_parameters_replacement(self, zen: Zen, parameters: dict) -> None:
         """Validates that the required parameters to run the query are given by the user
         or present in `default_parameters`
-
-        Regex explanation:
-        (:) -> Search character :
-        (w+) -> Catch one or more letters, numbers... what is the param name
         """
-        required_parameters = re.findall(r':(\w+)', zen.query)
+        required_parameters = zen.template.parameters
 
         missing_parameters = []
 
         default_parameters_names = list(map(lambda k: k.get('name'), zen.default_parameters))
-        for param in required_parameters:
+        for param in sorted(required_parameters):
             if param not in parameters and param not in default_parameters_names:
                 missing_parameters.append(param)
 
@@ -69,54 +313,103 @@ class ZenView(views.APIView):
                                          f' that were not supplied: {missing_parameters!r}')
 
     def get(self, request, collection: str, name: str, version: str):  # pylint: disable=W0613
-        """Get a Zen."""
+        """Get a Zen, executions are not returned unless '?expand=executions' is given, use
+        the executions endpoint to paginate them."""
         queryset = Zen.filter_by(collection=collection,
                                  name=name,
                                  version=version)
+        obj = ZenSerializer.optimize_queryset(queryset, request).first()
 
-        if not queryset.exists():
+        if obj is None:
             raise ZenDoesNotExistError()
 
-        obj = queryset.first()
-
-        return Response(ZenSerializer(obj, many=False).data)
+        return Response(ZenSerializer(obj, many=False, context={'request': request}).data)
 
     def post(self, request, collection, name, version):
         """Runs a Zen in the backend."""
-        serializer = ExecuteZenSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-
-        zen = get_object_or_404(Zen,
-                                collection=collection,
-                                name=name,
-                                version=version)
-
-        # Parameters to be passed to the task.
-        parameters = zen.get_parameters(serializer.validated_data['parameters'])
-        zen.validate_parameters(parameters)
-
-        is_engine_working, error_msg = True, ''  # is_execution_engine_working()
-
-        if not is_engine_working:
-            raise ExecutionEngineError(detail=error_msg)
-
-        requested_database = serializer.validated_data['database']
-
-        if not settings.ZEN_DATABASES.get(requested_database):
-            raise DatabaseDoesNotExistError(f'The asked database {repr(requested_database)}'
-                                            f' is not configured in the backed.')
-
+        zen, requested_database, parameters, data = self.prepare_execution(request,
+                                                                           collection,
+                                                                           name,
+                                                                           version)
+        page = self.get_page(zen, data)
+        query, cached_result = self.get_cached_result(zen, requested_database, parameters, page)
+        if cached_result:
+            return Response(cached_result)
+
+        timeout = data.get('timeout') or getattr(settings, 'ZEN_TIMEOUT')
+        if inline.is_inline(zen, requested_database):
+            response = self.run_inline(zen, requested_database, query, parameters, page, timeout)
+            if response is not None:
+                return response
+
+        flight = self.join_flight(zen, requested_database, parameters, page, timeout)
+        started = flight is None or flight.started
         try:
-            async_job = run_query.delay(requested_database,
-                                        zen.pk,
-                                        parameters)
-            timeout = serializer.validated_data.get('timeout', getattr(settings, 'ZEN_TIMEOUT'))
+            if started:
+                async_job = run_query.apply_async((requested_database,
+                                                   zen.pk,
+                                                   parameters,
+                                                   page,
+                                                   timeout),
+                                                  queue=self.get_queue(zen,
+                                                                       requested_database,
+                                                                       data),
+                                                  task_id=flight and flight.execution_id)
+            else:
+                # An identical run is running, its result is shared.
+                async_job = AsyncResult(flight.execution_id)
             query_result = async_job.get(timeout)
-            return Response(query_result)
+            if started:
+                self.cache_result(zen, requested_database, query, query_result)
+        except CeleryTimeoutError:
+            if started:
+                # The query is stopped, its execution is recorded as timed out.
+                self.cancel_execution(async_job, TIMEOUT_REASON)
+            return Response(f'Running a Zen timed out after {timeout} seconds',
+                            status=status.HTTP_408_REQUEST_TIMEOUT)
         except Exception as e:  # pylint: disable=W0718 TODO Fix exception (Make a better one)
             logging.warning(e)
             return Response(f'Running a Zen resulted in an uncaught exception: {e}',
                             status=status.HTTP_408_REQUEST_TIMEOUT)
+        finally:
+            if flight is not None and flight.started:
+                get_flights().land(flight.key, flight.execution_id)
+
+        if query_result.get('state') == Execution.State.TIMEOUT:
+            return Response(f'Running a Zen timed out after {timeout} seconds',
+                            status=status.HTTP_408_REQUEST_TIMEOUT)
+        return Response(self.load_result(query_result))
+
+    def run_inline(self,
+                   zen: Zen,
+                   requested_database: str,
+                   query: str | None,
+                   parameters: dict | list[dict],
+                   page: dict | None,
+                   timeout: float) -> Response | None:
+        """Runs a Zen in the API process, check ``apps.core.inline``.
+
+        Returns:
+            The response of the run, None if the database has no free slot, the run is then left
+            to the workers, which wait for one.
+        """
+        try:
+            query_result = inline.run_inline(requested_database, zen.pk, parameters, page, timeout)
+        except DatabaseBusyError:
+            return None
+        except concurrent.futures.TimeoutError:
+            return Response(f'Running a Zen timed out after {timeout} seconds',
+                            status=status.HTTP_408_REQUEST_TIMEOUT)
+        except Exception as e:  # pylint: disable=W0718
+            logging.warning(e)
+            return Response(f'Running a Zen resulted in an uncaught exception: {e}',
+                            status=status.HTTP_408_REQUEST_TIMEOUT)
+
+        if query_result.get('state') == Execution.State.TIMEOUT:
+            return Response(f'Running a Zen timed out after {timeout} seconds',
+                            status=status.HTTP_408_REQUEST_TIMEOUT)
+        self.cache_result(zen, requested_database, query, query_result)
+        return Response(self.load_result(query_result))
 
     def put(self, request, collection: str, name: str, version: str):
         """
@@ -127,8 +420,8 @@ class ZenView(views.APIView):
 
         if version != 'latest':
             # If version is not 'latest' (aka automatically handed by us),
-            # check that it does not exist. If 'latest', we'll pick the
-            # latest object and add one to its version, so we'll never collide.
+            # check that it does not exist. If 'latest', the next version is
+            # allocated atomically on save, check ``ZenCounter``, so we'll never collide.
             queryset = Zen.filter_by(collection=collection,
                                      name=name,
                                      version=version)
@@ -151,12 +444,293 @@ class ZenView(views.APIView):
         return Response([], status=status.HTTP_200_OK)
 
 
-class StatisticsView(views.APIView):
+class ZenBulkView(views.APIView):
+    """View to create many Zens in one request.
+
+    POST: Create the Zens of the body, e.g. {"zens": [{"collection": "main", "name": "zen",
+    "query": "select 1"}], "get_or_create": false}. The version of every Zen is 'latest' by
+    default. If ``get_or_create`` is true, Zens whose version already exists are returned
+    instead, otherwise no Zen is created and a 409 is returned.
+
+    Returns a list with a {"created": bool, "zen": {...}} object per Zen, in the same order.
+    """
+
+    def post(self, request):
+        serializer = BulkCreateZenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        zens = [Zen(**data) for data in serializer.validated_data['zens']]
+        results = Zen.bulk_get_or_create(zens,
+                                         get_existing=serializer.validated_data['get_or_create'])
+        return Response([{'created': created, 'zen': ZenSerializer(zen).data}
+                         for created, zen in results])
+
+
+class ZenStreamView(ZenExecutionMixin, views.APIView):
+    """View to run a Zen streaming its rows while they are fetched from the database.
+
+    The response is newline delimited json (NDJSON), check ``apps.core.streams`` for the format of
+    the messages.
+    """
+
+    def post(self, request, collection: str, name: str, version: str):
+        """Runs a Zen in the backend, streaming the result."""
+        zen, requested_database, parameters, data = self.prepare_execution(request,
+                                                                           collection,
+                                                                           name,
+                                                                           version)
+        if 'parameter_sets' in data:
+            raise ValidationError({'parameter_sets': 'Parameter sets cannot be streamed.'})
+        if 'limit' in data or 'page_token' in data:
+            raise ValidationError('Streamed results cannot be paginated.')
+        stream_id = uuid.uuid4().hex
+        stream = get_stream(stream_id)
+        timeout = data.get('timeout') or getattr(settings, 'ZEN_TIMEOUT')
+        # The query is stopped in the database when the stream is not waited anymore.
+        stream_query.apply_async((requested_database,
+                                  zen.pk,
+                                  stream_id,
+                                  parameters,
+                                  data.get('batch_size', settings.ZEN_STREAM_BATCH_SIZE),
+                                  timeout),
+                                 queue=self.get_queue(zen, requested_database, data))
+
+        def messages():
+            try:
+                for message in stream.listen(timeout):
+                    yield json.dumps(message) + '\n'
+            except StreamTimeoutError as e:
+                logging.warning(e)
+                yield json.dumps({'error': f'Running a Zen timed out: {e}'}) + '\n'
+            finally:
+                # Also when the client disconnects, so the worker stops publishing.
+                stream.close()
+
+        return StreamingHttpResponse(messages(), content_type='application/x-ndjson')
+
+
+class ZenRunManyView(ZenExecutionMixin, views.APIView):
+    """View to run many Zens in one request, e.g. the Zens of a dashboard. They are dispatched
+    as a Celery group so they run in parallel, the request takes as long as the slowest one.
+
+    POST: The body is {"runs": [{"collection": "main", "name": "zen", "version": 1,
+    "database": "default", "parameters": {}}, ...], "timeout": 10}, all the runs are validated
+    before any of them is dispatched.
+
+    The response is newline delimited json (NDJSON), a message per run, each one sent as soon as
+    it is finished, so they are not in the order of the request: {"index": 0, "execution": {...}}
+    or {"index": 0, "error": "..."} if the run failed in the backend or timed out, in which case
+    "timed_out" is true.
+    """
+    # Seconds between checks of the runs that did not finish.
+    POLL_INTERVAL = 0.05
+
+    def post(self, request):
+        serializer = RunManySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        timeout = serializer.validated_data.get('timeout', settings.ZEN_TIMEOUT)
+        # index -> cached result or (zen, database, query)
+        runs = {}
+        signatures = []
+        for i, data in enumerate(serializer.validated_data['runs']):
+            try:
+                zen = Zen.filter_by(collection=data['collection'],
+                                    name=data['name'],
+                                    version=data['version']).first()
+                if zen is None:
+                    collection, name, version = data['collection'], data['name'], data['version']
+                    raise ZenDoesNotExistError(f'{collection}/{name} version {version}'
+                                               f' does not exist')
+                requested_database, parameters = self.validate_execution(zen, data)
+                page = self.get_page(zen, data)
+            except APIException as e:
+                raise type(e)(f'runs[{i}]: {e.detail}') from e
+
+            query, cached_result = self.get_cached_result(zen,
+                                                          requested_database,
+                                                          parameters,
+                                                          page)
+            if cached_result:
+                runs[i] = cached_result
+            else:
+                runs[i] = (zen, requested_database, query)
+                signatures.append(run_query.s(requested_database,
+                                              zen.pk,
+                                              parameters,
+                                              page,
+                                              timeout).set(queue=self.get_queue(zen,
+                                                                                requested_database,
+                                                                                data)))
+
+        results = group(signatures).apply_async().results if signatures else []
+        # index -> AsyncResult of the runs that were dispatched, in the order of the signatures.
+        pending = dict(zip((index for index, run in runs.items() if not isinstance(run, dict)),
+                           results))
+        deadline = time.monotonic() + timeout
+
+        def messages():
+            for index, run in runs.items():
+                if isinstance(run, dict):
+                    yield json.dumps({'index': index, 'execution': run}) + '\n'
+
+            while pending:
+                finished = [index for index, async_job in pending.items() if async_job.ready()]
+                for index in finished:
+                    message = self.make_message(index, runs[index], pending.pop(index))
+                    yield json.dumps(message) + '\n'
+
+                if finished:
+                    continue
+                if time.monotonic() >= deadline:
+                    for index, async_job in pending.items():
+                        self.cancel_execution(async_job, TIMEOUT_REASON)
+                        yield json.dumps({'index': index,
+                                          'error': f'Running a Zen timed out after {timeout}'
+                                                   f' seconds',
+                                          'timed_out': True}) + '\n'
+                    return
+                time.sleep(self.POLL_INTERVAL)
+
+        return StreamingHttpResponse(messages(), content_type='application/x-ndjson')
+
+    def make_message(self, index: int, run: tuple, async_job: AsyncResult) -> dict:
+        """Returns the message of a finished run, ``run`` is (zen, database, query)."""
+        zen, requested_database, query = run
+        query_result = async_job.get(propagate=False)
+        if not async_job.successful():
+            return {'index': index, 'error': f'The execution failed in the backend: {query_result}'}
+
+        self.cache_result(zen, requested_database, query, query_result)
+        try:
+            return {'index': index, 'execution': self.load_result(query_result)}
+        except ResultExpiredError as e:
+            return {'index': index, 'error': str(e.detail)}
+
+
+class ZenSubmitView(ZenExecutionMixin, views.APIView):
+    """View to run a Zen without waiting for its result, the returned execution id is used to
+    get the result with ``ExecutionResultView``."""
+
+    def post(self, request, collection: str, name: str, version: str):
+        """Submits a Zen to be run in the backend."""
+        zen, requested_database, parameters, data = self.prepare_execution(request,
+                                                                           collection,
+                                                                           name,
+                                                                           version)
+        execution_id = str(uuid.uuid4())
+        # Stored before the task is sent, so its state is never overwritten.
+        run_query.backend.store_result(execution_id, None, self.SENT)
+        async_job = run_query.apply_async((requested_database,
+                                           zen.pk,
+                                           parameters,
+                                           self.get_page(zen, data),
+                                           data.get('timeout')),
+                                          queue=self.get_queue(zen, requested_database, data),
+                                          task_id=execution_id)
+        return Response({'id': async_job.id, 'status': async_job.status},
+                        status=status.HTTP_202_ACCEPTED)
+
+
+class ExecutionResultView(ExecutionResultMixin, views.APIView):
+    """View to get the result of a submitted Zen execution.
+
+    It accepts the query parameter `wait`, the seconds to wait for the execution to finish
+    (long polling), capped at ``settings.ZEN_MAX_POLL_WAIT``, the request holds a thread while it
+    waits. If the execution did not finish the response is 202 with its status, 404 if it does
+    not exist or its result expired.
+
+    The query parameters `offset` and `limit` return a range of the rows, big results are read
+    from the result store without loading all their rows.
+    """
+    renderer_classes = RESULT_RENDERERS
+
+    def get(self, request, execution_id: str):
+        """Get the result of an execution."""
+        try:
+            wait = min(float(request.query_params.get('wait', 0)), settings.ZEN_MAX_POLL_WAIT)
+        except ValueError as e:
+            raise ValidationError({'wait': 'A number of seconds is required.'}) from e
+
+        try:
+            offset = int(request.query_params.get('offset', 0))
+            limit = request.query_params.get('limit')
+            limit = None if limit is None else int(limit)
+        except ValueError as e:
+            raise ValidationError('offset and limit have to be integers.') from e
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValidationError('offset and limit cannot be negative.')
+
+        async_job = self.get_execution(execution_id)
+
+        if wait > 0 and not async_job.ready():
+            try:
+                async_job.get(timeout=wait, propagate=False)
+            except CeleryTimeoutError:
+                pass
+
+        if not async_job.ready():
+            return Response({'id': execution_id, 'status': async_job.status},
+                            status=status.HTTP_202_ACCEPTED)
+
+        if async_job.status == states.REVOKED:
+            raise ExecutionCancelledError('The execution was cancelled before it ran.')
+
+        if not async_job.successful():
+            raise ExecutionEngineError(f'The execution failed in the backend: {async_job.result}')
+
+        return Response(self.load_result(async_job.result, offset, limit))
+
+
+class ExecutionCancelView(ExecutionResultMixin, views.APIView):
+    """View to cancel a submitted Zen execution. A queued execution never runs, and the query
+    of a running one is stopped in the database, it is recorded as cancelled."""
+
+    def post(self, request, execution_id: str):  # pylint: disable=W0613
+        """Cancel an execution."""
+        async_job = self.get_execution(execution_id)
+        if async_job.ready():
+            raise ExecutionFinishedError('The execution already finished.')
+
+        self.cancel_execution(async_job)
+        return Response({'id': execution_id, 'status': async_job.status},
+                        status=status.HTTP_202_ACCEPTED)
+
+
+class ExecutionsView(generics.ListAPIView):
+    """View to list the executions of a Zen version, cursor paginated oldest first,
+    '?state=' filters them by state and '?fields=' selects the returned fields."""
+    serializer_class = ExecutionSerializer
+    pagination_class = ExecutionCursorPagination
+
+    def get_queryset(self):
+        zen = Zen.filter_by(**self.kwargs).only('id').first()
+        if zen is None:
+            raise ZenDoesNotExistError()
+
+        queryset = Execution.objects.filter(zen=zen)
+        if state := self.request.query_params.get('state'):
+            queryset = queryset.filter(state=state)
+        return queryset
+
+
+class ZenStatisticsMixin:
+    """Shared logic of the statistics views."""
+
+    def get_zens(self, collection: str, name: str, version: str) -> QuerySet:
+        """Returns the Zens to get statistics from, if version is 'all', all the versions."""
+        if version == 'all':
+            return Zen.objects.filter(collection=collection, name=name)
+        return Zen.filter_by(collection=collection, name=name, version=version)[:1]
+
+
+class StatisticsView(ZenStatisticsMixin, views.APIView):
     """View to retrieve statistical execution time metrics for a given Zen version."""
 
     def get(self, request, collection: str, name: str, version: str):  # pylint: disable=W0613
         """
-        Get statistics from a Zen version.
+        Get statistics from a Zen version, if version is 'all' the statistics of all the
+        versions are merged.
 
         Available statistics:
         - min_execution_time_ms
@@ -167,21 +741,89 @@ class StatisticsView(views.APIView):
         - variance
         - standard_deviation
         - range
+        - p50_execution_time_ms, p90_execution_time_ms, p99_execution_time_ms
+          and p999_execution_time_ms
+        - percentiles, the percentiles given in '?percentiles=', e.g. '?percentiles=75,99.99'
         """
+        query = StatisticsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        percentiles = query.validated_data.get('percentiles', DEFAULT_PERCENTILES)
 
-        queryset = Zen.filter_by(collection=collection,
-                                 name=name,
-                                 version=version)
-
-        if not queryset.exists():
+        zens = list(self.get_zens(collection, name, version).select_related('statistics'))
+        if not zens:
             raise ZenDoesNotExistError()
 
-        obj: Zen | None = queryset.first()
+        statistics = ZenStatistics()
+        for zen in zens:
+            try:
+                statistics.merge(zen.statistics)
+            except ZenStatistics.DoesNotExist:
+                pass
 
-        if not obj.executions.count():
+        if not statistics.count:
             metrics = StatisticsSerializer(instance={})
         else:
-            executions = obj.executions.order_by('total_time')
-            metrics = StatisticsSerializer.from_execution(obj, executions)
+            metrics = StatisticsSerializer.from_statistics(statistics, percentiles)
 
         return Response(metrics.data, status=status.HTTP_200_OK)
+
+
+class StatisticsSeriesView(ZenStatisticsMixin, views.APIView):
+    """View to retrieve execution metrics of a Zen version over time."""
+    COLUMNS = ('start',
+               'count',
+               'error_count',
+               'error_rate',
+               'mean_execution_time_ms',
+               'min_execution_time_ms',
+               'max_execution_time_ms')
+
+    def get(self, request, collection: str, name: str, version: str):  # pylint: disable=W0613
+        """
+        Get the executions of a Zen version aggregated in time buckets, from 'since'
+        to 'until' (ISO 8601, defaults to the last 7 days). 'bucket' is one of minute, hour,
+        day, week or month (defaults to hour).
+
+        The response is columnar, every metric is a list with a value per bucket, buckets
+        without executions are not returned:
+        - start
+        - count
+        - error_count
+        - error_rate
+        - mean_execution_time_ms
+        - min_execution_time_ms
+        - max_execution_time_ms
+        """
+        query = StatisticsSeriesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        since, until, bucket = (query.validated_data['since'],
+                                query.validated_data['until'],
+                                query.validated_data['bucket'])
+
+        zens = self.get_zens(collection, name, version)
+        if not zens.exists():
+            raise ZenDoesNotExistError()
+
+        buckets = (Execution.objects
+                   .filter(zen__in=zens, started_at__gte=since, started_at__lt=until)
+                   .annotate(start=Trunc('started_at', bucket))
+                   .values('start')
+                   .annotate(count=Count('id'),
+                             error_count=Count('id', filter=Q(state__in=[
+                                 Execution.State.INVALID,
+                                 Execution.State.TIMEOUT,
+                                 Execution.State.CANCELLED
+                             ])),
+                             mean_execution_time_ms=Avg('total_time'),
+                             min_execution_time_ms=Min('total_time'),
+                             max_execution_time_ms=Max('total_time'))
+                   .order_by('start'))
+
+        series = {column: [] for column in self.COLUMNS}
+        for row in buckets:
+            row['error_rate'] = row['error_count'] / row['count']
+            for column, values in series.items():
+                values.append(row[column])
+
+        return Response({'since': since, 'until': until, 'bucket': bucket, **series},
+                        status=status.HTTP_200_OK)
@@ -1,17 +1,31 @@
 """ABC for QueryZen Database drivers."""
 
 import abc
+import contextlib
 import dataclasses
+import datetime
+import decimal
+import hashlib
 import logging
-import re
+import os
+import typing
+import uuid
 
 import sqlite3
 
 import httpx
 
+from databases.control import QueryControl
+from databases.pool import ConnectionPool, PoolOptions, PooledConnection
+from databases.template import compile_template
+
 logger = logging.getLogger(__name__)
 
 
+# First column of the results of ``execute_query_many``, the index of the parameter set of a row.
+PARAMETER_SET_COLUMN = 'parameter_set'
+
+
 class DatabaseError(Exception):
     # Todo move exception to right place and rename it.
     pass
@@ -24,57 +38,432 @@ class DatabaseResponse:
     columns: list
     query: str
     row_count: int = 0
+    # The offset of the next page if the response is a page of the result and there are more rows.
+    next_offset: int | None = None
+
+
+@dataclasses.dataclass
+class DatabaseStream:
+    """Represents a streamed Response from a Database call, rows are fetched lazily in batches
+    while iterating ``batches``"""
+    columns: list
+    query: str
+    batches: typing.Iterator[list]
 
 
 class Database(abc.ABC):
-    """Base class for all Databases """
-    connection = None
+    """Base class for all Databases
+
+    Drivers that hold connections implement ``connect`` and take them from ``pool``, the pool is
+    created lazily once per process, so databases can be configured at settings import time
+    and be safely forked by celery prefork workers.
+
+    Args:
+        pool: The options of the connection pool.
+    """
+
+    def __init__(self, pool: PoolOptions | None = None):
+        self.pool_options = pool or PoolOptions()
+        self._pool: ConnectionPool | None = None
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """The connection pool of the current process."""
+        if self._pool is None or self._pool.pid != os.getpid():
+            # A pool inherited from a parent process is dropped without closing its connections,
+            # they are still in use by the parent.
+            self._pool = ConnectionPool(connect=self.connect,
+                                        close=self.close_connection,
+                                        check=self.check_connection,
+                                        options=self.pool_options)
+        return self._pool
+
+    def connect(self):
+        """Opens a new connection, drivers that use the connection pool implement it."""
+        raise NotImplementedError(f'{self!r} does not support connections')
+
+    def close_connection(self, connection) -> None:
+        connection.close()
+
+    def check_connection(self, connection) -> bool:
+        """Returns whether a connection is still usable, used by the pool health checks."""
+        try:
+            connection.cursor().execute('SELECT 1')
+        except Exception:  # pylint: disable=W0718
+            return False
+        return True
 
     def prepare_query(self, query: str, parameters):
-        """Prepares the query with parameters."""
+        """Prepares the query with parameters, the values are inlined in the query, it is only
+        used to represent the query that was run, e.g. in ``Execution.query``."""
         return safe_sql_replace(query, parameters)
 
-    def execute_query(self, query: str, parameters: dict) -> DatabaseResponse:
+    def execute_query(self,
+                      query: str,
+                      parameters: dict,
+                      control: QueryControl | None = None) -> DatabaseResponse:
         """Prepares the context and calls run_query, if you are implementing a Driver, do not
-        touch this one
+        touch this one.
+
+        Raises:
+            QueryTimeoutError: If the query did not finish in the timeout of ``control``.
+            QueryCancelledError: If the query was cancelled through ``control``.
         """
-        query = self.prepare_query(query, parameters)
-        context = dict(raw_query=query, parameters=dict)
-        return self.run_query(context, query)
+        rendered_query = self.prepare_query(query, parameters)
+        context = dict(raw_query=query, parameters=parameters, control=control or QueryControl())
+        response = self.run_query(context, query)
+        response.query = rendered_query
+        return response
+
+    def execute_query_stream(self,
+                             query: str,
+                             parameters: dict,
+                             batch_size: int,
+                             control: QueryControl | None = None) -> DatabaseStream:
+        """Same as ``execute_query`` but rows are returned in batches of ``batch_size``,
+        if you are implementing a Driver, do not touch this one.
+        """
+        rendered_query = self.prepare_query(query, parameters)
+        context = dict(raw_query=query, parameters=parameters, control=control or QueryControl())
+        stream = self.stream_query(context, query, batch_size)
+        stream.query = rendered_query
+        return stream
+
+    def execute_query_page(self,
+                           query: str,
+                           parameters: dict,
+                           offset: int,
+                           limit: int,
+                           control: QueryControl | None = None) -> DatabaseResponse:
+        """Same as ``execute_query`` but only ``limit`` rows starting at ``offset`` are returned,
+        ``next_offset`` of the response is the offset of the next page, None if it is the last.
+        If you are implementing a Driver, do not touch this one.
+        """
+        rendered_query = self.prepare_query(query, parameters)
+        context = dict(raw_query=query,
+                       parameters=parameters,
+                       offset=offset,
+                       limit=limit,
+                       control=control or QueryControl())
+        response = self.run_query_page(context, query)
+        response.query = rendered_query
+        return response
+
+    def execute_query_many(self,
+                           query: str,
+                           parameter_sets: list[dict],
+                           control: QueryControl | None = None) -> DatabaseResponse:
+        """Runs the query once per parameter set, in one connection. Rows are tagged with the
+        index of their parameter set in the first column, ``PARAMETER_SET_COLUMN``.
+
+        The query of the response is the raw query, if you are implementing a Driver, do not
+        touch this one.
+        """
+        context = dict(raw_query=query,
+                       parameter_sets=parameter_sets,
+                       control=control or QueryControl())
+        response = self.run_query_many(context, query)
+        response.query = query
+        return response
 
     @abc.abstractmethod
     def run_query(self, context, query) -> DatabaseResponse:
-        """The method for Database drivers to implement."""
+        """The method for Database drivers to implement.
+
+        Args:
+            context: The context of the execution, ``context['parameters']`` are the parameters
+                that have to be bound to the query. ``context['control']`` is the
+                ``QueryControl`` of the query, drivers stop the query when it times out or is
+                cancelled and raise ``control.error()``.
+            query: The query, parameters are in the form of ``:param``, use ``bind_parameters``
+                to translate them to the style of the driver, it also inlines ``IDENT(:param)``.
+        """
         pass
 
-
-class SQLiteDatabase(Database):
-    """Sqlite 3"""
-
-    def __init__(self, database, *args, **kwargs):
-        self.connection = sqlite3.connect(database, *args, **kwargs)
-
-    def run_query(self, context, query) -> DatabaseResponse:
+    def run_query_many(self, context, query) -> DatabaseResponse:
+        """The method for Database drivers to implement if they can run many parameter sets at
+        once, ``context['parameter_sets']``, by default ``run_query`` is called once per set.
+        Use ``merge_responses`` to tag the rows.
+        """
+        return merge_responses(query, [self.run_query({**context, 'parameters': parameters},
+                                                      query)
+                                       for parameters in context['parameter_sets']])
+
+    def run_query_page(self, context, query) -> DatabaseResponse:
+        """The method for Database drivers to implement if they can fetch a page of the rows,
+        ``context['offset']`` and ``context['limit']``, without fetching all of them, by default
+        the whole result is fetched with ``run_query`` and then sliced. Use ``page_response``
+        to build the response.
         """
-        Executes a SQL statement and returns the resulting cursor.
+        response = self.run_query(context, query)
+        offset, limit = context['offset'], context['limit']
+        return page_response(query,
+                             response.columns,
+                             response.rows[offset:offset + limit + 1],
+                             offset,
+                             limit)
+
+    def stream_query(self, context, query, batch_size: int) -> DatabaseStream:
+        """The method for Database drivers to implement if they can fetch rows lazily, by default
+        the whole result is fetched with ``run_query`` and then split in batches.
         """
-        columns = []
-        cursor = self.connection.cursor()
-        result = cursor.execute(query)
-        rows = result.fetchall()
-        if cursor.description:
-            columns = [x for xs in cursor.description for x in xs if x is not None]
-        cursor.close()
+        response = self.run_query(context, query)
+        batches = (response.rows[i:i + batch_size]
+                   for i in range(0, len(response.rows), batch_size))
+        return DatabaseStream(columns=response.columns,
+                              query=response.query,
+                              batches=batches)
+
+
+class DBAPIDatabase(Database):
+    """Base class for drivers following the Python DB-API (PEP 249), queries run in a transaction
+    that is committed after fetching the rows, or rolled back on error."""
+    paramstyle = 'named'
+
+    def get_columns(self, description) -> list:
+        return [col[0] for col in description] if description else []
+
+    def open_cursor(self, connection):
+        """Opens the cursor used to stream results."""
+        return connection.cursor()
+
+    def interrupt(self, connection) -> None:
+        """Interrupts the query running in a connection, it is called from another thread,
+        drivers that can stop a running query implement it."""
+
+    @contextlib.contextmanager
+    def guard(self,
+              connection,
+              cursor,  # pylint: disable=W0613
+              control: QueryControl) -> typing.Iterator[None]:
+        """Stops the statements run in the context when ``control`` times out or is cancelled,
+        drivers can override it to enforce the timeout in the database."""
+        with control.watch(lambda: self.interrupt(connection)):
+            yield
+
+    def execute(self,
+                pooled: PooledConnection,  # pylint: disable=W0613
+                cursor,
+                query: str,
+                parameters: dict) -> None:
+        """Executes the query binding the parameters, drivers can override it
+        to use prepared statements, e.g. kept in ``pooled.info``."""
+        cursor.execute(*bind_parameters(query, parameters, self.paramstyle))
+
+    def skip_rows(self, cursor, count: int) -> None:
+        """Skips the next ``count`` rows of a cursor opened with ``open_cursor``, drivers with
+        scrollable cursors override it so the rows are not sent to us."""
+        while count > 0:
+            skipped = len(cursor.fetchmany(min(count, 1000)))
+            if not skipped:
+                return
+            count -= skipped
+
+    def execute_many(self, cursor, query: str, parameter_sets: list[dict]) -> None:
+        """Executes a statement without result, e.g. an insert, once per parameter set,
+        the query has to be static, check ``QueryTemplate.is_static``."""
+        sql, _ = bind_parameters(query, parameter_sets[0], self.paramstyle)
+        cursor.executemany(sql, [bind_parameters(query, parameters, self.paramstyle)[1]
+                                 for parameters in parameter_sets])
+
+    def run_query_many(self, context, query) -> DatabaseResponse:
+        parameter_sets = context['parameter_sets']
+        control: QueryControl = context['control']
+        is_static = compile_template(query).is_static
+        responses = []
+
+        with self.pool.connection() as pooled:
+            connection = pooled.connection
+            try:
+                cursor = connection.cursor()
+                with self.guard(connection, cursor, control):
+                    for index, parameters in enumerate(parameter_sets):
+                        if index and not responses[0].columns and is_static:
+                            # Statements without result are sent at once.
+                            self.execute_many(cursor, query, parameter_sets[index:])
+                            break
+
+                        self.execute(pooled, cursor, query, parameters)
+                        rows = cursor.fetchall() if cursor.description else []
+                        responses.append(DatabaseResponse(
+                            rows=rows,
+                            columns=self.get_columns(cursor.description),
+                            query=query,
+                            row_count=len(rows)
+                        ))
+                cursor.close()
+                connection.commit()
+            except Exception as e:
+                connection.rollback()
+                if control.should_stop():
+                    raise control.error() from e
+                raise
+
+        return merge_responses(query, responses)
+
+    def run_query(self, context, query) -> DatabaseResponse:
+        control: QueryControl = context['control']
+        with self.pool.connection() as pooled:
+            connection = pooled.connection
+            try:
+                cursor = connection.cursor()
+                with self.guard(connection, cursor, control):
+                    self.execute(pooled, cursor, query, context['parameters'])
+                    rows = cursor.fetchall()
+                columns = self.get_columns(cursor.description)
+                cursor.close()
+                connection.commit()
+            except Exception as e:
+                connection.rollback()
+                if control.should_stop():
+                    raise control.error() from e
+                raise
 
         return DatabaseResponse(columns=columns,
                                 rows=rows,
                                 query=query,
                                 row_count=len(rows))
 
+    def run_query_page(self, context, query) -> DatabaseResponse:
+        offset, limit = context['offset'], context['limit']
+        control: QueryControl = context['control']
+        with self.pool.connection() as pooled:
+            connection = pooled.connection
+            try:
+                with self.guard(connection, connection.cursor(), control):
+                    cursor = self.open_cursor(connection)
+                    cursor.execute(*bind_parameters(query, context['parameters'],
+                                                    self.paramstyle))
+                    self.skip_rows(cursor, offset)
+                    # One more row tells whether there is a next page.
+                    rows = cursor.fetchmany(limit + 1)
+                columns = self.get_columns(cursor.description)
+                cursor.close()
+                connection.commit()
+            except Exception as e:
+                connection.rollback()
+                if control.should_stop():
+                    raise control.error() from e
+                raise
+
+        return page_response(query, columns, rows, offset, limit)
+
+    def stream_query(self, context, query, batch_size: int) -> DatabaseStream:
+        control: QueryControl = context['control']
+        # The connection is held, and the query guarded, until all the batches are fetched.
+        stack = contextlib.ExitStack()
+        pooled: PooledConnection = stack.enter_context(self.pool.connection())
+        connection = pooled.connection
+
+        try:
+            stack.enter_context(self.guard(connection, connection.cursor(), control))
+            cursor = self.open_cursor(connection)
+            cursor.execute(*bind_parameters(query, context['parameters'], self.paramstyle))
+            # Some cursors only have a description after the first fetch.
+            first_batch = cursor.fetchmany(batch_size)
+            columns = self.get_columns(cursor.description)
+        except BaseException as e:
+            connection.rollback()
+            stack.close()
+            if control.should_stop():
+                raise control.error() from e
+            raise
+
+        def batches():
+            with stack:
+                try:
+                    rows = first_batch
+                    while rows:
+                        yield rows
+                        rows = cursor.fetchmany(batch_size)
+                    cursor.close()
+                    connection.commit()
+                except BaseException as e:
+                    connection.rollback()
+                    if control.should_stop():
+                        raise control.error() from e
+                    raise
+
+        return DatabaseStream(columns=columns,
+                              query=query,
+                              batches=batches())
+
+
+class SQLiteDatabase(DBAPIDatabase):
+    """Sqlite 3
+
+    SQLite caches the compiled statements of every connection (``cached_statements``), as the
+    parameters are bound, runs of the same Zen reuse the compiled statement.
+    """
+    # Virtual machine instructions between checks of the timeout of a query.
+    PROGRESS_STEPS = 10_000
+
+    def __init__(self, database, *args, pool: PoolOptions | None = None, **kwargs):
+        super().__init__(pool=pool)
+        # Pooled connections are used by one thread at a time, but not always the same one.
+        kwargs.setdefault('check_same_thread', False)
+        self.database = database
+        self.connect_args = args
+        self.connect_kwargs = kwargs
+
+    def connect(self):
+        return sqlite3.connect(self.database, *self.connect_args, **self.connect_kwargs)
+
+    def interrupt(self, connection) -> None:
+        connection.interrupt()
+
+    @contextlib.contextmanager
+    def guard(self, connection, cursor, control: QueryControl) -> typing.Iterator[None]:
+        # The progress handler is called every PROGRESS_STEPS virtual machine instructions,
+        # a non-zero value interrupts the query.
+        connection.set_progress_handler(control.should_stop, self.PROGRESS_STEPS)
+        try:
+            with super().guard(connection, cursor, control):
+                yield
+        finally:
+            connection.set_progress_handler(None, 0)
+
+
+def bind_parameters(sql: str, parameters: dict, paramstyle: str) -> tuple[str, dict | list]:
+    """Returns the statement and the parameters to pass to a driver, in the given paramstyle,
+    check ``QueryTemplate.bind``.
+
+    Examples:
+        >>> bind_parameters('select :a, :b', {'a': 1, 'b': 2}, 'qmark')
+        ('select ?, ?', [1, 2])
+    """
+    return compile_template(sql).bind(parameters or {}, paramstyle)
+
+
+def merge_responses(query: str, responses: list[DatabaseResponse]) -> DatabaseResponse:
+    """Merges the responses of running a query with several parameter sets, rows are tagged with
+    the index of their response in the first column, ``PARAMETER_SET_COLUMN``."""
+    columns = next((response.columns for response in responses if response.columns), [])
+    rows = [[index, *row] for index, response in enumerate(responses) for row in response.rows]
+    return DatabaseResponse(columns=[PARAMETER_SET_COLUMN, *columns] if columns else [],
+                            rows=rows,
+                            query=query,
+                            row_count=len(rows))
+
+
+def page_response(query: str,
+                  columns: list,
+                  rows: list,
+                  offset: int,
+                  limit: int) -> DatabaseResponse:
+    """Returns the response of a page of ``limit`` rows, ``rows`` are the rows fetched from
+    ``offset``, up to ``limit + 1`` so it is known whether there is a next page."""
+    has_next = len(rows) > limit
+    rows = list(rows[:limit])
+    return DatabaseResponse(columns=columns,
+                            rows=rows,
+                            query=query,
+                            row_count=len(rows),
+                            next_offset=offset + limit if has_next else None)
+
 
 def safe_sql_replace(sql: str,
                      parameters: dict,
-                     char_delimiter: str = ':',
                      quote_ident_with: str = '"') -> str:
     """Replaces parameters in an SQL statement with values from a dictionary.
 
@@ -84,7 +473,6 @@ def safe_sql_replace(sql: str,
     Args:
         sql: The SQL statement with :parameter placeholders.
         parameters: Dictionary containing parameter names and values.
-        char_delimiter: Character prefix for placeholders (default: ':').
         quote_ident_with: Character for quoting IDENT values (default: '"').
 
     Raises:
@@ -98,92 +486,238 @@ def safe_sql_replace(sql: str,
         ... :var1 and t.name = :var2', {'col': 'col1', 'var1': 1, 'var2': 'somename'})
         select "col1" FROM tbl1 t WHERE t.value = 1 and t.name = 'somecol'
     """
-
-    def format_value(value):
-        """Formats the value inside the string depending on type."""
-        if isinstance(value, str):
-            # Escape single quotes.
-            value = value.replace("'", "''")
-
-            # Wrap the value in single quotes
-            replacement = f"'{value}'"
-            return replacement
-
-        if isinstance(value, (int, float)):
-            return str(value)
-
-        if value is None:
-            return 'NULL'
-
-        raise ValueError(f'unsupported parameter type: {type(value)}')
-
-    for key, value in parameters.items():
-        replacement = format_value(value)
-        to_replace = char_delimiter + key
-
-        # Replace FIELD(:value) with quoted value
-        sql = re.sub(rf'IDENT\({to_replace}\)',
-                     replacement.replace("'", quote_ident_with),
-                     sql)
-
-        # Replace :value with actual value
-        sql = re.sub(rf'(?<!\w){to_replace}(?!\w)',
-                     replacement,
-                     sql)
-
-    return sql
+    return compile_template(sql).render(parameters, quote_ident_with)
 
 
 class CrateDatabase(Database):
-    """CrateDB"""
+    """CrateDB
 
-    def run_query(self, context, query):
-        response = httpx.post('http://crate:4200/_sql',
-                              json={'stmt': query})
+    CrateDB is queried over HTTP, every process keeps one ``httpx.Client`` whose keep-alive
+    connections are reused, it holds at most ``pool.max_size`` connections.
+    """
+    # Statements that are paginated with LIMIT/OFFSET.
+    PAGEABLE = ('SELECT', 'WITH', 'VALUES')
+
+    def __init__(self, url: str = 'http://crate:4200', pool: PoolOptions | None = None):
+        super().__init__(pool=pool)
+        self.url = url
+        self._client: httpx.Client | None = None
+        self._client_pid: int | None = None
+
+    @property
+    def client(self) -> httpx.Client:
+        """The http client of the current process."""
+        if self._client is None or self._client_pid != os.getpid():
+            self._client = httpx.Client(
+                base_url=self.url,
+                timeout=self.pool_options.timeout,
+                limits=httpx.Limits(max_connections=self.pool_options.max_size,
+                                    max_keepalive_connections=self.pool_options.max_size,
+                                    keepalive_expiry=self.pool_options.check_after)
+            )
+            self._client_pid = os.getpid()
+        return self._client
+
+    def post(self, payload: dict, control: QueryControl | None = None) -> dict:
+        """Runs a statement, if ``control`` times out or is cancelled the statement is killed."""
+        control = control or QueryControl()
+        if control.can_stop:
+            # Runs of a Zen share their statement, the job of this one is told apart by a unique
+            # comment, check ``kill``.
+            stmt = payload['stmt']
+            payload = {**payload, 'stmt': f'/* queryzen:{uuid.uuid4().hex} */ {stmt}'}
+        with control.watch(lambda: self.kill(payload['stmt'])):
+            response = self.client.post('/_sql', json=payload)
 
         data = response.json()
-        if response.is_success:
-            return DatabaseResponse(columns=data.get('cols'),
-                                    rows=data.get('rows'),
-                                    query=query,
-                                    row_count=data.get('rowcount'))
-        else:
-            raise DatabaseError(response.json().get('error').get('message'))
+        if not response.is_success:
+            if control.should_stop():
+                raise control.error()
+            raise DatabaseError(data.get('error').get('message'))
+        return data
+
+    def kill(self, stmt: str) -> None:
+        """Kills the job running a statement, CrateDB only returns the id of a job once it
+        finished, so it is looked up by its statement, which is unique, check ``post``. If the
+        job already finished, nothing is killed."""
+        data = self.post({'stmt': 'SELECT id FROM sys.jobs WHERE stmt = ?', 'args': [stmt]})
+        for (job_id,) in data.get('rows') or []:
+            self.post({'stmt': 'KILL ?', 'args': [job_id]})
 
-
-class PostgresDatabase(Database):
-    """PostgresSQL"""
-
-    def __init__(self, database, user, password, host, port, *args, **kwargs):
+    def run_query(self, context, query):
+        # CrateDB caches the plans of parametrized statements.
+        stmt, args = bind_parameters(query, context['parameters'], 'qmark')
+        data = self.post({'stmt': stmt, 'args': args}, context['control'])
+        return DatabaseResponse(columns=data.get('cols'),
+                                rows=data.get('rows'),
+                                query=query,
+                                row_count=data.get('rowcount'))
+
+    def run_query_page(self, context, query):
+        stmt, args = bind_parameters(query, context['parameters'], 'qmark')
+        stmt = stmt.strip().rstrip(';')
+        if not stmt.upper().startswith(self.PAGEABLE):
+            return super().run_query_page(context, query)
+
+        # The page is cut by CrateDB, the query should be ordered so pages are stable.
+        offset, limit = context['offset'], context['limit']
+        data = self.post({'stmt': f'SELECT * FROM ({stmt}) AS queryzen_page LIMIT ? OFFSET ?',
+                          'args': [*args, limit + 1, offset]},
+                         context['control'])
+        return page_response(query, data.get('cols'), data.get('rows'), offset, limit)
+
+    def run_query_many(self, context, query):
+        parameter_sets = context['parameter_sets']
+        first = self.run_query({**context, 'parameters': parameter_sets[0]}, query)
+
+        if first.columns or not compile_template(query).is_static:
+            return merge_responses(query, [first, *(
+                self.run_query({**context, 'parameters': parameters}, query)
+                for parameters in parameter_sets[1:]
+            )])
+
+        if len(parameter_sets) > 1:
+            # Statements without result are sent at once as a bulk operation.
+            stmt, _ = bind_parameters(query, parameter_sets[1], 'qmark')
+            data = self.post({'stmt': stmt,
+                              'bulk_args': [bind_parameters(query, parameters, 'qmark')[1]
+                                            for parameters in parameter_sets[1:]]},
+                             context['control'])
+            # Failed operations of a bulk have a row count of -2.
+            if failed := [i + 1 for i, result in enumerate(data.get('results', []))
+                          if result.get('rowcount') == -2]:
+                raise DatabaseError(f'The statement failed for the parameter sets {failed}')
+        return merge_responses(query, [first])
+
+
+class PostgresDatabase(DBAPIDatabase):
+    """PostgresSQL
+
+    Parametrized queries are run as prepared statements, every connection prepares a query once
+    and then executes it with different parameters, so it is only planned once. The parameters are
+    declared with the types of their values, if postgres rejects the statement, e.g. a text is
+    compared to a date, the query is run with the values bound by psycopg2 instead.
+    """
+    paramstyle = 'pyformat'
+
+    # Statements that can be prepared.
+    PREPARABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'VALUES')
+    # Max prepared statements kept by a connection.
+    MAX_PREPARED = 256
+    # Types of the parameters of prepared statements, by python type, in the order they are
+    # checked, e.g. bool is an int. Statements with other values are not prepared.
+    PARAMETER_TYPES = ((bool, 'boolean'),
+                       (int, 'bigint'),
+                       (float, 'double precision'),
+                       (decimal.Decimal, 'numeric'),
+                       (str, 'text'),
+                       (datetime.datetime, 'timestamp'),
+                       (datetime.date, 'date'))
+
+    def __init__(self,
+                 database,
+                 user,
+                 password,
+                 host,
+                 port,
+                 *args,
+                 pool: PoolOptions | None = None,
+                 **kwargs):
+        super().__init__(pool=pool)
         try:
             import psycopg2 # pylint: disable=C0415
         except ModuleNotFoundError as e:
             raise Exception( # pylint: disable=W0719 broad-exception
-                f"Trying to use {self!r} without the appropriate driver installed"
+                f'Trying to use {self!r} without the appropriate driver installed'
             ) from e
 
-        self.connection = psycopg2.connect(
-            dbname=database,
-            user=user,
-            password=password,
-            host=host,
-            port=port,
-            *args,
-            **kwargs
-        )
-
-    def run_query(self, context, query) -> DatabaseResponse:
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        rows = cursor.fetchall()
-
-        columns = [col[0] for col in cursor.description] if cursor.description else []
-
-        cursor.close()
-
-        return DatabaseResponse(
-            columns=columns,
-            rows=rows,
-            query=query,
-            row_count=len(rows)
-        )
+        self.psycopg2 = psycopg2
+        self.connect_args = args
+        self.connect_kwargs = dict(dbname=database,
+                                   user=user,
+                                   password=password,
+                                   host=host,
+                                   port=port,
+                                   **kwargs)
+
+    def connect(self):
+        return self.psycopg2.connect(*self.connect_args, **self.connect_kwargs)
+
+    def check_connection(self, connection) -> bool:
+        return not connection.closed and super().check_connection(connection)
+
+    def interrupt(self, connection) -> None:
+        connection.cancel()
+
+    @contextlib.contextmanager
+    def guard(self, connection, cursor, control: QueryControl) -> typing.Iterator[None]:
+        # The timeout is also enforced by postgres, it only lasts until the end of the transaction.
+        if (remaining := control.remaining()) is not None:
+            cursor.execute(f'SET LOCAL statement_timeout = {max(int(remaining * 1000), 1)}')
+        with super().guard(connection, cursor, control):
+            yield
+
+    def parameter_type(self, value) -> str | None:
+        """Returns the postgres type of a parameter, None if it is not in ``PARAMETER_TYPES``."""
+        for python_type, postgres_type in self.PARAMETER_TYPES:
+            if isinstance(value, python_type):
+                if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+                    return 'timestamptz'
+                return postgres_type
+        return None
+
+    def execute(self, pooled: PooledConnection, cursor, query: str, parameters: dict) -> None:
+        sql, args = bind_parameters(query, parameters, 'numeric')
+        types = [self.parameter_type(arg) for arg in args]
+        # Statements that postgres did not prepare, they are run without it.
+        rejected: set = pooled.info.setdefault('rejected', set())
+        prepared: set = pooled.info.setdefault('prepared', set())
+        # The same query is prepared once per types of its parameters.
+        key = f'{sql} {types}'
+        name = f'queryzen_{hashlib.md5(key.encode()).hexdigest()}'
+
+        if name not in prepared:
+            can_prepare = (args
+                           and None not in types
+                           and name not in rejected
+                           and len(prepared) < self.MAX_PREPARED
+                           and sql.lstrip().upper().startswith(self.PREPARABLE))
+            if not can_prepare:
+                super().execute(pooled, cursor, query, parameters)
+                return
+
+            # A failed statement aborts the transaction, unless it is rolled back to a savepoint.
+            declared_types = ', '.join(types)
+            cursor.execute('SAVEPOINT queryzen_prepare')
+            try:
+                cursor.execute(f'PREPARE {name} ({declared_types}) AS {sql}')
+            except (self.psycopg2.ProgrammingError, self.psycopg2.DataError) as e:
+                cursor.execute('ROLLBACK TO SAVEPOINT queryzen_prepare')
+                logger.debug('Could not prepare %s: %s', name, e)
+                if len(rejected) < self.MAX_PREPARED:
+                    rejected.add(name)
+                super().execute(pooled, cursor, query, parameters)
+                return
+            cursor.execute('RELEASE SAVEPOINT queryzen_prepare')
+            prepared.add(name)
+
+        placeholders = ', '.join(['%s'] * len(args))
+        cursor.execute(f'EXECUTE {name} ({placeholders})', args)
+
+    def execute_many(self, cursor, query: str, parameter_sets: list[dict]) -> None:
+        # Sends the statements in pages instead of one round trip per parameter set.
+        import psycopg2.extras  # pylint: disable=C0415
+        sql, _ = bind_parameters(query, parameter_sets[0], self.paramstyle)
+        psycopg2.extras.execute_batch(cursor, sql, [
+            bind_parameters(query, parameters, self.paramstyle)[1]
+            for parameters in parameter_sets
+        ])
+
+    def open_cursor(self, connection):
+        # A named cursor is a server-side cursor, rows are only sent to us when fetched.
+        return connection.cursor(name=f'queryzen_{uuid.uuid4().hex}')
+
+    def skip_rows(self, cursor, count: int) -> None:
+        # MOVE in the server-side cursor, the skipped rows are not sent to us.
+        if count:
+            cursor.scroll(count)
@@ -0,0 +1,107 @@
+"""Timeouts and cancellation of the queries run by QueryZen Database drivers."""
+import contextlib
+import logging
+import threading
+import time
+import typing
+
+logger = logging.getLogger(__name__)
+
+# Reason of a cancellation because the caller stopped waiting, check ``QueryControl``.
+TIMEOUT_REASON = 'timeout'
+
+
+class QueryInterruptedError(Exception):
+    """The query was stopped before it finished."""
+
+
+class QueryTimeoutError(QueryInterruptedError):
+    """The query did not finish in time."""
+
+
+class QueryCancelledError(QueryInterruptedError):
+    """The query was cancelled."""
+
+
+class QueryControl:
+    """The timeout and cancellation of a query.
+
+    Drivers enforce the timeout in the database when they can, e.g. Postgres
+    ``statement_timeout``, and abort the query with ``watch``, which checks from a thread
+    whether the query has to stop.
+
+    Args:
+        timeout: Seconds the query can run, None for no timeout.
+        get_cancel_reason: Callable that returns why the query was cancelled, None if it was not,
+            it is polled every ``poll_interval`` seconds while the query runs.
+        poll_interval: Seconds between checks of ``watch``.
+
+    Examples:
+        >>> control = QueryControl(timeout=0.5)
+        >>> with control.watch(connection.interrupt):
+        ...     cursor.execute('select * from big_table')
+    """
+
+    def __init__(self,
+                 timeout: float | None = None,
+                 get_cancel_reason: typing.Callable[[], str | None] | None = None,
+                 poll_interval: float = 0.1):
+        self.timeout = timeout
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.get_cancel_reason = get_cancel_reason
+        self.poll_interval = poll_interval
+        self.cancel_reason: str | None = None
+
+    @property
+    def can_stop(self) -> bool:
+        """Whether the query can be stopped, because it has a timeout or can be cancelled."""
+        return self.deadline is not None or self.get_cancel_reason is not None
+
+    @property
+    def timed_out(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> float | None:
+        """Seconds until the timeout, None if there is no timeout."""
+        return None if self.deadline is None else max(self.deadline - time.monotonic(), 0)
+
+    def should_stop(self) -> bool:
+        """Whether the query has to stop, it is cheap, it can be called very often."""
+        return self.cancel_reason is not None or self.timed_out
+
+    def error(self) -> QueryInterruptedError:
+        """The error of a query that was stopped."""
+        if self.timed_out or self.cancel_reason == TIMEOUT_REASON:
+            return QueryTimeoutError(f'The query timed out after {self.timeout} seconds')
+        return QueryCancelledError('The query was cancelled')
+
+    @contextlib.contextmanager
+    def watch(self, abort: typing.Callable[[], None] | None = None) -> typing.Iterator[None]:
+        """Checks from a thread whether the query has to stop while the context runs, and
+        then calls ``abort`` once, which has to interrupt the query."""
+        if not self.can_stop:
+            yield
+            return
+
+        done = threading.Event()
+
+        def watcher():
+            while not done.wait(self.poll_interval):
+                if self.get_cancel_reason is not None and self.cancel_reason is None:
+                    try:
+                        self.cancel_reason = self.get_cancel_reason()
+                    except Exception as e:  # pylint: disable=W0718
+                        # The timeout is still enforced.
+                        logger.warning('Could not check if the query was cancelled: %r', e)
+                if self.should_stop():
+                    if abort is not None:
+                        abort()
+                    return
+
+        thread = threading.Thread(target=watcher, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
@@ -0,0 +1,157 @@
+"""Connection pool for QueryZen Database drivers."""
+import collections
+import contextlib
+import dataclasses
+import logging
+import os
+import threading
+import time
+import typing
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """No connection was available in the pool in time."""
+
+
+@dataclasses.dataclass
+class PoolOptions:
+    """Options of a ``ConnectionPool``
+
+    Args:
+        min_size: Connections that are opened when the pool is first used.
+        max_size: Max connections that can be open at the same time.
+        max_lifetime: Seconds after which a connection is closed and replaced.
+        timeout: Seconds to wait for a connection when all of them are in use.
+        check_after: Seconds a connection can be idle before it is health checked
+            when taken from the pool.
+    """
+    min_size: int = 0
+    max_size: int = 5
+    max_lifetime: float = 60 * 60
+    timeout: float = 30
+    check_after: float = 30
+
+
+@dataclasses.dataclass
+class PooledConnection:
+    """A connection that lives in a ``ConnectionPool``, ``info`` keeps driver state that lives as
+    long as the connection, e.g. prepared statements."""
+    connection: typing.Any
+    created_at: float = dataclasses.field(default_factory=time.monotonic)
+    last_used_at: float = dataclasses.field(default_factory=time.monotonic)
+    info: dict = dataclasses.field(default_factory=dict)
+
+    def is_expired(self, max_lifetime: float) -> bool:
+        return time.monotonic() - self.created_at > max_lifetime
+
+
+class ConnectionPool:
+    """A thread safe pool of connections.
+
+    Connections are opened lazily, a pool must not be shared across processes, check
+    ``Database.pool`` which creates one pool per process.
+
+    Args:
+        connect: Callable that opens a new connection.
+        close: Callable that closes a connection.
+        check: Callable that returns whether a connection is still usable.
+        options: The options of the pool.
+    """
+
+    def __init__(self,
+                 connect: typing.Callable[[], typing.Any],
+                 close: typing.Callable[[typing.Any], None],
+                 check: typing.Callable[[typing.Any], bool],
+                 options: PoolOptions):
+        self._connect = connect
+        self._close = close
+        self._check = check
+        self.options = options
+        self.pid = os.getpid()
+
+        self._idle: collections.deque[PooledConnection] = collections.deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(options.max_size)
+        self._filled = False
+
+    def _discard(self, pooled: PooledConnection) -> None:
+        try:
+            self._close(pooled.connection)
+        except Exception as e:  # pylint: disable=W0718
+            logger.warning('Could not close pooled connection: %r', e)
+
+    def _fill(self) -> None:
+        """Opens ``min_size`` connections, only the first time the pool is used."""
+        with self._lock:
+            if self._filled:
+                return
+            self._filled = True
+            for _ in range(self.options.min_size):
+                self._idle.append(PooledConnection(self._connect()))
+
+    def _take(self) -> PooledConnection:
+        """Takes a usable connection from the idle ones or opens a new one."""
+        while True:
+            with self._lock:
+                pooled = self._idle.popleft() if self._idle else None
+
+            if pooled is None:
+                return PooledConnection(self._connect())
+
+            if pooled.is_expired(self.options.max_lifetime):
+                self._discard(pooled)
+                continue
+
+            if time.monotonic() - pooled.last_used_at > self.options.check_after:
+                if not self._check(pooled.connection):
+                    self._discard(pooled)
+                    continue
+
+            return pooled
+
+    def _give_back(self, pooled: PooledConnection, needs_check: bool = False) -> None:
+        if pooled.is_expired(self.options.max_lifetime):
+            self._discard(pooled)
+            return
+
+        # Connections that need a check are health checked the next time they are taken.
+        pooled.last_used_at = float('-inf') if needs_check else time.monotonic()
+        with self._lock:
+            self._idle.append(pooled)
+
+    @contextlib.contextmanager
+    def connection(self) -> typing.Iterator[PooledConnection]:
+        """Takes a connection from the pool, and gives it back when the context exits.
+
+        Examples:
+            >>> with pool.connection() as pooled:
+            ...     pooled.connection.execute('select 1')
+
+        Raises:
+            PoolTimeoutError: If all the connections are in use for ``options.timeout`` seconds.
+        """
+        if not self._slots.acquire(timeout=self.options.timeout):
+            raise PoolTimeoutError(f'No connection available after {self.options.timeout}'
+                                   f' seconds, max_size={self.options.max_size}')
+        try:
+            if not self._filled:
+                self._fill()
+
+            pooled = self._take()
+            try:
+                yield pooled
+            except BaseException:
+                # We do not know in what state the connection is.
+                self._give_back(pooled, needs_check=True)
+                raise
+            self._give_back(pooled)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Closes all the idle connections."""
+        with self._lock:
+            while self._idle:
+                self._discard(self._idle.popleft())
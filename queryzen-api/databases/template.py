@@ -0,0 +1,201 @@
+"""
+Compiled Zen query templates.
+
+A query is tokenized once into literal and parameter segments, rendering a query is then a
+single pass over the segments. String literals, quoted identifiers, comments and '::' casts are
+never mistaken by parameters.
+
+Parameters are written as ``:name``, except:
+    IDENT(:name), the value is quoted as an identifier.
+    AS :name, the value is an alias, it is inlined as a literal as aliases cannot be bound.
+"""
+import enum
+import functools
+import re
+
+TOKEN_PATTERN = re.compile(r"""
+      (?P<string>'(?:[^']|'')*'?)
+    | (?P<quoted>"(?:[^"]|"")*"?)
+    | (?P<dollar>\$(?P<tag>[A-Za-z_]\w*)?\$.*?(?:\$(?P=tag)?\$|\Z))
+    | (?P<line_comment>--[^\n]*)
+    | (?P<block_comment>/\*.*?(?:\*/|\Z))
+    | (?P<cast>::)
+    | (?P<ident>(?<!\w)IDENT\(:(?P<ident_name>\w+)\))
+    | (?<!\w):(?P<name>[A-Za-z_]\w*)
+""", re.VERBOSE | re.DOTALL)
+
+ALIAS_PATTERN = re.compile(r'(?<!\w)AS\s+\Z', re.IGNORECASE)
+
+
+class Segment(enum.Enum):
+    LITERAL = 'literal'
+    VALUE = 'value'
+    IDENT = 'ident'
+    ALIAS = 'alias'
+
+
+PARAMSTYLES = ('named', 'pyformat', 'qmark', 'numeric')
+
+
+def format_value(value) -> str:
+    """Formats a value as an SQL literal.
+
+    Raises:
+        ValueError: If an unsupported data type is encountered.
+    """
+    if isinstance(value, str):
+        # Escape single quotes.
+        value = value.replace("'", "''")
+
+        # Wrap the value in single quotes
+        replacement = f"'{value}'"
+        return replacement
+
+    if isinstance(value, (int, float)):
+        return str(value)
+
+    if value is None:
+        return 'NULL'
+
+    raise ValueError(f'unsupported parameter type: {type(value)}')
+
+
+def quote_identifier(value, quote_ident_with: str = '"') -> str:
+    """Quotes an identifier, quotes inside the identifier are escaped by doubling them."""
+    if not isinstance(value, str):
+        raise ValueError(f'identifiers have to be strings, not {type(value)}')
+    return quote_ident_with + value.replace(quote_ident_with, quote_ident_with * 2) + \
+        quote_ident_with
+
+
+class QueryTemplate:
+    """A query tokenized in literal and parameter segments, use ``compile_template`` so the
+    template of a query is only built once.
+
+    Args:
+        query: The query, with ``:name`` parameters.
+
+    Examples:
+        >>> template = QueryTemplate("select :a, IDENT(:b) from t where c = ':d'")
+        >>> template.parameters
+        frozenset({'a', 'b'})
+        >>> print(template.render({'a': 1, 'b': 'col'}))
+        select 1, "col" from t where c = ':d'
+    """
+
+    def __init__(self, query: str):
+        self.query = query
+        # (Segment, name, text), for literals name is None.
+        self.segments: list[tuple[Segment, str | None, str]] = []
+        self._tokenize()
+
+        self.parameters = frozenset(name for kind, name, _ in self.segments
+                                    if kind is not Segment.LITERAL)
+        # Templates whose statement does not depend on the values, their native statements
+        # are cached by paramstyle.
+        self.is_static = all(kind in (Segment.LITERAL, Segment.VALUE)
+                             for kind, _, _ in self.segments)
+        self._statements: dict[str, tuple[str, tuple[str, ...]]] = {}
+
+    def _tokenize(self) -> None:
+        literal_start = 0
+        last_end = 0
+
+        for match in TOKEN_PATTERN.finditer(self.query):
+            start, end = match.span()
+            if match.group('ident_name'):
+                kind, name = Segment.IDENT, match.group('ident_name')
+            elif match.group('name'):
+                is_alias = ALIAS_PATTERN.search(self.query, last_end, start)
+                kind, name = Segment.ALIAS if is_alias else Segment.VALUE, match.group('name')
+            else:
+                # Strings, comments and casts are part of the literal.
+                last_end = end
+                continue
+
+            if literal_start < start:
+                self.segments.append((Segment.LITERAL, None, self.query[literal_start:start]))
+            self.segments.append((kind, name, match.group(0)))
+            literal_start = last_end = end
+
+        if literal_start < len(self.query):
+            self.segments.append((Segment.LITERAL, None, self.query[literal_start:]))
+
+    @staticmethod
+    def _inline(kind: Segment, value, quote_ident_with: str) -> str:
+        if kind is Segment.IDENT:
+            return quote_identifier(value, quote_ident_with)
+        return format_value(value)
+
+    def render(self, parameters: dict, quote_ident_with: str = '"') -> str:
+        """Renders the query with the values inlined as literals, parameters that are not given
+        are left untouched.
+
+        Raises:
+            ValueError: If an unsupported data type is encountered.
+        """
+        parts = []
+        for kind, name, text in self.segments:
+            if kind is Segment.LITERAL or name not in parameters:
+                parts.append(text)
+            else:
+                parts.append(self._inline(kind, parameters[name], quote_ident_with))
+        return ''.join(parts)
+
+    def _to_native(self, parameters: dict, paramstyle: str) -> tuple[str, tuple[str, ...]]:
+        def escape(text: str) -> str:
+            # Literal '%' have to be escaped in 'pyformat'.
+            return text.replace('%', '%%') if paramstyle == 'pyformat' else text
+
+        parts = []
+        names = []
+        for kind, name, text in self.segments:
+            if kind is Segment.LITERAL:
+                parts.append(escape(text))
+            elif kind is not Segment.VALUE:
+                parts.append(escape(self._inline(kind, parameters[name], '"')))
+            elif paramstyle == 'named':
+                parts.append(text)
+            elif paramstyle == 'pyformat':
+                parts.append(f'%({name})s')
+            elif paramstyle == 'qmark':
+                names.append(name)
+                parts.append('?')
+            else:
+                if name not in names:
+                    names.append(name)
+                parts.append(f'${names.index(name) + 1}')
+        return ''.join(parts), tuple(names)
+
+    def bind(self, parameters: dict, paramstyle: str) -> tuple[str, dict | list]:
+        """Returns the statement and the parameters to pass to a driver, in the given paramstyle
+        (PEP 249). Identifiers and aliases cannot be bound, they are inlined in the statement.
+
+        Supported paramstyles: 'named' (:param), 'pyformat' (%(param)s), 'qmark' (?)
+        and 'numeric' ($1).
+
+        Examples:
+            >>> QueryTemplate('select :a, :b, :a').bind({'a': 1, 'b': 2}, 'numeric')
+            ('select $1, $2, $1', [1, 2])
+        """
+        if paramstyle not in PARAMSTYLES:
+            raise ValueError(f'unsupported paramstyle: {paramstyle!r}')
+
+        if self.is_static:
+            if paramstyle not in self._statements:
+                self._statements[paramstyle] = self._to_native(parameters, paramstyle)
+            sql, names = self._statements[paramstyle]
+        else:
+            sql, names = self._to_native(parameters, paramstyle)
+
+        if paramstyle in ('named', 'pyformat'):
+            return sql, {name: parameters[name] for name in self.parameters
+                         if name in parameters}
+        return sql, [parameters[name] for name in names]
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_template(query: str) -> QueryTemplate:
+    """Returns the template of a query, templates are cached so every version of a Zen
+    is only tokenized once per process."""
+    return QueryTemplate(query)
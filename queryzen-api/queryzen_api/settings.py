@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 import os
 from pathlib import Path
 
+from kombu import Queue
+
 from databases.base import SQLiteDatabase, CrateDatabase
 
 from queryzen_api import strtobool, get_split_env
@@ -72,6 +74,7 @@ if DEBUG:
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'apps.core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -111,6 +114,33 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Results of Zen executions are cached in the memory of every process unless ZEN_RESULT_CACHE_URL
+# is set, e.g. to the redis of celery. Only the shared cache is invalidated for all the API
+# processes when a Zen is created or deleted, the memory one of the other processes serves stale
+# results until their TTL, so it is only safe with a single API process.
+ZEN_RESULT_CACHE_URL = os.getenv('ZEN_RESULT_CACHE_URL')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # The least recently used results are evicted once MAX_ENTRIES is reached, redis evicts them
+    # with its own policy.
+    'zen_results': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': ZEN_RESULT_CACHE_URL,
+    } if ZEN_RESULT_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'zen_results',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('ZEN_RESULT_CACHE_MAX_ENTRIES', '1024')),
+        }
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -163,13 +193,127 @@ if not DEBUG:
 CELERY_RESULT_BACKEND = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/1')
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/1')
 CELERY_IMPORTS = ('apps.core.tasks',)
+# Results are compressed in the result backend, 'zstd' needs the zstandard package, empty
+# to disable it.
+CELERY_RESULT_COMPRESSION = os.getenv('CELERY_RESULT_COMPRESSION', 'gzip') or None
+# Seconds results are kept in the result backend.
+CELERY_RESULT_EXPIRES = int(os.getenv('CELERY_RESULT_EXPIRES', str(60 * 60)))
+CELERY_BEAT_SCHEDULE = {
+    'delete-expired-results': {
+        'task': 'apps.core.tasks.delete_expired_results',
+        'schedule': 60 * 10,  # seconds
+    },
+}
 
 ZEN_DATABASES = {
     'default': SQLiteDatabase('demo.sqlite3'),
     'crate': CrateDatabase()
 }
 
+# Lanes of the executions, every database has a queue per lane, check apps.core.concurrency.
+# The lane of a run is chosen in the request, or by its Zen, else ZEN_DEFAULT_LANE.
+ZEN_LANES = ('interactive', 'batch')
+ZEN_DEFAULT_LANE = 'interactive'
+CELERY_TASK_QUEUES = [
+    Queue('celery'),
+    *(Queue(f'queryzen.{database}.{lane}') for database in ZEN_DATABASES for lane in ZEN_LANES)
+]
+# Workers take one task at a time, so a worker busy with batch runs does not hold interactive
+# ones that other workers could run.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Max queries that run at the same time in a database across all the workers, databases that
+# are not listed are not limited, e.g. {'crate': 8}.
+ZEN_DATABASE_CONCURRENCY = {}
+# Where the slots of the databases are kept, check apps.core.concurrency
+ZEN_CONCURRENCY_BACKEND = os.getenv('ZEN_CONCURRENCY_BACKEND', 'apps.core.concurrency.RedisSlots')
+ZEN_CONCURRENCY_URL = os.getenv('ZEN_CONCURRENCY_URL', CELERY_BROKER_URL)
+# Seconds until a task that found its database busy is retried.
+ZEN_CONCURRENCY_RETRY_DELAY = 1
+
 ZEN_TIMEOUT = 2  # seconds
+# Max seconds a run of a Zen can ask for, the query is stopped in the database after its timeout.
+ZEN_MAX_TIMEOUT = int(os.getenv('ZEN_MAX_TIMEOUT', str(60 * 10)))
+# Runs without a timeout on a database of ZEN_DATABASE_CONCURRENCY get ZEN_MAX_TIMEOUT, so they
+# finish before their slot lease, ZEN_MAX_TIMEOUT + ZEN_CONCURRENCY_LEASE_MARGIN seconds.
+ZEN_CONCURRENCY_LEASE_MARGIN = 60  # seconds
+
+# Where cancelled executions are marked for the workers, check apps.core.cancellation
+ZEN_CANCEL_BACKEND = os.getenv('ZEN_CANCEL_BACKEND', 'apps.core.cancellation.RedisCancellations')
+ZEN_CANCEL_URL = os.getenv('ZEN_CANCEL_URL', CELERY_BROKER_URL)
+ZEN_CANCEL_TTL = 60 * 60  # seconds
+
+# Identical runs of a Zen that arrive while one of them is running share its execution, check
+# apps.core.coalescing
+ZEN_COALESCE = strtobool(os.getenv('ZEN_COALESCE', 'True'))
+ZEN_COALESCE_BACKEND = os.getenv('ZEN_COALESCE_BACKEND', 'apps.core.coalescing.RedisFlights')
+ZEN_COALESCE_URL = os.getenv('ZEN_COALESCE_URL', CELERY_BROKER_URL)
+
+# Workers save executions in batches, when ZEN_EXECUTION_BUFFER_SIZE are pending or every
+# ZEN_EXECUTION_FLUSH_INTERVAL seconds, check apps.core.buffer. Buffered executions are only
+# visible up to ZEN_EXECUTION_FLUSH_INTERVAL seconds after the result of their run, so it is
+# opt-in, 0 saves every execution before its result is returned.
+ZEN_EXECUTION_BUFFER_SIZE = int(os.getenv('ZEN_EXECUTION_BUFFER_SIZE', '0'))
+ZEN_EXECUTION_FLUSH_INTERVAL = float(os.getenv('ZEN_EXECUTION_FLUSH_INTERVAL', '1'))  # seconds
+
+# Runs of the Zens of these databases are run in the API process by ZEN_INLINE_WORKERS threads,
+# instead of by the workers, e.g. 'default,crate'. Zens created with inline override it, check
+# apps.core.inline
+ZEN_INLINE_DATABASES = get_split_env('ZEN_INLINE_DATABASES', [])
+ZEN_INLINE_WORKERS = int(os.getenv('ZEN_INLINE_WORKERS', '4'))
+
+# Max seconds a request waits for a submitted execution to finish (long polling).
+ZEN_MAX_POLL_WAIT = 30
+
+# Max buckets of a statistics series.
+ZEN_STATS_MAX_BUCKETS = int(os.getenv('ZEN_STATS_MAX_BUCKETS', '10000'))
+
+# Max Zens that are created in one bulk request.
+ZEN_BULK_MAX_ZENS = int(os.getenv('ZEN_BULK_MAX_ZENS', '10000'))
+
+# Max Zens that are run in one request.
+ZEN_RUN_MANY_MAX_RUNS = int(os.getenv('ZEN_RUN_MANY_MAX_RUNS', '100'))
+
+# Max parameter sets of one run of a Zen.
+ZEN_MAX_PARAMETER_SETS = int(os.getenv('ZEN_MAX_PARAMETER_SETS', '10000'))
+
+# Max rows of a page of a result, and seconds a page token is valid since its page was fetched.
+ZEN_MAX_PAGE_SIZE = int(os.getenv('ZEN_MAX_PAGE_SIZE', '100000'))
+ZEN_PAGE_TOKEN_TTL = int(os.getenv('ZEN_PAGE_TOKEN_TTL', str(60 * 10)))
+
+# How streamed results travel from the workers to the API, check apps.core.streams
+ZEN_STREAM_BACKEND = os.getenv('ZEN_STREAM_BACKEND', 'apps.core.streams.RedisResultStream')
+ZEN_STREAM_URL = os.getenv('ZEN_STREAM_URL', CELERY_BROKER_URL)
+ZEN_STREAM_TTL = 60 * 5  # seconds
+# Max messages of a stream waiting for the API, the worker stops the query if they are not read
+# in ZEN_STREAM_PUBLISH_TIMEOUT seconds, check apps.core.streams
+ZEN_STREAM_MAX_PENDING = int(os.getenv('ZEN_STREAM_MAX_PENDING', '16'))
+ZEN_STREAM_PUBLISH_TIMEOUT = 60  # seconds
+ZEN_STREAM_BATCH_SIZE = 1000  # rows
+
+# The cache alias (from CACHES) where Zen results are cached.
+ZEN_RESULT_CACHE = 'zen_results'
+
+# Default seconds that a Zen result is cached, it can be overridden per Zen with `cache_ttl`.
+# 0 disables the cache.
+ZEN_RESULT_CACHE_TTL = int(os.getenv('ZEN_RESULT_CACHE_TTL', '0'))
+
+# Responses are compressed with the encoding the client prefers from ZEN_COMPRESSION_ENCODINGS,
+# 'zstd' needs the zstandard package. Responses smaller than ZEN_COMPRESSION_MIN_SIZE bytes
+# are not compressed, streams always are.
+ZEN_COMPRESSION = strtobool(os.getenv('ZEN_COMPRESSION', 'True'))
+ZEN_COMPRESSION_ENCODINGS = os.getenv('ZEN_COMPRESSION_ENCODINGS', 'zstd,gzip')
+ZEN_COMPRESSION_MIN_SIZE = int(os.getenv('ZEN_COMPRESSION_MIN_SIZE', '1024'))
+
+# Results whose rows take more than ZEN_RESULT_SPILL_SIZE bytes are written to the result store
+# instead of the celery result backend, check apps.core.results. It is opt-in, 0 disables it, as
+# the default store needs the API and the workers to share ZEN_RESULT_STORE_PATH, e.g. a volume
+# mounted in both containers. Stored results are deleted by celery beat, which has to run.
+ZEN_RESULT_STORE = os.getenv('ZEN_RESULT_STORE', 'apps.core.results.FileSystemResultStore')
+ZEN_RESULT_STORE_PATH = os.getenv('ZEN_RESULT_STORE_PATH', BASE_DIR / 'results')
+ZEN_RESULT_STORE_COMPRESSION = strtobool(os.getenv('ZEN_RESULT_STORE_COMPRESSION', 'True'))
+ZEN_RESULT_STORE_TTL = int(os.getenv('ZEN_RESULT_STORE_TTL', str(60 * 60)))  # seconds
+ZEN_RESULT_SPILL_SIZE = int(os.getenv('ZEN_RESULT_SPILL_SIZE', '0'))  # bytes
 
 CORS_ALLOWED_ORIGINS = get_split_env('CORS_ALLOWED_ORIGINS', [])
 CORS_ALLOWED_ORIGIN_REGEXES = get_split_env('CORS_ALLOWED_ORIGIN_REGEXES', [])
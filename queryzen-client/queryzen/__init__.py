@@ -4,7 +4,7 @@ from os import getenv
 import logging
 
 from .exceptions import IncompatibleAPIError
-from .queryzen import QueryZen, Zen, AUTO
+from .queryzen import QueryZen, Zen, ExecutionHandle, AUTO
 from .constants import DEFAULT_COLLECTION
 from .types import Default
 
@@ -87,6 +87,7 @@ if ENFORCE_COMPATABILITY:
 __all__ = [
     'QueryZen',
     'Zen',
+    'ExecutionHandle',
     'DEFAULT_COLLECTION',
     'AUTO',
     'Default'
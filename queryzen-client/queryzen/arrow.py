@@ -0,0 +1,71 @@
+"""
+Apache Arrow results.
+
+Results of executions can be fetched as an Arrow IPC stream instead of json, check
+``QueryZen.run``, it needs pyarrow installed.
+"""
+import collections.abc
+import json
+import typing
+
+# Media type of Arrow IPC streams, the result format of the backend.
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+
+# Key of the schema metadata with the other fields of the execution, as json.
+ARROW_METADATA_KEY = b'queryzen'
+
+
+def import_pyarrow():
+    try:
+        import pyarrow  # pylint: disable=C0415
+    except ImportError as e:
+        raise ImportError('pyarrow is needed to use arrow results,'
+                          ' try installing it with `pip install pyarrow`') from e
+    return pyarrow
+
+
+class ArrowRows(collections.abc.Sequence):
+    """The rows of an Arrow table, they are only converted to Python objects when accessed, so
+    ``ZenExecution.as_arrow`` and ``ZenExecution.as_polars`` do not copy them.
+
+    Args:
+        table: The ``pyarrow.Table``.
+    """
+
+    def __init__(self, table: 'pyarrow.Table'):
+        self.table = table
+        self._rows: list[list] | None = None
+
+    @property
+    def rows(self) -> list[list]:
+        if self._rows is None:
+            columns = [column.to_pylist() for column in self.table.columns]
+            self._rows = [list(row) for row in zip(*columns)]
+        return self._rows
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def __eq__(self, other):
+        if isinstance(other, ArrowRows):
+            return self.table.equals(other.table)
+        return isinstance(other, collections.abc.Sequence) and self.rows == list(other)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.table.num_rows} rows)'
+
+
+def read_execution(content: bytes) -> dict[str, typing.Any]:
+    """Reads the execution of an Arrow IPC stream of the backend, rows are ``ArrowRows``."""
+    pyarrow = import_pyarrow()
+    # The columns of the table are views of the content, they are not copied.
+    table = pyarrow.ipc.open_stream(pyarrow.py_buffer(content)).read_all()
+    metadata = table.schema.metadata or {}
+
+    execution = json.loads(metadata.get(ARROW_METADATA_KEY, b'{}'))
+    execution['columns'] = table.column_names
+    execution['rows'] = ArrowRows(table)
+    return execution
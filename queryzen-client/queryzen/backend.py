@@ -7,15 +7,16 @@ Implement QueryZenClientABC to make a new client.
 import abc
 import dataclasses
 import datetime
+import json
 import typing
-import urllib
 from typing import Any
 
 import httpx
 
 from . import constants
+from .arrow import ARROW_MEDIA_TYPE, read_execution
 from .constants import DEFAULT_COLLECTION
-from .types import _AUTO, AUTO, Default
+from .types import _AUTO, AUTO, Default, ResultFormat
 
 
 class Url(str):
@@ -66,9 +67,17 @@ class QueryZenClientABC(abc.ABC):
                version,
                description,
                query,
-               default: Default | dict[str: typing.Any]) -> QueryZenResponse:
+               default: Default | dict[str: typing.Any],
+               cache_ttl: int | None = None,
+               lane: str | None = None,
+               inline: bool | None = None) -> QueryZenResponse:
         """Abc method to create one ``Zen``"""
 
+    @abc.abstractmethod
+    def bulk_create(self, zens: list[dict], get_or_create: bool = False) -> QueryZenResponse:
+        """Abc method to create many ``Zen`` in one request, every zen is a dict with the
+        arguments of ``create``, the data is [{'created': bool, 'zen': {...}}, ...]"""
+
     @abc.abstractmethod
     def get(self,
             collection: str,
@@ -77,8 +86,18 @@ class QueryZenClientABC(abc.ABC):
         """Abc method to get a ``Zen``"""
 
     @abc.abstractmethod
-    def filter(self, **filters) -> QueryZenResponse:
-        """Abc method to get all ``Zen`` and filter them by ``filters``"""
+    def filter(self, cursor: str | None = None, **filters) -> QueryZenResponse:
+        """Abc method to get a page of ``Zen`` filtered by ``filters``, the data is
+        {'results': [...], 'cursor': 'cursor of the next page or None'}"""
+
+    @abc.abstractmethod
+    def executions(self,
+                   collection: str,
+                   name: str,
+                   version: str,
+                   cursor: str | None = None) -> QueryZenResponse:
+        """Abc method to get a page of the executions of a ``Zen``, the data is
+        {'results': [...], 'cursor': 'cursor of the next page or None'}"""
 
     @abc.abstractmethod
     def delete(self,
@@ -92,16 +111,75 @@ class QueryZenClientABC(abc.ABC):
             database: str,
             timeout: int,
             collection: str = DEFAULT_COLLECTION,
+            parameter_sets: list[dict] | None = None,
+            result_format: ResultFormat = 'json',
+            limit: int | None = None,
+            page_token: str | None = None,
+            lane: str | None = None,
             **parameters: dict) -> QueryZenResponse:
-        """Abc method for running a ``Zen``"""
+        """Abc method for running a ``Zen``, once per parameter set if ``parameter_sets``
+        are given. With ``limit`` only the first ``limit`` rows are returned along with
+        a ``next_page_token``, which is sent as ``page_token`` to get the next rows."""
+
+    @abc.abstractmethod
+    def run_many(self,
+                 runs: list[dict],
+                 timeout: int) -> QueryZenResponse:
+        """Abc method for running many ``Zen`` in one request, every run is a dict with the
+        collection, name, version, database and parameters. If there is no error, the ``data``
+        of the response is a lazy iterator of {'index': int, 'execution' | 'error': ...}
+        messages, one per run."""
+
+    @abc.abstractmethod
+    def submit(self,
+               name: str,
+               version: int,
+               database: str,
+               collection: str = DEFAULT_COLLECTION,
+               parameters: dict = None,
+               timeout: float | None = None,
+               lane: str | None = None) -> QueryZenResponse:
+        """Abc method for submitting a ``Zen`` to be run without waiting for the result"""
+
+    @abc.abstractmethod
+    def result(self, execution_id: str, wait: float = 0) -> QueryZenResponse:
+        """Abc method for getting the result of a submitted ``Zen``, waiting at most `wait`
+        seconds for it to finish"""
+
+    @abc.abstractmethod
+    def cancel(self, execution_id: str) -> QueryZenResponse:
+        """Abc method for cancelling a submitted ``Zen``"""
+
+    @abc.abstractmethod
+    def run_stream(self,
+                   name: str,
+                   version: int,
+                   database: str,
+                   timeout: int,
+                   batch_size: int,
+                   collection: str = DEFAULT_COLLECTION,
+                   parameters: dict = None) -> QueryZenResponse:
+        """Abc method for running a ``Zen`` streaming the result, if there is no error, the
+        ``data`` of the response is a lazy iterator of the messages of the stream."""
 
     @abc.abstractmethod
     def stats(self,
               collection: str,
               name: str,
-              version: str) -> QueryZenResponse:
+              version: str,
+              percentiles: list[float] | None = None) -> QueryZenResponse:
         """Abc method for getting stats from ``Zen``"""
 
+    @abc.abstractmethod
+    def stats_series(self,
+                     collection: str,
+                     name: str,
+                     version: str,
+                     since: datetime.datetime | None,
+                     until: datetime.datetime | None,
+                     bucket: str) -> QueryZenResponse:
+        """Abc method for getting stats from ``Zen`` over time"""
+
 
 class QueryZenHttpClient(QueryZenClientABC):
     """
@@ -114,10 +192,13 @@ class QueryZenHttpClient(QueryZenClientABC):
     MAIN_ENDPOINT = 'zen/'
     COLLECTIONS = 'collection/'
     VERSION = 'version/'
+    EXECUTION = 'execution/'
 
     def __init__(self, client: httpx.Client = None):
         self.client: httpx.Client = (client
-                                     or httpx.Client(timeout=int(constants.DEFAULT_HTTP_TIMEOUT)))
+                                     or httpx.Client(timeout=int(constants.DEFAULT_HTTP_TIMEOUT),
+                                                     headers={'Accept-Encoding':
+                                                              constants.ACCEPT_ENCODING}))
         self.url: Url = Url(constants.BACKEND_URL or constants.LOCAL_URL)
 
     def make_url(self, collection: str, name: str, version: str) -> str:
@@ -149,6 +230,10 @@ class QueryZenHttpClient(QueryZenClientABC):
         assigned `error_code`s are HTTP error codes.
         """
         z_response = QueryZenResponse()
+        if response.headers.get('content-type', '').startswith(ARROW_MEDIA_TYPE):
+            z_response.data = [read_execution(response.content)]
+            return z_response
+
         resp_data = response.json()
 
         # Error handling.
@@ -169,7 +254,10 @@ class QueryZenHttpClient(QueryZenClientABC):
                version: _AUTO = AUTO,
                description: str = '',
                query: str,
-               default: 'Default') -> QueryZenResponse:
+               default: 'Default',
+               cache_ttl: int | None = None,
+               lane: str | None = None,
+               inline: bool | None = None) -> QueryZenResponse:
         """Creates a ``Zen`` via PUT request to the backend.
 
         The version is automatically handled by QueryZen, it is an integer that is auto-incremented
@@ -182,25 +270,82 @@ class QueryZenHttpClient(QueryZenClientABC):
             description: The description of the ``Zen``
             query: The query of the ``Zen``
             default: The default values to be sent, always a dict of {name: value}
+            cache_ttl: Seconds that the results are cached by the backend.
+            lane: The lane the ``Zen`` runs in by default, e.g. 'batch'.
+            inline: Whether the ``Zen`` runs in the backend process instead of in the workers.
         """
 
+        response = self.client.put(
+            self.make_url(collection, name, version),
+            json=self.make_payload(query, description, default, cache_ttl, lane, inline)
+        )
+        return self.make_response(response)
+
+    @staticmethod
+    def make_payload(query: str,
+                     description: str = '',
+                     default: 'Default' = None,
+                     cache_ttl: int | None = None,
+                     lane: str | None = None,
+                     inline: bool | None = None) -> dict:
+        """Creates the body of a ``Zen`` to be created."""
         payload = {
             'description': description,
             'query': query,
         }
         if default:
             payload['default_parameters'] = default.to_dict()
+        if cache_ttl is not None:
+            payload['cache_ttl'] = cache_ttl
+        if lane is not None:
+            payload['lane'] = lane
+        if inline is not None:
+            payload['inline'] = inline
+        return payload
 
-        response = self.client.put(
-            self.make_url(collection, name, version),
-            json=payload
-        )
-        return self.make_response(response)
+    def bulk_create(self, zens: list[dict], get_or_create: bool = False) -> QueryZenResponse:
+        """Creates many ``Zen`` with one POST request to the backend, in one transaction.
 
-    def filter(self, **filters) -> QueryZenResponse:
-        response = httpx.get(self.url / self.MAIN_ENDPOINT / '?' + urllib.parse.urlencode(filters))
+        Args:
+            zens: The Zens, dicts with the arguments of ``create``.
+            get_or_create: Whether to return the Zens that already exist instead of failing.
+        """
+        payload = {
+            'zens': [{'collection': zen.get('collection', DEFAULT_COLLECTION),
+                      'name': zen['name'],
+                      'version': str(zen.get('version', AUTO)),
+                      **self.make_payload(zen['query'],
+                                          zen.get('description'),
+                                          zen.get('default'),
+                                          zen.get('cache_ttl'),
+                                          zen.get('lane'),
+                                          zen.get('inline'))}
+                     for zen in zens],
+            'get_or_create': get_or_create,
+        }
+        response = self.client.post(self.url / self.MAIN_ENDPOINT / 'bulk' / '', json=payload)
         return self.make_response(response)
 
+    def make_page_response(self, response: httpx.Response) -> QueryZenResponse:
+        """Same as ``make_response`` for cursor paginated responses, the url of the next page
+        is replaced by its cursor."""
+        z_response = self.make_response(response)
+
+        if not z_response.error:
+            page = z_response.data[0]
+            next_page = page.pop('next', None)
+            page.pop('previous', None)
+            page['cursor'] = httpx.URL(next_page).params.get('cursor') if next_page else None
+        return z_response
+
+    def filter(self, cursor: str | None = None, **filters) -> QueryZenResponse:
+        params = {'page_size': constants.FILTER_PAGE_SIZE, **filters}
+        if cursor:
+            params['cursor'] = cursor
+
+        response = self.client.get(self.url / self.MAIN_ENDPOINT / '', params=params)
+        return self.make_page_response(response)
+
     def get(self,
             collection: str,
             name: str,
@@ -208,6 +353,19 @@ class QueryZenHttpClient(QueryZenClientABC):
         response = self.client.get(self.make_url(collection, name, version))
         return self.make_response(response)
 
+    def executions(self,
+                   collection: str,
+                   name: str,
+                   version: str,
+                   cursor: str | None = None) -> QueryZenResponse:
+        params = {'page_size': constants.EXECUTIONS_PAGE_SIZE}
+        if cursor:
+            params['cursor'] = cursor
+
+        response = self.client.get(f'{self.make_url(collection, name, version)}executions/',
+                                   params=params)
+        return self.make_page_response(response)
+
     def delete(self, zen: 'Zen') -> QueryZenResponse:
         response = self.client.delete(self.make_url(zen.collection, zen.name, zen.version))
         return self.make_response(response)
@@ -218,19 +376,137 @@ class QueryZenHttpClient(QueryZenClientABC):
             database: str = None,
             timeout: int = None,
             collection: str = DEFAULT_COLLECTION,
+            parameter_sets: list[dict] | None = None,
+            result_format: ResultFormat = 'json',
+            limit: int | None = None,
+            page_token: str | None = None,
+            lane: str | None = None,
             parameters: dict = None) -> QueryZenResponse:
+        payload = {'version': version,
+                   'timeout': timeout,
+                   'parameters': parameters,
+                   'database': database}
+        if parameter_sets is not None:
+            payload['parameter_sets'] = parameter_sets
+        if limit is not None:
+            payload['limit'] = limit
+        if page_token is not None:
+            payload['page_token'] = page_token
+        if lane is not None:
+            payload['lane'] = lane
+
+        headers = {}
+        if result_format == 'arrow':
+            # The backend answers with json if it cannot send arrow.
+            headers['Accept'] = f'{ARROW_MEDIA_TYPE}, application/json;q=0.9'
+
         response = self.client.post(self.make_url(collection, name, str(version)),
-                                    json={'version': version,
-                                          'timeout': timeout,
-                                          'parameters': parameters,
-                                          'database': database})
+                                    json=payload,
+                                    headers=headers)
         return self.make_response(response)
 
+    def run_many(self,
+                 runs: list[dict],
+                 timeout: int = None) -> QueryZenResponse:
+        return self.post_stream(self.url / self.MAIN_ENDPOINT / 'run' / '',
+                                {'runs': runs, 'timeout': timeout})
+
+    def post_stream(self, url: str, payload: dict) -> QueryZenResponse:
+        """Makes a POST request whose response is newline delimited json, if there is no error,
+        the ``data`` of the response is a lazy iterator of the messages."""
+        request = self.client.build_request('POST', url, json=payload)
+        response = self.client.send(request, stream=True)
+
+        if not response.is_success:
+            response.read()
+            return self.make_response(response)
+
+        def messages():
+            try:
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line)
+            finally:
+                response.close()
+
+        return QueryZenResponse(data=messages())
+
+    def submit(self,
+               name: str,
+               version: int,
+               database: str = None,
+               collection: str = DEFAULT_COLLECTION,
+               parameters: dict = None,
+               timeout: float | None = None,
+               lane: str | None = None) -> QueryZenResponse:
+        payload = {'version': version,
+                   'parameters': parameters,
+                   'database': database,
+                   'timeout': timeout}
+        if lane is not None:
+            payload['lane'] = lane
+        response = self.client.post(f'{self.make_url(collection, name, str(version))}submit/',
+                                    json=payload)
+        return self.make_response(response)
+
+    def result(self, execution_id: str, wait: float = 0) -> QueryZenResponse:
+        # The request waits up to `wait` seconds in the backend.
+        timeout = self.client.timeout.read
+        response = self.client.get(self.url / self.EXECUTION / execution_id / '',
+                                   params={'wait': wait},
+                                   timeout=timeout + wait if timeout is not None else None)
+        return self.make_response(response)
+
+    def cancel(self, execution_id: str) -> QueryZenResponse:
+        response = self.client.post(self.url / self.EXECUTION / execution_id / 'cancel' / '')
+        return self.make_response(response)
+
+    def run_stream(self,
+                   name: str,
+                   version: int,
+                   database: str = None,
+                   timeout: int = None,
+                   batch_size: int = None,
+                   collection: str = DEFAULT_COLLECTION,
+                   parameters: dict = None) -> QueryZenResponse:
+        payload = {'version': version,
+                   'timeout': timeout,
+                   'parameters': parameters,
+                   'database': database}
+        if batch_size:
+            payload['batch_size'] = batch_size
+
+        return self.post_stream(f'{self.make_url(collection, name, str(version))}stream/',
+                                payload)
+
     def stats(self,
               collection: str,
               name: str,
-              version: str) -> QueryZenResponse:
+              version: str,
+              percentiles: list[float] | None = None) -> QueryZenResponse:
+        params = {}
+        if percentiles:
+            params['percentiles'] = ','.join(map(str, percentiles))
+
+        response = self.client.get(f'{self.make_url(collection, name, version)}stats/',
+                                   params=params)
+
+        return self.make_response(response)
 
-        response = self.client.get(f'{self.make_url(collection, name, version)}stats/')
+    def stats_series(self,
+                     collection: str,
+                     name: str,
+                     version: str,
+                     since: datetime.datetime | None,
+                     until: datetime.datetime | None,
+                     bucket: str) -> QueryZenResponse:
+        params = {'bucket': bucket}
+        if since:
+            params['since'] = since.isoformat()
+        if until:
+            params['until'] = until.isoformat()
+
+        response = self.client.get(f'{self.make_url(collection, name, version)}stats/series/',
+                                   params=params)
 
         return self.make_response(response)
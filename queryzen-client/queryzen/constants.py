@@ -1,4 +1,5 @@
 """Constants for QueryZen"""
+import importlib.util
 import os
 
 # The default collection of queryzen is 'main', if not specified
@@ -17,3 +18,21 @@ DEFAULT_HTTP_TIMEOUT = os.getenv('QUERYZEN_HTTP_TIMEOUT', '60')
 
 # Set lower when developing for faster errors.
 DEFAULT_ZEN_EXECUTION_TIMEOUT = os.getenv('QUERYZEN_EXECUTION_TIMEOUT', '60')
+
+# Seconds that every request waits for a submitted zen to finish (long polling) before
+# asking again.
+DEFAULT_POLL_WAIT = float(os.getenv('QUERYZEN_POLL_WAIT', '10'))
+
+# Executions fetched per request when iterating the executions of a zen.
+EXECUTIONS_PAGE_SIZE = int(os.getenv('QUERYZEN_EXECUTIONS_PAGE_SIZE', '100'))
+
+# Zens fetched per request when filtering zens.
+FILTER_PAGE_SIZE = int(os.getenv('QUERYZEN_FILTER_PAGE_SIZE', '100'))
+
+# The format results are fetched in, 'json' or 'arrow', arrow needs pyarrow installed.
+DEFAULT_RESULT_FORMAT = os.getenv('QUERYZEN_RESULT_FORMAT', 'json')
+
+# Encodings the backend can compress responses with, 'identity' disables compression.
+# zstd needs the zstandard package.
+ACCEPT_ENCODING = os.getenv('QUERYZEN_ACCEPT_ENCODING',
+                            'zstd, gzip' if importlib.util.find_spec('zstandard') else 'gzip')
@@ -21,6 +21,18 @@ class ExecutionEngineError(Exception):
     """Workers or the broker is unavailable."""
 
 
+class ExecutionTimeoutError(ExecutionEngineError):
+    """The execution of a ``Zen`` did not finish in time."""
+
+
+class ExecutionCancelledError(ExecutionEngineError):
+    """The execution of a ``Zen`` was cancelled before it finished."""
+
+
+class ExecutionDoesNotExistError(Exception):
+    """The execution was never submitted or its result expired in the backend."""
+
+
 class MissingParametersError(Exception):
     """Trying to run a Query without the needed parameters"""
 
@@ -2,24 +2,30 @@
 TODO: Add docstring explaining what's in the file.
 """
 
+import collections.abc
 import dataclasses
 import datetime
 import json
+import time
 import typing
-from typing import Any, Generator
+from typing import Any, Generator, Iterator
 
 from . import constants
 from .sql import safe_sql_replace, parse_parameters
-from .backend import QueryZenHttpClient, QueryZenClientABC
+from .arrow import ArrowRows, import_pyarrow
+from .backend import QueryZenHttpClient, QueryZenClientABC, QueryZenResponse
 from .exceptions import (UncaughtBackendError,
                          ZenDoesNotExistError,
                          ZenAlreadyExistsError,
                          ExecutionEngineError,
+                         ExecutionTimeoutError,
+                         ExecutionCancelledError,
+                         ExecutionDoesNotExistError,
                          MissingParametersError,
                          DatabaseDoesNotExistError,
                          DefaultValueDoesNotExistError,
                          ParametersMissmatchError)
-from .types import AUTO, Rows, Columns, _AUTO, Default, ZenState
+from .types import AUTO, Row, Rows, Columns, _AUTO, Default, ResultFormat, ZenState
 from .constants import DEFAULT_COLLECTION
 from .table import make_table, ColumnCenter
 
@@ -40,6 +46,8 @@ class ZenExecution:
         total_time: Time in ms that took for the query to run.
         parameters: The parameters that were passed when running the query.
         query: The query that produced this result.
+        next_page_token: If the execution is a page of the result, the token of the next page,
+            None if it is the last one, check ``QueryZen.run``.
     """
     id: str
     row_count: int
@@ -52,6 +60,7 @@ class ZenExecution:
     parameters: dict = dataclasses.field(default_factory=dict)
     rows: Rows = dataclasses.field(repr=False, default_factory=list)
     columns: Columns = dataclasses.field(default_factory=list)
+    next_page_token: str | None = None
 
     def __post_init__(self):
         if isinstance(self.parameters, str):
@@ -60,6 +69,9 @@ class ZenExecution:
             except json.JSONDecodeError as e:
                 raise ValueError('cannot json.loads parameters') from e
 
+        # Fetches the page of a token, set by ``QueryZen.run`` for paginated results.
+        self._fetch_page: typing.Callable[[str], 'ZenExecution'] | None = None
+
     @property
     def is_error(self):
         return bool(self.error)
@@ -85,11 +97,29 @@ class ZenExecution:
         except ImportError as e:
             raise ImportError('polars is needed to use `as_polars`,'
                               ' try installing it with `pip install polars`') from e
+        if isinstance(self.rows, ArrowRows):
+            return polars.from_arrow(self.rows.table)
         return polars.from_records(self.rows, orient='row', schema=self.columns)
 
+    def as_arrow(self) -> 'pyarrow.Table':
+        """Returns the result as a ``pyarrow.Table``, if it was fetched as arrow it is not
+        copied, check ``QueryZen.run``."""
+        if isinstance(self.rows, ArrowRows):
+            return self.rows.table
+
+        pyarrow = import_pyarrow()
+        if not self.rows:
+            return pyarrow.table({column: pyarrow.array([]) for column in self.columns})
+        return pyarrow.Table.from_arrays([pyarrow.array(column) for column in self.iter_cols()],
+                                         names=self.columns)
+
     def to_dict(self) -> dict:
         """Transform the instance into a dictionary"""
-        return dataclasses.asdict(self)
+        data = dataclasses.asdict(dataclasses.replace(self, rows=list(self.rows)))
+        if data['next_page_token'] is None:
+            # Only pages of a result have it.
+            del data['next_page_token']
+        return data
 
     def row_at(self, i: int) -> list:
         """Returns the row number i.
@@ -103,13 +133,37 @@ class ZenExecution:
 
         return self.rows[i]
 
+    def next_page(self) -> 'ZenExecution | None':
+        """Fetches the next page of the result, None if this is the last page."""
+        if self.next_page_token is None:
+            return None
+        if self._fetch_page is None:
+            raise ValueError('The next page can only be fetched from executions of'
+                             ' `QueryZen.run`')
+        return self._fetch_page(self.next_page_token)
+
+    def iter_pages(self) -> Generator['ZenExecution', Any, None]:
+        """Iterate over this page of the result and the next ones, which are fetched from the
+        backend while iterating.
+
+        Returns:
+            A generator of executions, one per page.
+        """
+        page = self
+        while page is not None:
+            yield page
+            page = page.next_page()
+
     def iter_rows(self):
-        """Iterate over rows
+        """Iterate over rows, if the execution is a page of the result, the next pages are
+        fetched while iterating.
 
         Returns:
             An iterator of rows.
         """
-        return iter(self.rows)
+        if self.next_page_token is None:
+            return iter(self.rows)
+        return (row for page in self.iter_pages() for row in page.rows)
 
     def iter_cols(self) -> Generator[list[Any], Any, None]:
         """Iterate over columns, it copies items so it is not the most memory efficient.
@@ -127,6 +181,139 @@ class ZenExecution:
         return self.iter_rows()
 
 
+class ZenExecutionStream:
+    """
+    Represents the streamed execution of a Zen in a Zen backend, rows are fetched from the backend
+    in batches while iterating, so only one batch is kept in memory at a time.
+
+    ``columns`` are available once the iteration started and ``execution`` (a ``ZenExecution``
+    without rows) once it finished.
+
+    Examples:
+        >>> stream = qz.run_iter(zen)
+        >>> for row in stream:
+        ...     do_something(row)
+        >>> stream.execution.row_count
+        2_000_000
+    """
+
+    def __init__(self, messages: Iterator[dict], factory: typing.Any = None):
+        self._messages = messages
+        self._factory = factory
+        self.columns: Columns = []
+        self.execution: ZenExecution | None = None
+
+    def iter_batches(self) -> Generator[Rows, Any, None]:
+        """Iterate over the batches of rows as they are sent by the backend.
+
+        Raises:
+            ExecutionEngineError: If the backend could not finish the stream, e.g. a timeout.
+
+        Returns:
+            A generator of lists of rows.
+        """
+        for message in self._messages:
+            if 'columns' in message:
+                self.columns = message['columns']
+            elif 'rows' in message:
+                rows = message['rows']
+                if self._factory:
+                    rows = list(map(lambda row: self._factory(*row), rows))
+                yield rows
+            elif 'execution' in message:
+                self.execution = ZenExecution(columns=self.columns, **message['execution'])
+            elif 'error' in message:
+                raise ExecutionEngineError(message['error'])
+
+    def iter_rows(self) -> Generator[Row, Any, None]:
+        """Iterate over rows
+
+        Returns:
+            A generator of rows.
+        """
+        for batch in self.iter_batches():
+            yield from batch
+
+    def __iter__(self):
+        return self.iter_rows()
+
+
+class LazyExecutions(collections.abc.Sequence):
+    """The executions of a ``Zen``, oldest first, they are fetched from the backend page by page
+    the first time they are accessed, so getting a ``Zen`` does not depend on how many
+    executions it has.
+
+    Iterating or indexing only fetches the pages that are needed, ``len`` fetches all of them.
+
+    Args:
+        fetch: Callable that receives the cursor of a page (None for the first one) and returns
+         the executions of the page and the cursor of the next one (None if it is the last).
+    """
+
+    def __init__(self,
+                 fetch: typing.Callable[[str | None], tuple[list['ZenExecution'], str | None]]):
+        self._fetch = fetch
+        self._items: list[ZenExecution] = []
+        self._cursor: str | None = None
+        self._exhausted = False
+        # Executions appended before all the pages are fetched.
+        self._appended: list[ZenExecution] = []
+
+    def _fetch_page(self) -> bool:
+        """Fetches the next page, returns False if there are no more pages."""
+        if self._exhausted:
+            return False
+
+        executions, self._cursor = self._fetch(self._cursor)
+        appended = {execution.id for execution in self._appended}
+        self._items.extend(execution for execution in executions if execution.id not in appended)
+
+        if self._cursor is None:
+            self._exhausted = True
+            self._items.extend(self._appended)
+            self._appended = []
+        return True
+
+    def _fetch_all(self) -> None:
+        while self._fetch_page():
+            pass
+
+    def append(self, execution: 'ZenExecution') -> None:
+        if self._exhausted:
+            self._items.append(execution)
+        else:
+            self._appended.append(execution)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) or index < 0:
+            self._fetch_all()
+        else:
+            while index >= len(self._items) and self._fetch_page():
+                pass
+        return self._items[index]
+
+    def __iter__(self):
+        i = 0
+        while i < len(self._items) or self._fetch_page():
+            if i < len(self._items):
+                yield self._items[i]
+                i += 1
+
+    def __len__(self):
+        self._fetch_all()
+        return len(self._items)
+
+    def __eq__(self, other):
+        if isinstance(other, collections.abc.Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        if self._exhausted:
+            return repr(self._items)
+        return f'LazyExecutions(fetched={len(self._items)}, ...)'
+
+
 @dataclasses.dataclass
 class ZenStatistic:
     """
@@ -142,6 +329,11 @@ class ZenStatistic:
         variance (float | None): The statistical variance of execution times.
         standard_deviation (float | None): The standard deviation of execution times.
         range (float | None): The difference between max and min execution times.
+        p50_execution_time_ms (float | None): The 50th percentile of execution times.
+        p90_execution_time_ms (float | None): The 90th percentile of execution times.
+        p99_execution_time_ms (float | None): The 99th percentile of execution times.
+        p999_execution_time_ms (float | None): The 99.9th percentile of execution times.
+        percentiles (dict | None): The requested percentiles, e.g. {'99.99': 10.5}.
     """
     min_execution_time_ms: int | None
     max_execution_time_ms: int | None
@@ -151,6 +343,55 @@ class ZenStatistic:
     variance: float | None
     standard_deviation: float | None
     range: float | None
+    p50_execution_time_ms: float | None = None
+    p90_execution_time_ms: float | None = None
+    p99_execution_time_ms: float | None = None
+    p999_execution_time_ms: float | None = None
+    percentiles: dict[str, float] | None = None
+
+    def to_dict(self) -> dict:
+        """Transform the instance into a dictionary"""
+        return dataclasses.asdict(self)
+
+
+@dataclasses.dataclass
+class ZenStatisticSeries:
+    """
+    Execution metrics of a Zen over time, in columnar form: every metric is a list with a value
+    per time bucket. Buckets without executions are not included.
+
+    Attributes:
+        since (datetime.datetime): Start of the series.
+        until (datetime.datetime): End of the series.
+        bucket (str): The size of the buckets, minute, hour, day, week or month.
+        start (list[datetime.datetime]): The start of every bucket.
+        count (list[int]): Executions per bucket.
+        error_count (list[int]): Invalid executions per bucket.
+        error_rate (list[float]): Ratio of invalid executions per bucket.
+        mean_execution_time_ms (list[float]): Mean execution time per bucket.
+        min_execution_time_ms (list[int]): Minimum execution time per bucket.
+        max_execution_time_ms (list[int]): Maximum execution time per bucket.
+    """
+    since: datetime.datetime
+    until: datetime.datetime
+    bucket: str
+    start: list[datetime.datetime]
+    count: list[int]
+    error_count: list[int]
+    error_rate: list[float]
+    mean_execution_time_ms: list[float]
+    min_execution_time_ms: list[int]
+    max_execution_time_ms: list[int]
+
+    def __post_init__(self):
+        for field in ('since', 'until'):
+            if isinstance(getattr(self, field), str):
+                setattr(self, field, datetime.datetime.fromisoformat(getattr(self, field)))
+        self.start = [datetime.datetime.fromisoformat(start) if isinstance(start, str) else start
+                      for start in self.start]
+
+    def __len__(self):
+        return len(self.start)
 
     def to_dict(self) -> dict:
         """Transform the instance into a dictionary"""
@@ -170,11 +411,14 @@ class Zen:
     collection: str = dataclasses.field(default_factory=lambda: DEFAULT_COLLECTION)
     created_by: str = dataclasses.field(default_factory=lambda: 'not_implemented')
     state: ZenState = dataclasses.field(default_factory=lambda: 'unknown')
-    executions: list[ZenExecution] = dataclasses.field(default_factory=list)  # Improve typing
+    cache_ttl: int | None = None
+    lane: str | None = None
+    inline: bool | None = None
+    executions: list[ZenExecution] | LazyExecutions = dataclasses.field(default_factory=list)
 
     def to_dict(self) -> dict:
-        """Transform the instance into a dictionary"""
-        return dataclasses.asdict(self)
+        """Transform the instance into a dictionary, it fetches all the executions."""
+        return dataclasses.asdict(dataclasses.replace(self, executions=list(self.executions)))
 
     def difference(self, other: 'Zen', compare: list[str] = None) -> dict[str: tuple]:
         """Returns a dictionary with the difference between 'Zen's, it only
@@ -195,12 +439,9 @@ class Zen:
             compare = ['name', 'description', 'version']
 
         difference = {}
-        s = self.to_dict()
-        o = other.to_dict()
-
         for key in compare:
-            if not o[key] == s[key]:
-                difference[key] = (s[key], o[key])
+            if not getattr(other, key) == getattr(self, key):
+                difference[key] = (getattr(self, key), getattr(other, key))
         return difference
 
     @classmethod
@@ -239,6 +480,109 @@ class Zen:
         return safe_sql_replace(self.query, parameters)
 
 
+class ExecutionHandle:
+    """Handle of a Zen execution submitted with ``QueryZen.submit``, the execution runs in the
+    backend while the handle is held.
+
+    Examples:
+        >>> handle = qz.submit(zen)
+        >>> handle.done()
+        False
+        >>> handle.result(timeout=10)
+        ZenExecution(...)
+    """
+
+    def __init__(self, id: str, zen: Zen, queryzen: 'QueryZen', factory: typing.Any = None):
+        # pylint: disable=W0622
+        self.id = id
+        self.zen = zen
+        self._queryzen = queryzen
+        self._factory = factory
+        self._execution: ZenExecution | None = None
+
+    def _poll(self, wait: float) -> ZenExecution | None:
+        """Asks the backend for the result, waiting at most `wait` seconds."""
+        if self._execution:
+            return self._execution
+
+        response = self._queryzen._client.result(self.id, wait=wait)  # pylint: disable=W0212
+
+        if response.error_code == 409:
+            raise ExecutionCancelledError(response.error)
+
+        if response.error_code == 404:
+            raise ExecutionDoesNotExistError(response.error)
+
+        if response.error:
+            self._queryzen._raise_run_error(response,  # pylint: disable=W0212
+                                            self.zen,
+                                            {})
+
+        if 'status' in response.data[0]:
+            # Not finished yet.
+            return None
+
+        self._execution = self._queryzen._make_execution(response,  # pylint: disable=W0212
+                                                         self.zen,
+                                                         self._factory)
+        return self._execution
+
+    def done(self) -> bool:
+        """Returns whether the execution finished."""
+        return self._poll(wait=0) is not None
+
+    def result(self, timeout: float | None = None) -> ZenExecution:
+        """Waits for the execution to finish and returns it.
+
+        Args:
+            timeout: Max seconds to wait, if None it waits forever.
+
+        Raises:
+            ExecutionTimeoutError: If the execution did not finish in `timeout` seconds, the
+                execution keeps running in the backend and ``result`` can be called again.
+
+        Returns:
+            The finished ``ZenExecution``.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            wait = constants.DEFAULT_POLL_WAIT
+            if deadline is not None:
+                wait = min(wait, max(deadline - time.monotonic(), 0))
+
+            if (execution := self._poll(wait)) is not None:
+                return execution
+
+            if deadline is not None and time.monotonic() >= deadline:
+                raise ExecutionTimeoutError(f'Execution {self.id!r} did not finish'
+                                            f' in {timeout} seconds')
+
+    def cancel(self) -> bool:
+        """Cancels the execution, if it is queued it never runs and if it is running its query is
+        stopped in the database.
+
+        Returns:
+            False if the execution already finished, True otherwise.
+        """
+        response = self._queryzen._client.cancel(self.id)  # pylint: disable=W0212
+
+        if response.error_code == 409:
+            return False
+
+        if response.error_code == 404:
+            raise ExecutionDoesNotExistError(response.error)
+
+        if response.error:
+            raise UncaughtBackendError(response,
+                                       zen=self.zen,
+                                       context=f'Cancelling the execution {self.id!r}')
+        return True
+
+    def __repr__(self):
+        return f'{self.__class__.__qualname__}(id={self.id!r}, zen={self.zen.name!r})'
+
+
 class QueryZen:
     """QueryZen client.
 
@@ -258,6 +602,59 @@ class QueryZen:
     def __init__(self, client: QueryZenClientABC | None = None):
         self._client: QueryZenClientABC = client or QueryZenHttpClient()
 
+    def _raise_run_error(self, response: QueryZenResponse, zen: Zen, params: dict) -> None:
+        """Raises the exception that matches the error of a response from running a Zen."""
+        if response.error_code == 400:
+            raise MissingParametersError(response.error)
+
+        if response.error_code == 409:
+            raise ParametersMissmatchError(response.error)
+
+        if response.error_code == 503 or response.error_code == 408:
+            raise ExecutionEngineError(response.error)
+
+        if response.error_code == 404:
+            raise ZenDoesNotExistError('You are trying to run a Zen that does not exist')
+
+        if response.error_code == 416:
+            raise DatabaseDoesNotExistError(response.error)
+        raise UncaughtBackendError(response,
+                                   zen=zen,
+                                   context=f'Running a Zen with: params {params}')
+
+    def _make_execution(self,
+                        response: QueryZenResponse,
+                        zen: Zen,
+                        factory: typing.Any = None) -> ZenExecution:
+        """Creates the ``ZenExecution`` of a successful response from running a Zen, it is
+        appended to the executions of the Zen and the state of the Zen is updated."""
+        rows = response.get_from_data('rows')
+
+        if factory and rows:
+            rows = list(map(lambda row: factory(*row), rows))
+
+        execution = ZenExecution(id=response.get_from_data('id'),
+                                 rows=rows,
+                                 columns=response.get_from_data('columns'),
+                                 row_count=len(response.get_from_data('rows'))
+                                 if not hasattr(response.data[0], 'row_count')
+                                 else response.get_from_data('row_count'),
+                                 state=response.get_from_data('state'),
+                                 started_at=response.get_from_data('started_at'),
+                                 finished_at=response.get_from_data('finished_at'),
+                                 total_time=response.get_from_data('total_time'),
+                                 parameters=response.get_from_data('parameters'),
+                                 error=response.get_from_data('error'),  # execution error
+                                 query=response.get_from_data('query'),
+                                 next_page_token=response.get_from_data('next_page_token'))
+        zen.executions.append(execution)
+
+        # Update state, a timed out or cancelled query does not make the Zen valid or invalid.
+        if execution.state not in ('TI', 'CA'):
+            zen.state = execution.state
+
+        return execution
+
     def _validate_version(self, version) -> str:
         """
             Validate the input `version` value.
@@ -281,13 +678,43 @@ class QueryZen:
             version = str(version)
         return version
 
+    def _validate_default(self,
+                          query: str,
+                          default: Default | dict[str: typing.Any] | None) -> Default | None:
+        """Validates that the default values of a Zen are parameters of its query.
+
+        Raises:
+            ValueError: If default is not a dict or a ``Default``.
+            DefaultValueDoesNotExistError: If a default value is not a parameter of the query.
+        """
+        if not default:
+            return default
+
+        parameters = parse_parameters(query)
+
+        if isinstance(default, dict):
+            default = Default(**default)
+        elif not isinstance(default, Default):
+            raise ValueError(f'default has to be {dict!r}'
+                             f' or {Default!r}, not {type(default)!r}')
+
+        has_all, missing = default.is_missing(parameters)
+
+        if not has_all:
+            raise DefaultValueDoesNotExistError(f'default received a parameter'
+                                                f' that is not in the query: {missing!r}')
+        return default
+
     def create(self,
                name: str,
                query: str,
                description: str = None,
                collection: str = DEFAULT_COLLECTION,
                version: _AUTO | int = AUTO,
-               default: Default | dict[str: typing.Any] = None) -> Zen:
+               default: Default | dict[str: typing.Any] = None,
+               cache_ttl: int | None = None,
+               lane: str | None = None,
+               inline: bool | None = None) -> Zen:
         """Creates a Zen.
 
         Args:
@@ -297,6 +724,14 @@ class QueryZen:
             collection: The collection of the Zen, defaults to ``DEFAULT_COLLECTION``
             description: The description of the Zen.
             default: Default values for the query parameters.
+            cache_ttl: Seconds that the results of the Zen are cached in the backend, 0 disables
+                the cache, if None the backend default is used. Only cache read-only Zens.
+            lane: The lane the Zen runs in, 'interactive' or 'batch' in the default backend
+                configuration, if None the backend default is used. Runs of different lanes
+                are queued separately, so slow batch Zens do not delay interactive ones.
+            inline: Whether the Zen runs in the backend process instead of in its workers, which
+                is faster for fast Zens, if None the backend configuration of the database
+                decides.
 
         Raises:
             ZenAlreadyExists: If you try to create a Zen that already exists, use default version
@@ -308,28 +743,17 @@ class QueryZen:
         Returns:
             The created Zen.
         """
-
-        if default:
-            parameters = parse_parameters(query)
-
-            if isinstance(default, dict):
-                default = Default(**default)
-            elif not isinstance(default, Default):
-                raise ValueError(f'default has to be {dict!r}'
-                                 f' or {Default!r}, not {type(default)!r}')
-
-            has_all, missing = default.is_missing(parameters)
-
-            if not has_all:
-                raise DefaultValueDoesNotExistError(f'default received a parameter'
-                                                    f' that is not in the query: {missing!r}')
+        default = self._validate_default(query, default)
 
         response = self._client.create(collection=collection,
                                        name=name,
                                        version=version,
                                        query=query,
                                        description=description,
-                                       default=default)
+                                       default=default,
+                                       cache_ttl=cache_ttl,
+                                       lane=lane,
+                                       inline=inline)
         if response.error:
             if response.error_code == 409:
                 raise ZenAlreadyExistsError()
@@ -357,6 +781,69 @@ class QueryZen:
                                                'of the object was not returned')
         return Zen(**response.data[0])
 
+    def _bulk_create(self,
+                     zens: typing.Iterable[dict],
+                     get_or_create: bool) -> list[tuple[bool, Zen]]:
+        zens = [dict(zen) for zen in zens]
+        if not zens:
+            return []
+
+        for zen in zens:
+            zen['default'] = self._validate_default(zen['query'], zen.get('default'))
+            zen['version'] = self._validate_version(zen.get('version', AUTO))
+
+        response = self._client.bulk_create(zens, get_or_create=get_or_create)
+        if response.error:
+            if response.error_code == 409:
+                raise ZenAlreadyExistsError(response.error)
+
+            raise UncaughtBackendError(response=response,
+                                       context='This was raised while creating Zens in bulk.')
+        return [(item['created'], Zen(**item['zen'])) for item in response.data]
+
+    def bulk_create(self, zens: typing.Iterable[dict]) -> list[Zen]:
+        """Creates many Zens in one request, either all of them are created or none.
+
+        Args:
+            zens: The Zens to create, dicts with the arguments of ``create``.
+
+        Examples:
+            >>> qz = QueryZen()
+            >>> qz.bulk_create([{'name': 'zen1', 'query': 'select 1'},
+            ...                 {'name': 'zen2', 'query': 'select :a', 'default': {'a': 1}}])
+            [Zen(name='zen1', version=1, ...), Zen(name='zen2', version=1, ...)]
+
+        Raises:
+            ZenAlreadyExistsError: If any of the Zens already exists, use the default version
+            to avoid this.
+
+            UncaughtBackendError: If the backend returns an uncaught error, the user
+            is never meant to get this.
+
+        Returns:
+            The created Zens, in the same order.
+        """
+        return [zen for _, zen in self._bulk_create(zens, get_or_create=False)]
+
+    def bulk_get_or_create(self, zens: typing.Iterable[dict]) -> list[tuple[bool, Zen]]:
+        """Gets or creates many Zens in one request, e.g. to sync a catalogue of queries.
+
+        Same as ``get_or_create`` for every Zen, the latest version of a Zen is returned if it
+        exists, or the given version if there is one.
+
+        Args:
+            zens: The Zens, dicts with the arguments of ``create``.
+
+        Examples:
+            >>> qz = QueryZen()
+            >>> qz.bulk_get_or_create([{'name': 'zen1', 'query': 'select 1'}])
+            [(False, Zen(name='zen1', version=3, ...))]
+
+        Returns:
+            A list of tuples (created, Zen), in the same order.
+        """
+        return self._bulk_create(zens, get_or_create=True)
+
     def get(self,
             name: str,
             collection=DEFAULT_COLLECTION,
@@ -400,12 +887,32 @@ class QueryZen:
             raise UncaughtBackendError(response=response,
                                        zen=Zen.empty(),
                                        context='Getting a Zen')
-        executions = [ZenExecution(**kw) for kw in response.data[0].pop('executions')]
+        response.data[0].pop('executions', None)
 
         zen = Zen(**response.data[0])
-        zen.executions = executions
+        zen.executions = self._lazy_executions(zen)
         return zen
 
+    def _lazy_executions(self, zen: Zen) -> LazyExecutions:
+        """Returns the executions of a Zen, fetched from the backend when accessed."""
+
+        def fetch(cursor: str | None) -> tuple[list[ZenExecution], str | None]:
+            response = self._client.executions(collection=zen.collection,
+                                               name=zen.name,
+                                               version=str(zen.version),
+                                               cursor=cursor)
+            if response.error:
+                if response.error_code == 404:
+                    raise ZenDoesNotExistError()
+                raise UncaughtBackendError(response=response,
+                                           zen=zen,
+                                           context='Getting the executions of a Zen')
+
+            page = response.data[0]
+            return [ZenExecution(**kw) for kw in page['results']], page['cursor']
+
+        return LazyExecutions(fetch)
+
     def filter(self, **filters) -> list[Zen]:
         """Filters all ``Zen``.
 
@@ -416,6 +923,9 @@ class QueryZen:
         If you now exactly the collection, name and version use ``QueryZen.get`` or
          ``QueryZen.get_or_create``, only use this one for advanced filtering and statistics.
 
+        It fetches all the pages of results, use ``QueryZen.iter_filter`` to fetch them
+        while iterating.
+
         Args:
             filters: The filters that will be used.
 
@@ -429,16 +939,40 @@ class QueryZen:
             # who has at least one execution that was invalid.
 
         Returns:
-             A list of ``Zen``, empty list if none is found.
+             A list of ``Zen``, empty list if none is found, ordered by creation time.
         """
-        response = self._client.filter(**filters)
+        return list(self.iter_filter(**filters))
 
-        if response.error:
-            raise UncaughtBackendError(response,
-                                       zen=Zen.empty(),
-                                       context='Listing Zens')
+    def iter_filter(self, **filters) -> Iterator[Zen]:
+        """Same as ``QueryZen.filter`` but ``Zen`` are fetched from the backend page by page
+        while iterating.
 
-        return [Zen(**data) for data in response.data]
+        Example:
+            >>>for zen in QueryZen().iter_filter(collection='prod'):
+            ...    do_something_with_zen(zen)
+
+        Returns:
+             An iterator of ``Zen``, ordered by creation time.
+        """
+        cursor = None
+        while True:
+            response = self._client.filter(cursor=cursor, **filters)
+
+            if response.error:
+                raise UncaughtBackendError(response,
+                                           zen=Zen.empty(),
+                                           context='Listing Zens')
+
+            page = response.data[0]
+            for data in page['results']:
+                data.pop('executions', None)
+                zen = Zen(**data)
+                zen.executions = self._lazy_executions(zen)
+                yield zen
+
+            cursor = page['cursor']
+            if cursor is None:
+                return
 
     def get_or_create(self,
                       name: str,
@@ -508,6 +1042,10 @@ class QueryZen:
             database: str = constants.DEFAULT_DATABASE,
             timeout: int = int(constants.DEFAULT_ZEN_EXECUTION_TIMEOUT),
             factory: typing.Any = None,
+            parameter_sets: list[dict] | None = None,
+            result_format: ResultFormat = constants.DEFAULT_RESULT_FORMAT,
+            limit: int | None = None,
+            lane: str | None = None,
             **params):
         """Runs a zen with the given parameters.
 
@@ -519,6 +1057,18 @@ class QueryZen:
                 default time is 30 seconds, if you expect your queries to take more,
                  increase the value.
             factory: Factory to be used to create rows, typically a dataclass or a pydantic model
+            parameter_sets: Runs the zen once per parameter set in a single execution, ``params``
+                are shared by all the sets. The first column of the rows is the index of their
+                parameter set, 'parameter_set'.
+            result_format: The format the result is sent in by the backend, 'json' or 'arrow'.
+                Arrow is faster for big results and ``as_arrow`` and ``as_polars`` do not copy
+                it, it needs pyarrow installed in the client and the backend, otherwise json
+                is used.
+            limit: Only fetch the first ``limit`` rows, the next pages of rows are fetched
+                with ``ZenExecution.next_page`` or while iterating the execution. Every page
+                runs the query again from its first row, the query should be ordered so pages are
+                stable.
+            lane: The lane the Zen runs in, by default the lane of the Zen, check ``create``.
             params: Parameters to send to the backend for the query.
 
         Backend Parameters:
@@ -532,78 +1082,232 @@ class QueryZen:
             >>>result = qz.run(zen, database='postgres_main', timeout=1000)
             >>>result.as_table()
 
+            # Run a Zen for many customers at once.
+            >>>zen = qz.create('orders', 'select :customer, count(*) from orders'
+            ...                          ' where customer = :customer')
+            >>>result = qz.run(zen, parameter_sets=[{'customer': c} for c in customers])
+
+            # Fetch a big result in pages of 10_000 rows.
+            >>>for row in qz.run(zen, limit=10_000):
+            ...     do_something(row)
+
             TODO: Add more examples:
             # Create and run a parametrized Zen.
             # Run a zen with factory
         """
+        return self._run(zen,
+                         database=database,
+                         timeout=timeout,
+                         factory=factory,
+                         parameter_sets=parameter_sets,
+                         result_format=result_format,
+                         limit=limit,
+                         lane=lane,
+                         params=params)
+
+    def _run(self,
+             zen: Zen,
+             database: str,
+             timeout: int,
+             factory: typing.Any,
+             result_format: ResultFormat,
+             params: dict,
+             parameter_sets: list[dict] | None = None,
+             limit: int | None = None,
+             page_token: str | None = None,
+             lane: str | None = None) -> ZenExecution:
+        """Runs a zen, check ``run``, ``page_token`` fetches the page of a paginated result."""
         response = self._client.run(name=zen.name,
                                     collection=zen.collection,
                                     version=zen.version,
                                     database=database,
                                     timeout=timeout,
+                                    parameter_sets=parameter_sets,
+                                    result_format=result_format,
+                                    limit=limit,
+                                    page_token=page_token,
+                                    lane=lane,
                                     parameters=params)
 
         if response.error:
-            if response.error_code == 400:
-                raise MissingParametersError(response.error)
-
-            if response.error_code == 409:
-                raise ParametersMissmatchError(response.error)
-
-            if response.error_code == 503 or response.error_code == 408:
-                raise ExecutionEngineError(response.error)
-
-            if response.error_code == 404:
-                raise ZenDoesNotExistError('You are trying to run a Zen that does not exist')
-
-            if response.error_code == 416:
-                raise DatabaseDoesNotExistError(response.error)
-            raise UncaughtBackendError(response,
-                                       zen=zen,
-                                       context=f'Running a Zen with: params {params}')
+            self._raise_run_error(response, zen, params)
 
         if not response.data:
             raise UncaughtBackendError(response,
                                        zen=zen,
                                        context='Backend returned ok but did not send data back')
 
-        rows = response.get_from_data('rows')
+        execution = self._make_execution(response, zen, factory)
+        if execution.next_page_token is not None:
+            # The parameters of the next pages are in their token.
+            execution._fetch_page = lambda token: self._run(  # pylint: disable=W0212
+                zen,
+                database=database,
+                timeout=timeout,
+                factory=factory,
+                result_format=result_format,
+                params={},
+                page_token=token,
+                lane=lane
+            )
+        return execution
 
-        if factory and rows:
-            rows = list(map(lambda row: factory(*row), rows))
+    def run_many(self,
+                 runs: typing.Iterable[Zen | tuple[Zen, dict]],
+                 database: str = constants.DEFAULT_DATABASE,
+                 timeout: int = int(constants.DEFAULT_ZEN_EXECUTION_TIMEOUT),
+                 factory: typing.Any = None,
+                 lane: str | None = None) -> list[ZenExecution]:
+        """Runs many zens in one request, the backend runs them in parallel, so it takes as long
+        as the slowest one instead of the sum of all of them.
 
-        execution = ZenExecution(id=response.get_from_data('id'),
-                                 rows=rows,
-                                 columns=response.get_from_data('columns'),
-                                 row_count=len(response.get_from_data('rows'))
-                                 if not hasattr(response.data[0], 'row_count')
-                                 else response.get_from_data('row_count'),
-                                 state=response.get_from_data('state'),
-                                 started_at=response.get_from_data('started_at'),
-                                 finished_at=response.get_from_data('finished_at'),
-                                 total_time=response.get_from_data('total_time'),
-                                 parameters=response.get_from_data('parameters'),
-                                 error=response.get_from_data('error'),  # execution error
-                                 query=response.get_from_data('query'))
-        zen.executions.append(execution)
+        Args:
+            runs: The zens to run, a ``Zen`` or a tuple (Zen, parameters).
+            database: The database the Zens will be run to.
+            timeout: Time in seconds the backend waits for all the Zens.
+            factory: Factory to be used to create rows, typically a dataclass or a pydantic model
+            lane: The lane the Zens run in, by default the lane of every Zen.
 
-        # Update state.
-        zen.state = execution.state
+        Examples:
+            >>>from queryzen import QueryZen
+            >>>qz = QueryZen()
+            >>>sales, users = qz.run_many([(qz.get('sales'), {'year': 2024}), qz.get('users')])
 
-        return execution
+        Raises:
+            ExecutionTimeoutError: If a Zen did not finish in ``timeout`` seconds.
+            ExecutionEngineError: If a Zen could not be run by the backend.
+
+        Returns:
+            The executions, in the same order as ``runs``.
+        """
+        runs = [run if isinstance(run, tuple) else (run, {}) for run in runs]
+        if not runs:
+            return []
+
+        response = self._client.run_many([{'collection': zen.collection,
+                                           'name': zen.name,
+                                           'version': zen.version,
+                                           'database': database,
+                                           'parameters': params,
+                                           **({'lane': lane} if lane is not None else {})}
+                                          for zen, params in runs],
+                                         timeout=timeout)
+        if response.error:
+            self._raise_run_error(response, zen=None, params=None)
+
+        executions = [None] * len(runs)
+        for message in response.data:
+            zen, _ = runs[message['index']]
+            if 'error' in message:
+                if message.get('timed_out'):
+                    raise ExecutionTimeoutError(message['error'])
+                raise ExecutionEngineError(message['error'])
+
+            executions[message['index']] = self._make_execution(
+                QueryZenResponse(data=[message['execution']]), zen, factory
+            )
+        return executions
+
+    def submit(self,
+               zen: Zen,
+               database: str = constants.DEFAULT_DATABASE,
+               factory: typing.Any = None,
+               timeout: float | None = None,
+               lane: str | None = None,
+               **params) -> 'ExecutionHandle':
+        """Submits a zen to be run with the given parameters without waiting for the result,
+        no connection to the backend is held while the Zen runs.
+
+        Args:
+            zen: The zen to run.
+            database: The database the Zen will be run to.
+            factory: Factory to be used to create rows, typically a dataclass or a pydantic model
+            timeout: Max seconds the query can run in the database, it is stopped after it and
+                its execution is recorded with the 'TI' state.
+            lane: The lane the Zen runs in, by default the lane of the Zen, check ``create``.
+            params: Parameters to send to the backend for the query.
+
+        Examples:
+            >>>from queryzen import QueryZen
+            >>>qz = QueryZen()
+            >>>handles = [qz.submit(zen) for zen in slow_zens]
+            >>>results = [handle.result(timeout=120) for handle in handles]
+
+        Returns:
+            An ``ExecutionHandle`` to get the result of the execution.
+        """
+        response = self._client.submit(name=zen.name,
+                                       collection=zen.collection,
+                                       version=zen.version,
+                                       database=database,
+                                       parameters=params,
+                                       timeout=timeout,
+                                       lane=lane)
+        if response.error:
+            self._raise_run_error(response, zen, params)
+
+        return ExecutionHandle(id=response.get_from_data('id'),
+                               zen=zen,
+                               queryzen=self,
+                               factory=factory)
+
+    def run_iter(self,
+                 zen: Zen,
+                 database: str = constants.DEFAULT_DATABASE,
+                 timeout: int = int(constants.DEFAULT_ZEN_EXECUTION_TIMEOUT),
+                 batch_size: int = None,
+                 factory: typing.Any = None,
+                 **params) -> ZenExecutionStream:
+        """Runs a zen with the given parameters, streaming the result. Use it instead of ``run``
+        for big results, rows are fetched lazily so memory usage is bounded by ``batch_size``.
+
+        Args:
+            zen: The zen to run.
+            database: The database the Zen will be run to.
+            timeout: Max time in seconds the backend waits between two batches of rows.
+            batch_size: Rows per batch, if None the backend default is used.
+            factory: Factory to be used to create rows, typically a dataclass or a pydantic model
+            params: Parameters to send to the backend for the query.
+
+        Examples:
+            >>>from queryzen import QueryZen
+            >>>qz = QueryZen()
+            >>>zen = qz.get('big_zen')
+            >>>for row in qz.run_iter(zen, batch_size=10_000):
+            ...    do_something(row)
+
+        Returns:
+            A ``ZenExecutionStream``, an iterator of rows.
+        """
+        response = self._client.run_stream(name=zen.name,
+                                           collection=zen.collection,
+                                           version=zen.version,
+                                           database=database,
+                                           timeout=timeout,
+                                           batch_size=batch_size,
+                                           parameters=params)
+        if response.error:
+            self._raise_run_error(response, zen, params)
+
+        return ZenExecutionStream(response.data, factory=factory)
 
     def stats(self,
               name: str,
               collection=DEFAULT_COLLECTION,
               version: _AUTO | int = AUTO,
+              percentiles: list[float] | None = None,
               ) -> ZenStatistic:
         """
         Return zen statistics.
 
+        Percentiles are estimated by the backend with a relative error of 1%.
+
         Args:
             name: The name of the ``Zen``
             collection: The collection of the `Zen`, defaults to ``DEFAULT_COLLECTION``.
             version: The version of the `Zen`, defaults to 'AUTO'.
+            percentiles: The percentiles (0-100) of the execution time to return in
+             ``ZenStatistic.percentiles``, e.g. [75, 99.99], defaults to 50, 90, 99 and 99.9.
 
         Raises:
             ZenDoesNotExistError: if the ``Zen`` doesn’t exist.
@@ -616,7 +1320,7 @@ class QueryZen:
         """
 
         version = self._validate_version(version)
-        response = self._client.stats(collection, name, version)
+        response = self._client.stats(collection, name, version, percentiles)
 
         if response.error:
             if response.error_code == 404:
@@ -625,3 +1329,45 @@ class QueryZen:
                 )
 
         return ZenStatistic(**response.data[0])  # Statistics always return one element
+
+    def stats_series(self,
+                     name: str,
+                     collection=DEFAULT_COLLECTION,
+                     version: _AUTO | int = AUTO,
+                     since: datetime.datetime | None = None,
+                     until: datetime.datetime | None = None,
+                     bucket: str = 'hour') -> ZenStatisticSeries:
+        """
+        Return the execution metrics of a Zen aggregated in time buckets, e.g. to see whether
+        a Zen got slower.
+
+        Args:
+            name: The name of the ``Zen``
+            collection: The collection of the `Zen`, defaults to ``DEFAULT_COLLECTION``.
+            version: The version of the `Zen`, defaults to 'AUTO'.
+            since: Start of the series, defaults to seven days before ``until``.
+            until: End of the series, defaults to now.
+            bucket: The size of the buckets, minute, hour, day, week or month.
+
+        Raises:
+            ZenDoesNotExistError: if the ``Zen`` doesn’t exist.
+            ValueError: if the series has too many buckets.
+
+        Returns:
+            ``ZenStatisticSeries``.
+        """
+        version = self._validate_version(version)
+        response = self._client.stats_series(collection, name, version, since, until, bucket)
+
+        if response.error:
+            if response.error_code == 404:
+                raise ZenDoesNotExistError(
+                    'You are trying to get stats from a zen that does not exist'
+                )
+            if response.error_code == 400:
+                raise ValueError(response.error)
+            raise UncaughtBackendError(response=response,
+                                       zen=Zen.empty(),
+                                       context='Getting stats series')
+
+        return ZenStatisticSeries(**response.data[0])
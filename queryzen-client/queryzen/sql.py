@@ -1,14 +1,115 @@
 # pylint: disable=C0114
+import functools
 import re
 
+# Strings, quoted identifiers, comments and '::' casts are matched so they are never mistaken
+# by parameters.
+TOKEN_PATTERN = re.compile(r"""
+      (?P<string>'(?:[^']|'')*'?)
+    | (?P<quoted>"(?:[^"]|"")*"?)
+    | (?P<dollar>\$(?P<tag>[A-Za-z_]\w*)?\$.*?(?:\$(?P=tag)?\$|\Z))
+    | (?P<line_comment>--[^\n]*)
+    | (?P<block_comment>/\*.*?(?:\*/|\Z))
+    | (?P<cast>::)
+    | (?P<ident>(?<!\w)IDENT\(:(?P<ident_name>\w+)\))
+    | (?<!\w):(?P<name>[A-Za-z_]\w*)
+""", re.VERBOSE | re.DOTALL)
 
-def parse_parameters(query: str, separator: str = ':') -> list[str]:
-    return re.findall(rf'{separator}(\w+)', query)
+
+def format_value(value) -> str:
+    """Formats the value inside the string depending on type."""
+    if isinstance(value, str):
+        # Escape single quotes.
+        value = value.replace("'", "''")
+
+        # Wrap the value in single quotes
+        replacement = f"'{value}'"
+        return replacement
+
+    if isinstance(value, (int, float)):
+        return str(value)
+
+    if value is None:
+        return 'NULL'
+
+    raise ValueError(f'unsupported parameter type: {type(value)}')
+
+
+def quote_identifier(value, quote_ident_with: str = '"') -> str:
+    """Quotes an identifier, quotes inside the identifier are escaped by doubling them."""
+    if not isinstance(value, str):
+        raise ValueError(f'identifiers have to be strings, not {type(value)}')
+    return quote_ident_with + value.replace(quote_ident_with, quote_ident_with * 2) + \
+        quote_ident_with
+
+
+class QueryTemplate:
+    """A query tokenized in literal and parameter segments, rendering it is a single pass over
+    the segments. Use ``compile_template`` so the template of a query is only built once.
+
+    Args:
+        query: The query, with ``:name`` parameters.
+
+    Examples:
+        >>> template = QueryTemplate("select :a, IDENT(:b) from t where c = ':d'")
+        >>> template.parameters
+        ['a', 'b']
+        >>> print(template.render({'a': 1, 'b': 'col'}))
+        select 1, "col" from t where c = ':d'
+    """
+
+    def __init__(self, query: str):
+        self.query = query
+        # (name, is_ident, text), for literals name is None.
+        self.segments: list[tuple[str | None, bool, str]] = []
+
+        literal_start = 0
+        for match in TOKEN_PATTERN.finditer(query):
+            name = match.group('ident_name') or match.group('name')
+            if not name:
+                continue
+
+            start, end = match.span()
+            if literal_start < start:
+                self.segments.append((None, False, query[literal_start:start]))
+            self.segments.append((name, bool(match.group('ident_name')), match.group(0)))
+            literal_start = end
+
+        if literal_start < len(query):
+            self.segments.append((None, False, query[literal_start:]))
+
+        # The parameter names in order of appearance.
+        self.parameters = list(dict.fromkeys(name for name, _, _ in self.segments if name))
+
+    def render(self, parameters: dict, quote_ident_with: str = '"') -> str:
+        """Renders the query with the values inlined, parameters that are not given are
+        left untouched.
+
+        Raises:
+            ValueError: If an unsupported data type is encountered.
+        """
+        parts = []
+        for name, is_ident, text in self.segments:
+            if name is None or name not in parameters:
+                parts.append(text)
+            elif is_ident:
+                parts.append(quote_identifier(parameters[name], quote_ident_with))
+            else:
+                parts.append(format_value(parameters[name]))
+        return ''.join(parts)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_template(query: str) -> QueryTemplate:
+    return QueryTemplate(query)
+
+
+def parse_parameters(query: str) -> list[str]:
+    return list(compile_template(query).parameters)
 
 
 def safe_sql_replace(sql: str,
                      parameters: dict,
-                     char_delimiter: str = ':',
                      quote_ident_with: str = '"') -> str:
     """Replaces parameters in an SQL statement with values from a dictionary.
 
@@ -18,7 +119,6 @@ def safe_sql_replace(sql: str,
     Args:
         sql: The SQL statement with :parameter placeholders.
         parameters: Dictionary containing parameter names and values.
-        char_delimiter: Character prefix for placeholders (default: ':').
         quote_ident_with: Character for quoting IDENT values (default: '"').
 
     Raises:
@@ -32,37 +132,4 @@ def safe_sql_replace(sql: str,
         ... :var1 and t.name = :var2', {'col': 'col1', 'var1': 1, 'var2': 'somename'})
         select "col1" FROM tbl1 t WHERE t.value = 1 and t.name = 'somecol'
     """
-
-    def format_value(value):
-        """Formats the value inside the string depending on type."""
-        if isinstance(value, str):
-            # Escape single quotes.
-            value = value.replace("'", "''")
-
-            # Wrap the value in single quotes
-            replacement = f"'{value}'"
-            return replacement
-
-        if isinstance(value, (int, float)):
-            return str(value)
-
-        if value is None:
-            return 'NULL'
-
-        raise ValueError(f'unsupported parameter type: {type(value)}')
-
-    for key, value in parameters.items():
-        replacement = format_value(value)
-        to_replace = char_delimiter + key
-
-        # Replace FIELD(:value) with quoted value
-        sql = re.sub(rf'IDENT\({to_replace}\)',
-                     replacement.replace("'", quote_ident_with),
-                     sql)
-
-        # Replace :value with actual value
-        sql = re.sub(rf'(?<!\w){to_replace}(?!\w)',
-                     replacement,
-                     sql)
-
-    return sql
+    return compile_template(sql).render(parameters, quote_ident_with)
@@ -12,6 +12,7 @@ Rows = list[Row]
 
 ZenState = Literal['valid', 'invalid', 'unknown']
 ColumnCenter = Literal['left', 'center', 'right']
+ResultFormat = Literal['json', 'arrow']
 
 
 class Default:
@@ -66,3 +66,42 @@ def test_bad_default_type(queryzen):
     """Default has to be either dict or Default"""
     with pytest.raises(ValueError):
         queryzen.create('t', query='t', default=1)
+
+
+def test_bulk_create(queryzen):
+    queryzen.create('bulk_existing', query='select 1')
+
+    zens = queryzen.bulk_create([{'name': 'bulk_new', 'query': 'select :a', 'default': {'a': 1}},
+                                 {'name': 'bulk_new', 'query': 'select 2'},
+                                 {'name': 'bulk_existing', 'query': 'select 3', 'collection': 'm'},
+                                 {'name': 'bulk_existing', 'query': 'select 4'}])
+    check_zen(zens[0], 'bulk_new', 'select :a', 1)
+    check_zen(zens[1], 'bulk_new', 'select 2', 2)
+    check_zen(zens[2], 'bulk_existing', 'select 3', 1)
+    check_zen(zens[3], 'bulk_existing', 'select 4', 2)
+    assert zens[0].default_parameters == {'a': 1}
+
+    # Nothing is created if any Zen exists.
+    with pytest.raises(exceptions.ZenAlreadyExistsError):
+        queryzen.bulk_create([{'name': 'bulk_other', 'query': 'select 1'},
+                              {'name': 'bulk_new', 'query': 'select 1', 'version': 1}])
+    with pytest.raises(exceptions.ZenDoesNotExistError):
+        queryzen.get('bulk_other')
+
+    with pytest.raises(exceptions.DefaultValueDoesNotExistError):
+        queryzen.bulk_create([{'name': 'bulk_other', 'query': 'select 1', 'default': {'a': 1}}])
+
+    assert queryzen.bulk_create([]) == []
+
+
+def test_bulk_get_or_create(queryzen):
+    existing = queryzen.create('bulk_existing', query='select 1')
+
+    results = queryzen.bulk_get_or_create([{'name': 'bulk_existing', 'query': 'select 2'},
+                                           {'name': 'bulk_new', 'query': 'select 2'}])
+    assert [created for created, _ in results] == [False, True]
+    assert results[0][1].id == existing.id
+    check_zen(results[1][1], 'bulk_new', 'select 2', 1)
+
+    results = queryzen.bulk_get_or_create([{'name': 'bulk_new', 'query': 'select 3'}])
+    assert results == [(False, queryzen.get('bulk_new'))]
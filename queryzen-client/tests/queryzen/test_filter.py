@@ -1,3 +1,6 @@
+from queryzen import constants
+
+
 def test_filter_simple(queryzen):
     """
     Test queryzen.filter
@@ -60,3 +63,15 @@ def test_filter_advanced_filters(queryzen):
                         executions__state='VA')
 
     assert len(r) == 1
+
+
+def test_filter_pages(queryzen, monkeypatch):
+    """Test that Zens are fetched page by page and every Zen is returned once"""
+    monkeypatch.setattr(constants, 'FILTER_PAGE_SIZE', 2)
+    for i in range(5):
+        queryzen.create(f'z{i}', 'select 1')
+
+    zens = queryzen.iter_filter()
+    assert next(zens).name == 'z0'
+    assert [zen.name for zen in zens] == ['z1', 'z2', 'z3', 'z4']
+    assert len(queryzen.filter()) == 5
@@ -2,8 +2,8 @@ from collections import OrderedDict
 
 import pytest
 
-from queryzen import exceptions
-from queryzen.queryzen import ZenExecution
+from queryzen import constants, exceptions
+from queryzen.queryzen import ExecutionHandle, ZenExecution
 
 
 def test_run_basic(queryzen):
@@ -236,3 +236,211 @@ def test_other_database(queryzen):
                         "select country, mountain, height from sys.summits where mountain = :mountain")
     r = queryzen.run(q, mountain='Mont Blanc', database='crate')
     assert r.rows[0][2] == 4808
+
+
+def test_run_cached(queryzen):
+    """Test that a Zen with cache_ttl returns the cached execution when run with the same
+    parameters"""
+    zen = queryzen.create('t', 'select :val', cache_ttl=60)
+
+    first = queryzen.run(zen, val=1)
+    assert queryzen.run(zen, val=1).id == first.id
+    assert queryzen.run(zen, val=2).id != first.id
+
+
+def test_run_iter(queryzen):
+    """Test streaming the rows of a Zen"""
+    query = ('WITH RECURSIVE c(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM c WHERE n < :n)'
+             ' SELECT n FROM c')
+    zen = queryzen.create('t', query=query)
+
+    stream = queryzen.run_iter(zen, batch_size=10, n=25)
+    batches = list(stream.iter_batches())
+
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert batches[0][0] == [1]
+    assert stream.columns == ['n']
+    assert stream.execution.row_count == 25
+    assert not stream.execution.is_error
+
+    assert list(queryzen.run_iter(zen, n=3, factory=lambda n: n)) == [1, 2, 3]
+
+
+def test_submit(queryzen):
+    """Test submitting a Zen and getting its result"""
+    zen = queryzen.create('t', 'select :val')
+
+    handle = queryzen.submit(zen, val=1)
+    result = handle.result(timeout=10)
+
+    assert handle.done()
+    assert result.rows == [[1]]
+    assert zen.executions == [result]
+    assert zen.state == 'VA'
+
+
+def test_submit_non_existing_zen(queryzen):
+    zen = queryzen.create('t', 'select 1')
+    queryzen.delete(zen)
+
+    with pytest.raises(exceptions.ZenDoesNotExistError):
+        queryzen.submit(zen)
+
+
+def test_run_executions_paginated(queryzen, monkeypatch):
+    """Test that the executions of a Zen are fetched lazily, page by page."""
+    monkeypatch.setattr(constants, 'EXECUTIONS_PAGE_SIZE', 2)
+    zen = queryzen.create('t', 'select :val')
+    results = [queryzen.run(zen, val=i) for i in range(5)]
+
+    zen = queryzen.get('t')
+    assert zen.executions[0].parameters == {'val': 0}
+    assert [execution.id for execution in zen.executions] == [result.id for result in results]
+
+    result = queryzen.run(zen, val=5)
+    assert len(zen.executions) == 6
+    assert zen.executions[-1] == result
+
+
+def test_run_many_zens(queryzen):
+    """Test running many Zens in one request"""
+    zen = queryzen.create('t', 'select :val')
+    other = queryzen.create('other', 'select 2')
+
+    results = queryzen.run_many([(zen, {'val': 1}), other, (zen, {'val': 3})])
+
+    assert [result.rows for result in results] == [[[1]], [[2]], [[3]]]
+    assert zen.executions == [results[0], results[2]]
+    assert other.executions == [results[1]]
+    assert queryzen.run_many([]) == []
+
+
+def test_run_many_errors(queryzen):
+    zen = queryzen.create('t', 'select :val')
+
+    with pytest.raises(exceptions.MissingParametersError):
+        queryzen.run_many([(zen, {'val': 1}), zen])
+
+    queryzen.delete(zen)
+    with pytest.raises(exceptions.ZenDoesNotExistError):
+        queryzen.run_many([(zen, {'val': 1})])
+
+
+def test_run_parameter_sets(queryzen):
+    """Test running a Zen with many parameter sets in one execution"""
+    zen = queryzen.create('t', 'select :val as val, :other as other')
+
+    result = queryzen.run(zen, parameter_sets=[{'val': 1}, {'val': 2}, {'val': 3}], other=0)
+
+    assert result.columns == ['parameter_set', 'val', 'other']
+    assert result.rows == [[0, 1, 0], [1, 2, 0], [2, 3, 0]]
+    assert zen.executions == [result]
+
+    with pytest.raises(exceptions.MissingParametersError):
+        queryzen.run(zen, parameter_sets=[{'val': 1}, {}], other=0)
+
+
+def test_run_arrow(queryzen):
+    """Test fetching the result of a Zen as arrow"""
+    pytest.importorskip('pyarrow')
+    zen = queryzen.create('t', 'select :val as val, 2 as other')
+
+    result = queryzen.run(zen, result_format='arrow', val=1)
+
+    assert result.columns == ['val', 'other']
+    assert result.rows == [[1, 2]]
+    assert result.row_count == 1
+    assert result.as_arrow().to_pydict() == {'val': [1], 'other': [2]}
+    assert result.to_dict()['rows'] == [[1, 2]]
+    assert zen.executions == [result]
+    assert queryzen.run(zen, val=1).as_arrow().equals(result.as_arrow())
+
+
+def test_run_compressed(queryzen):
+    """Test that big results are compressed by the backend"""
+    responses = []
+    queryzen._client.client.event_hooks['response'].append(responses.append)
+    query = ('WITH RECURSIVE c(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM c WHERE n < :n)'
+             " SELECT n, 'row' AS name FROM c")
+    zen = queryzen.create('t', query=query)
+
+    result = queryzen.run(zen, n=1000)
+    assert result.row_count == 1000
+    assert responses[-1].headers['content-encoding'] == 'gzip'
+
+    stream = queryzen.run_iter(zen, n=1000)
+    assert sum(len(batch) for batch in stream.iter_batches()) == 1000
+    assert responses[-1].headers['content-encoding'] == 'gzip'
+
+
+def test_run_pages(queryzen):
+    """Test fetching the result of a Zen in pages"""
+    query = ('WITH RECURSIVE c(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM c WHERE n < :n)'
+             ' SELECT n FROM c')
+    zen = queryzen.create('t', query=query)
+
+    result = queryzen.run(zen, limit=2, n=5)
+    assert result.rows == [[1], [2]]
+    assert result.next_page_token is not None
+
+    # Next pages are fetched while iterating.
+    assert list(result) == [[n] for n in range(1, 6)]
+    assert [page.rows for page in result.iter_pages()][-1] == [[5]]
+
+    page = result.next_page()
+    assert page.rows == [[3], [4]]
+    assert page.next_page().next_page_token is None
+    assert queryzen.run(zen, limit=10, n=5).next_page() is None
+
+
+def test_submit_timeout(queryzen):
+    """Test that a submitted Zen is stopped in the database after its timeout"""
+    zen = queryzen.create('t', 'WITH RECURSIVE c(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM c)'
+                               ' SELECT count(*) FROM c')
+
+    result = queryzen.submit(zen, timeout=0.5).result(timeout=30)
+
+    assert result.state == 'TI'
+    assert result.is_error
+    assert zen.state != 'IN'
+
+
+def test_submit_cancel(queryzen):
+    """Test that cancelling a finished execution does nothing"""
+    zen = queryzen.create('t', 'select 1')
+
+    handle = queryzen.submit(zen)
+    handle.result(timeout=10)
+
+    assert not handle.cancel()
+
+
+def test_submit_does_not_exist(queryzen):
+    """Test polling an execution that was never submitted"""
+    zen = queryzen.create('t', 'select 1')
+
+    handle = ExecutionHandle('unknown', zen, queryzen)
+
+    with pytest.raises(exceptions.ExecutionDoesNotExistError):
+        handle.done()
+    with pytest.raises(exceptions.ExecutionDoesNotExistError):
+        handle.cancel()
+
+
+def test_run_lanes(queryzen):
+    """Test running Zens in the batch and interactive lanes"""
+    zen = queryzen.create('t', 'select :val', lane='batch')
+    assert zen.lane == 'batch'
+
+    assert queryzen.run(zen, val=1).rows == [[1]]
+    assert queryzen.run(zen, lane='interactive', val=2).rows == [[2]]
+    assert queryzen.submit(zen, lane='interactive', val=3).result(timeout=10).rows == [[3]]
+
+
+def test_run_inline(queryzen):
+    """Test running a Zen in the backend process"""
+    zen = queryzen.create('t', 'select :val', inline=True)
+    assert zen.inline is True
+
+    assert queryzen.run(zen, val=1).rows == [[1]]
+    assert len(zen.executions) == 1
@@ -36,3 +36,37 @@ def test_get_stats(queryzen):
     stats = queryzen.stats(name=q.name)
 
     assert all(value is not None for value in stats.to_dict().values())
+
+
+def test_get_stats_percentiles(queryzen):
+    """
+    Test that requested percentiles are returned
+    """
+    q = queryzen.create('t', 'select 1')
+
+    for _ in range(5):
+        queryzen.run(q)
+
+    stats = queryzen.stats(name=q.name, percentiles=[75, 99.99])
+
+    assert set(stats.percentiles) == {'75', '99.99'}
+    assert stats.min_execution_time_ms <= stats.p50_execution_time_ms * 1.01
+
+
+def test_get_stats_series(queryzen):
+    """
+    Test that stats series are returned in columnar form
+    """
+    q = queryzen.create('t', 'select 1')
+
+    for _ in range(3):
+        queryzen.run(q)
+
+    series = queryzen.stats_series(name=q.name, bucket='day')
+
+    assert len(series) == 1
+    assert series.count == [3]
+    assert series.error_rate == [0]
+
+    with pytest.raises(ValueError):
+        queryzen.stats_series(name=q.name, bucket='year')
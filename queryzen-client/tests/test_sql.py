@@ -1,7 +1,7 @@
 import pytest
 
 from queryzen import Zen
-from queryzen.sql import safe_sql_replace
+from queryzen.sql import safe_sql_replace, parse_parameters
 
 
 def test_sql_replaces_raises():
@@ -35,3 +35,11 @@ def test_sql_preview():
     zen = Zen.empty()
     zen.query = ':val, :val1, :val2'
     assert zen.preview(**{'val': 'val', 'val1': 1, 'val2': None}) == "'val', 1, NULL"
+
+
+def test_sql_skips_literals():
+    """Test that strings, comments and casts are not parsed as parameters"""
+    query = "select :val::int, '10:30' -- :comment\n/* :other */ from t where t = :val"
+    assert parse_parameters(query) == ['val']
+    assert safe_sql_replace(query, {'val': 1}) == \
+           "select 1::int, '10:30' -- :comment\n/* :other */ from t where t = 1"
@@ -58,13 +58,16 @@ def test_zen_to_dict():
                version=-1,
                query='_',
                description='-1',
-               created_at=t).to_dict() == {'collection': 'main',
+               created_at=t).to_dict() == {'cache_ttl': None,
+                                           'collection': 'main',
                                            'created_at': t,
                                            'created_by': 'not_implemented',
                                            'default_parameters': {},
                                            'description': '-1',
                                            'executions': [],
                                            'id': -1,
+                                           'lane': None,
+                                           'inline': None,
                                            'name': '_',
                                            'query': '_',
                                            'state': 'unknown',